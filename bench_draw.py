@@ -0,0 +1,84 @@
+"""Benchmark du tirage des équipes (draw.py).
+
+Usage : python bench_draw.py
+"""
+import random
+import time
+from collections import Counter
+
+import config
+from draw import DrawError, draw_pairs
+from state import Player
+
+SIZES = [16, 100, 1000, 5000, 10000]
+REPEAT = 5
+
+
+def _lobby(n: int, rng: random.Random, skew: bool) -> list[Player]:
+    if skew:
+        # Une classe occupe exactement la moitié du lobby (cas limite)
+        dominant = config.CLASSES[0]
+        others = config.CLASSES[1:4]
+        classes = [dominant] * (n // 2) + [rng.choice(others) for _ in range(n - n // 2)]
+    else:
+        classes = [rng.choice(config.CLASSES) for _ in range(n)]
+    return [Player(user_id=i, cls=c) for i, c in enumerate(classes)]
+
+
+def _pairings(players: list[Player]) -> set:
+    """Tous les tirages valides d'un petit lobby (ensembles de paires d'ids)."""
+    if not players:
+        return {frozenset()}
+    first, rest = players[0], players[1:]
+    out = set()
+    for i, p in enumerate(rest):
+        if p.cls != first.cls:
+            pair = frozenset((first.user_id, p.user_id))
+            out.update(s | {pair} for s in _pairings(rest[:i] + rest[i + 1:]))
+    return out
+
+
+def _check_uniform(rng: random.Random, draws: int = 30000):
+    """Fréquence de chaque tirage valide d'un petit lobby proche de 1/N."""
+    classes = ["iop", "iop", "iop", "cra", "cra", "sram", "sram", "feca"]
+    players = [Player(user_id=i, cls=c) for i, c in enumerate(classes)]
+    valid = _pairings(players)
+    seen = Counter(
+        frozenset(frozenset((a.user_id, b.user_id)) for a, b in draw_pairs(players, rng))
+        for _ in range(draws)
+    )
+    assert set(seen) == valid
+    expected = draws / len(valid)
+    worst = max(abs(c - expected) / expected for c in seen.values())
+    assert worst < 0.2, worst
+    print(f"uniformité : {len(valid)} tirages valides, écart max {100 * worst:.1f} %")
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'joueurs':>8} {'lobby':>10} {'ms (moy.)':>10} {'ms (max)':>10}")
+    for n in SIZES:
+        for skew in (False, True):
+            players = _lobby(n, rng, skew)
+            times = []
+            for _ in range(REPEAT):
+                t0 = time.perf_counter()
+                pairs = draw_pairs(players, rng)
+                times.append((time.perf_counter() - t0) * 1000)
+                assert len(pairs) == n // 2
+                assert all(a.cls != b.cls for a, b in pairs)
+            label = "dominé" if skew else "uniforme"
+            print(f"{n:>8} {label:>10} {sum(times) / len(times):>10.2f} {max(times):>10.2f}")
+
+    _check_uniform(rng)
+
+    # Lobby infaisable : la raison est renvoyée immédiatement
+    players = [Player(user_id=i, cls="iop") for i in range(10000)]
+    try:
+        draw_pairs(players, rng)
+    except DrawError as e:
+        print(f"infaisable : {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark du solveur de planification (planning.py).
+
+Usage : python bench_planning.py
+"""
+import random
+import time
+
+import config
+from planning import build_slots, merge_windows, solve
+from state import Match, Player, Team
+
+SIZES = [16, 64, 128, 500]
+REPEAT = 5
+DAYS = 7
+
+
+def _instance(n_matches: int, rng: random.Random, slots: list[int], duration: int):
+    per_day = len(slots) // DAYS
+    teams = {}
+    matches = []
+    availability = {}
+    for i in range(n_matches):
+        ids = (2 * i + 1, 2 * i + 2)
+        for team_id in ids:
+            players = (Player(user_id=team_id * 10), Player(user_id=team_id * 10 + 1))
+            teams[team_id] = Team(id=team_id, players=players)
+            for p in players:
+                # Un joueur sur quatre ne saisit rien ; les autres donnent 3 à 5 soirées
+                if rng.random() < 0.25:
+                    continue
+                windows = []
+                for day in rng.sample(range(DAYS), rng.randint(3, 5)):
+                    start = slots[day * per_day + rng.randrange(2)]
+                    windows.append((start, start + rng.randint(3, 5) * duration))
+                availability[p.user_id] = merge_windows(windows)
+        matches.append(Match(
+            id=i + 1, round_no=1, team1_id=ids[0], team2_id=ids[1],
+            date_str="", time_str="", channel_id=0,
+        ))
+    return matches, teams, availability
+
+
+def main():
+    rng = random.Random(42)
+    duration = config.SCHEDULE_SLOT_MINUTES * 60
+    slots = build_slots("01/03/2099", "18h", "23h", DAYS, duration)
+    print(f"{len(slots)} créneaux, capacité {config.SCHEDULE_CAPACITY}")
+    print(f"{'matchs':>8} {'planifiés':>10} {'horizon':>8} {'ms (moy.)':>10} {'ms (max)':>10}")
+    for n in SIZES:
+        matches, teams, availability = _instance(n, rng, slots, duration)
+        times = []
+        for _ in range(REPEAT):
+            t0 = time.perf_counter()
+            schedule = solve(matches, teams, availability, slots, duration, config.SCHEDULE_CAPACITY)
+            times.append((time.perf_counter() - t0) * 1000)
+
+        per_slot = {}
+        for ts in schedule.assigned.values():
+            per_slot[ts] = per_slot.get(ts, 0) + 1
+        assert max(per_slot.values(), default=0) <= config.SCHEDULE_CAPACITY
+        assert len(schedule.assigned) + len(schedule.unscheduled) == n
+        horizon = slots.index(schedule.makespan) + 1 if schedule.makespan else 0
+        print(
+            f"{n:>8} {len(schedule.assigned):>10} {horizon:>8} "
+            f"{sum(times) / len(times):>10.2f} {max(times):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark des appariements du système suisse (swiss.py).
+
+Usage : python bench_swiss.py
+"""
+import random
+import time
+from dataclasses import replace
+
+from state import Match, Player, SwissState, Team, TournamentSettings, TournamentState
+from store import TournamentStore
+from swiss import SwissEngine, default_rounds
+
+SIZES = [16, 101, 512, 1000, 2048]
+
+
+def _tournament(n: int) -> tuple[TournamentStore, SwissEngine]:
+    store = TournamentStore(TournamentState())
+    store.set_teams([
+        Team(id=i, players=(Player(user_id=2 * i), Player(user_id=2 * i + 1)))
+        for i in range(1, n + 1)
+    ])
+    engine = SwissEngine(store, TournamentSettings(guild_id=0, name="bench", embeds_channel_id=0, match_category_id=0))
+    store.set_swiss(SwissState(rounds=default_rounds(n)))
+    return store, engine
+
+
+def play_round(
+    store: TournamentStore, engine: SwissEngine, rng: random.Random
+) -> tuple[float, list[tuple[int, int]], int | None, int]:
+    """Apparie et joue un round complet ; renvoie (durée de pair_next, paires, exempt, revanches)."""
+    t0 = time.perf_counter()
+    pairs, bye, rematches = engine.pair_next(rng)
+    elapsed = time.perf_counter() - t0
+
+    round_no = store.state.current_round + 1
+    store.set_round(round_no)
+    if bye is not None:
+        store.set_swiss(replace(store.state.swiss, byes={**store.state.swiss.byes, round_no: bye}))
+
+    seen = {bye} if bye is not None else set()
+    for a, b in pairs:
+        assert a not in seen and b not in seen
+        seen.update((a, b))
+        m = Match(
+            id=store.next_match_id(), round_no=round_no, team1_id=a, team2_id=b,
+            date_str="", time_str="", channel_id=0,
+        )
+        store.add_match(m)
+        # L'équipe au plus petit id (la « meilleure ») gagne 2 fois sur 3
+        winner = min(a, b) if rng.random() < 2 / 3 else max(a, b)
+        store.update_match(m, status="DONE", winner_team_id=winner)
+    assert len(seen) == len(store.state.teams)
+    return elapsed, pairs, bye, rematches
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'équipes':>8} {'rounds':>7} {'ms/round (moy.)':>16} {'ms (max)':>10} {'revanches':>10}")
+    for n in SIZES:
+        store, engine = _tournament(n)
+        times, rematches = [], 0
+        for _ in range(store.state.swiss.rounds):
+            elapsed, _, _, r = play_round(store, engine, rng)
+            times.append(elapsed * 1000)
+            rematches += r
+
+        # Classement incrémental == recalcul complet
+        incremental = engine.standings()
+        engine.rebuild()
+        assert incremental == engine.standings()
+        print(
+            f"{n:>8} {len(times):>7} {sum(times) / len(times):>16.2f} "
+            f"{max(times):>10.2f} {rematches:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""Benchmark hors-ligne d'un tournoi complet (tournoi.py) avec un faux client Discord.
+
+Les objets discord.py utilisés par le bot (salons, messages, serveur,
+interactions et followups) sont remplacés par des doublures en mémoire
+qui comptent chaque appel REST par endpoint. Aucun accès réseau.
+
+Usage : python bench_tournoi.py [--sizes 8,32,128] [--latency 0] [--rate-limits] [--json FICHIER]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+# Données du benchmark dans un dossier jetable (avant l'import de config)
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_tournoi_")
+
+import discord
+from aiohttp import web
+
+import config
+import main as bot_main
+import outbound
+import permissions
+import tournoi
+from outbound import OUTBOUND
+from resolver import RESOLVER
+from screens import CONTENT
+from tournaments import REGISTRY
+
+SIZES = [8, 32, 128, 512, 1024]
+GUILD_ID = 1000
+# Un match sur FORFEIT_EVERY se termine par forfait plutôt que par un screen
+FORFEIT_EVERY = 8
+
+_ids = itertools.count(10**15)
+
+
+# =================================================
+# Doublures discord.py
+# =================================================
+class _Response:
+    """Réponse minimale pour construire discord.NotFound."""
+    status = 404
+    reason = "Not Found"
+
+
+def _not_found(code: int) -> discord.NotFound:
+    return discord.NotFound(_Response(), {"code": code, "message": "Unknown"})
+
+
+class FakeHTTP:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    async def call(self, endpoint: str):
+        self.calls[endpoint] += 1
+        await asyncio.sleep(self.latency)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.roles = []
+        self.mention = f"<@{user_id}>"
+
+
+class FakeAttachment:
+    def __init__(self, url: str, size: int):
+        self.id = next(_ids)
+        self.url = url
+        self.filename = url.rsplit("/", 1)[-1]
+        self.size = size
+        self.content_type = "image/png"
+
+
+class ScreenServer:
+    """CDN local : les screens sont réellement téléchargés par screens.CONTENT."""
+
+    def __init__(self):
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+
+    @staticmethod
+    def body(name: str) -> bytes:
+        # Contenu propre à chaque match (pas de déduplication entre matchs)
+        return b"\x89PNG\r\n\x1a\n" + name.encode() * 512
+
+    async def start(self):
+        async def screen(request: web.Request) -> web.Response:
+            return web.Response(body=self.body(request.match_info["name"]), content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/{name}", screen)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def attachment(self, name: str) -> FakeAttachment:
+        return FakeAttachment(f"http://127.0.0.1:{self.port}/{name}", len(self.body(name)))
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeMessage:
+    def __init__(self, client, channel, author, content=None, embed=None, view=None,
+                 attachments=(), webhook: str | None = None):
+        self.client = client
+        self.id = next(_ids)
+        self.channel = channel
+        self.author = author
+        self.content = content or ""
+        self.embed = embed
+        self.view = view
+        self.attachments = list(attachments)
+        self.created_at = datetime.now(timezone.utc)
+        self.jump_url = f"https://discord.com/channels/{GUILD_ID}/{channel.id}/{self.id}"
+        self._webhook = webhook
+
+    async def edit(self, **kwargs):
+        if self._webhook:
+            await self.client.http.call("PATCH /webhooks/{token}/messages/{id}")
+        else:
+            await self.client.http.call("PATCH /channels/{id}/messages/{id}")
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+        return self
+
+    async def delete(self):
+        await self.client.http.call("DELETE /channels/{id}/messages/{id}")
+        self.channel.messages.pop(self.id, None)
+
+    async def add_reaction(self, emoji):
+        await self.client.http.call("PUT /channels/{id}/messages/{id}/reactions")
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id: int):
+        self.channel = channel
+        self.id = message_id
+
+    def _target(self) -> FakeMessage:
+        if self.channel.deleted:
+            raise _not_found(10003)
+        msg = self.channel.messages.get(self.id)
+        if msg is None:
+            raise _not_found(10008)
+        return msg
+
+    async def edit(self, **kwargs):
+        await self.channel.client.http.call("PATCH /channels/{id}/messages/{id}")
+        msg = self._target()
+        for k, v in kwargs.items():
+            setattr(msg, k, v)
+        return msg
+
+    async def delete(self):
+        await self.channel.client.http.call("DELETE /channels/{id}/messages/{id}")
+        self._target()
+        del self.channel.messages[self.id]
+
+
+class FakeChannel:
+    def __init__(self, client, guild, name: str, overwrites=None):
+        self.client = client
+        self.guild = guild
+        self.id = next(_ids)
+        self.name = name
+        self.overwrites = overwrites or {}
+        self.messages: dict[int, FakeMessage] = {}
+        self.deleted = False
+        self.mention = f"<#{self.id}>"
+        client.channels[self.id] = self
+
+    async def send(self, content=None, *, embed=None, view=None, author=None, attachments=()):
+        await self.client.http.call("POST /channels/{id}/messages")
+        msg = FakeMessage(self.client, self, author or self.client.user, content, embed, view, attachments)
+        self.messages[msg.id] = msg
+        return msg
+
+    def get_partial_message(self, message_id: int) -> FakePartialMessage:
+        return FakePartialMessage(self, message_id)
+
+    async def history(self, limit: int = 100, oldest_first: bool = False):
+        msgs = list(self.messages.values())
+        if not oldest_first:
+            msgs.reverse()
+        msgs = msgs[:limit]
+        for i, msg in enumerate(msgs):
+            if i % 100 == 0:
+                await self.client.http.call("GET /channels/{id}/messages")
+            yield msg
+
+    async def edit(self, **kwargs):
+        await self.client.http.call("PATCH /channels/{id}")
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    async def delete(self, reason: str | None = None):
+        await self.client.http.call("DELETE /channels/{id}")
+        self.deleted = True
+        self.client.channels.pop(self.id, None)
+
+
+class FakeGuild:
+    def __init__(self, client, guild_id: int):
+        self.client = client
+        self.id = guild_id
+        self.default_role = discord.Object(id=guild_id)
+
+    def get_role(self, role_id: int):
+        return None
+
+    def get_channel(self, channel_id: int):
+        return self.client.channels.get(channel_id)
+
+    async def create_text_channel(self, name: str, category=None, overwrites=None):
+        await self.client.http.call("POST /guilds/{id}/channels")
+        return FakeChannel(self.client, self, name, overwrites)
+
+
+class FakeClient:
+    """Remplace commands.Bot pour RESOLVER et le registre des tournois."""
+
+    def __init__(self, latency: float):
+        self.http = FakeHTTP(latency)
+        self.channels: dict[int, FakeChannel] = {}
+        self.user = FakeUser(next(_ids), bot=True)
+        self.views = 0
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        await self.http.call("GET /channels/{id}")
+        ch = self.channels.get(channel_id)
+        if ch is None:
+            raise _not_found(10003)
+        return ch
+
+    def get_partial_messageable(self, channel_id: int):
+        return self.channels[channel_id]
+
+    def add_view(self, view, message_id: int | None = None):
+        self.views += 1
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+        self.view = None
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, ephemeral: bool = False, thinking: bool = False):
+        await self.interaction.client.http.call("POST /interactions/{id}/{token}/callback")
+        self._done = True
+
+    async def send_message(self, content=None, *, view=None, ephemeral: bool = False, embed=None):
+        await self.interaction.client.http.call("POST /interactions/{id}/{token}/callback")
+        self._done = True
+        self.view = view
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, *, view=None, ephemeral: bool = False, wait: bool = False, embed=None):
+        client = self.interaction.client
+        await client.http.call("POST /webhooks/{token}")
+        return FakeMessage(
+            client, self.interaction.channel, client.user, content, embed, view,
+            webhook=self.interaction.token
+        )
+
+
+class FakeInteraction:
+    def __init__(self, client: FakeClient, guild: FakeGuild, channel: FakeChannel, user: FakeUser):
+        self.client = client
+        self.id = next(_ids)
+        self.token = f"token-{self.id}"
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.user = user
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeTree:
+    """Collecte les callbacks des slash commands déclarées par tournoi.setup."""
+
+    def __init__(self):
+        self.commands = {}
+
+    def command(self, name: str, **kwargs):
+        def decorator(func):
+            self.commands[name] = func
+            return func
+        return decorator
+
+
+# =================================================
+# Scénario : tournoi complet
+# =================================================
+class Bench:
+    def __init__(self, latency: float):
+        self.client = FakeClient(latency)
+        self.guild = FakeGuild(self.client, GUILD_ID)
+        self.lobby = FakeChannel(self.client, self.guild, "lobby")
+        self.orga = FakeUser(config.ORGA_USER_ID)
+        self.cdn = ScreenServer()
+
+        self.tree = FakeTree()
+        tournoi.setup(self.tree, self.client)
+        self.cmd = self.tree.commands
+
+        RESOLVER.attach(self.client)
+        REGISTRY.load(self.client)
+        default = REGISTRY.get(GUILD_ID)
+        assert permissions.is_orga_or_admin(FakeInteraction(self.client, self.guild, self.lobby, self.orga), default.settings)
+
+    def interaction(self, channel: FakeChannel | None = None, user: FakeUser | None = None) -> FakeInteraction:
+        return FakeInteraction(self.client, self.guild, channel or self.lobby, user or self.orga)
+
+    async def play_match(self, t, m):
+        ch = self.client.channels[m.channel_id]
+
+        # Tours suivants du tableau : créés sans horaire, fixé par l'organisation
+        if not m.date_str:
+            await self.cmd["modifier"](self.interaction(ch), date="02/01/2099", heure="21h00")
+
+        match_view = ch.messages[m.created_message_id].view
+        await match_view.validate.callback(self.interaction(ch))
+
+        if m.id % FORFEIT_EVERY == 0:
+            validated_view = ch.messages[m.created_message_id].view
+            inter = self.interaction(ch)
+            await validated_view.forfait.callback(inter)
+            await inter.response.view.team2.callback(self.interaction(ch))
+            return
+
+        # Screen posté par un joueur : vrai handler (filtre, archivage, prompt)
+        player = FakeUser(t.store.team(m.team1_id).players[0].user_id)
+        screen = await ch.send("gg", author=player, attachments=[self.cdn.attachment(f"{m.id}.png")])
+        await bot_main.on_message(screen)
+        await t.result_prompts[m.id].win1.callback(self.interaction(ch))
+
+    async def run(self, n_teams: int) -> dict:
+        name = f"bench-{n_teams}"
+        calls = self.client.http.calls
+        calls.clear()
+        phases = {}
+        screens0 = dict(CONTENT.stats)
+
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t_start = time.perf_counter()
+
+        # Lobby
+        t0 = time.perf_counter()
+        embeds_ch = FakeChannel(self.client, self.guild, f"embeds-{n_teams}")
+        category = FakeChannel(self.client, self.guild, f"matchs-{n_teams}")
+        await self.cmd["tournoi_creer"](
+            self.interaction(), nom=name, salon_embeds=embeds_ch, categorie=category
+        )
+        t = REGISTRY.get(GUILD_ID, name)
+
+        players = [FakeUser(next(_ids)) for _ in range(2 * n_teams)]
+        for p in players:
+            await self.cmd["inscription"](self.interaction(), joueur=p, competition=name)
+        for i, p in enumerate(players):
+            cls = config.CLASSES[i % len(config.CLASSES)]
+            await self.cmd["classe"](self.interaction(), joueur=p, classe=cls, competition=name)
+        phases["lobby"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        await self.cmd["tirage"](self.interaction(), competition=name)
+        phases["tirage"] = time.perf_counter() - t0
+        assert len(t.state.teams) == n_teams
+
+        # Un seul /tournoi : le tableau s'enchaîne ensuite à chaque résultat
+        t0 = time.perf_counter()
+        await self.cmd["tournoi"](self.interaction(), date="01/01/2099", heure="21h00", competition=name)
+        phases["tournoi"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        played = set()
+        while t.bracket_engine.champion() is None:
+            # Seuls les matchs entièrement provisionnés (embed + vue) sont jouables
+            batch = [m for m in t.state.matches if m.id not in played and m.created_message_id]
+            if not batch:
+                # Matchs suivants en cours de création par le moteur du tableau
+                task = t.bracket_engine._task
+                if task is None or task.done():
+                    raise RuntimeError("Tableau bloqué sans match jouable")
+                await task
+                continue
+            played.update(m.id for m in batch)
+            await asyncio.gather(*(self.play_match(t, m) for m in batch))
+        phases["matchs"] = time.perf_counter() - t0
+        rounds = t.state.current_round
+
+        # Travail différé : screens, embeds, fermeture du dernier round, journal
+        t0 = time.perf_counter()
+        await t.screens.flush()
+        await t.refresher.flush()
+        await t.teardown.flush()
+        await t.journal.flush()
+        await asyncio.sleep(0)
+        phases["differe"] = time.perf_counter() - t0
+
+        wall = time.perf_counter() - t_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert all(m.status == "DONE" for m in t.state.matches)
+        # Chaque match gagné sur screen a sa preuve archivée
+        screened = [m for m in t.state.matches if not m.forfeit]
+        assert all(len(m.screenshots) == 1 for m in screened), CONTENT.stats
+        return {
+            "teams": n_teams,
+            "players": len(players),
+            "rounds": rounds,
+            "matches": len(t.state.matches),
+            "wall_s": round(wall, 4),
+            "phases_s": {k: round(v, 4) for k, v in phases.items()},
+            "rest_total": sum(calls.values()),
+            "rest": dict(sorted(calls.items())),
+            "peak_mem_kib": round((peak - base) / 1024, 1),
+            "screens": {k: CONTENT.stats[k] - screens0[k] for k in ("stored", "dedup", "errors")},
+            "outbound_wait_max_s": {k: round(v["wait_max"], 4) for k, v in OUTBOUND.stats.items()},
+        }
+
+
+def _disable_rate_limits():
+    # Mesure du coût CPU/REST du bot, pas des limites de Discord
+    for route in outbound.ROUTE_LIMITS:
+        outbound.ROUTE_LIMITS[route] = (10**9, 1.0)
+    outbound.DEFAULT_LIMIT = (10**9, 1.0)
+    OUTBOUND._global = outbound.Budget(10**9, 1.0)
+
+
+async def _main(args) -> list[dict]:
+    if not args.rate_limits:
+        _disable_rate_limits()
+    bench = Bench(args.latency / 1000)
+    await bench.cdn.start()
+    results = []
+    for n in args.sizes:
+        r = await bench.run(n)
+        results.append(r)
+        print(
+            f"{r['teams']:>6} équipes {r['matches']:>6} matchs {r['wall_s']:>9.3f} s "
+            f"{r['rest_total']:>8} REST {r['peak_mem_kib']:>10.1f} KiB",
+            file=sys.stderr,
+        )
+    await REGISTRY.close()
+    await bench.cdn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="nombres d'équipes, séparés par des virgules")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence simulée par appel REST (ms)")
+    parser.add_argument("--rate-limits", action="store_true", help="conserver les budgets de la file sortante")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier (sinon sur stdout)")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",")]
+
+    try:
+        results = asyncio.run(_main(args))
+    finally:
+        shutil.rmtree(config.DATA_DIR, ignore_errors=True)
+    out = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark de l'entrepôt de résultats (warehouse.py) et du recalcul Elo (ratings.py).
+
+Usage : python bench_warehouse.py
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import config
+import ratings
+import warehouse
+from state import Player, Team
+
+SIZES = [100, 1000, 5000]
+TEAMS = 128
+ROUND_MATCHES = [64, 32, 16, 8, 4, 2, 1]  # tableau de 128 équipes
+MATCHES_PER_TOURNAMENT = sum(ROUND_MATCHES)
+# Joueurs distincts sur l'ensemble des tournois (chacun en joue plusieurs)
+POPULATION = 20_000
+REPEAT = 5
+
+
+def _columns(n_tournaments: int, rng: np.random.Generator) -> warehouse.Columns:
+    n = n_tournaments * MATCHES_PER_TOURNAMENT
+    classes = rng.integers(0, warehouse.N_CLASSES, size=(4, n))
+    w = np.minimum(classes[0], classes[1]) * warehouse.N_CLASSES + np.maximum(classes[0], classes[1])
+    l = np.minimum(classes[2], classes[3]) * warehouse.N_CLASSES + np.maximum(classes[2], classes[3])
+
+    # Comme un vrai tableau : chaque équipe joue au plus une fois par round,
+    # donc aucun joueur n'apparaît deux fois dans un même (tournoi, round)
+    players = np.empty((4, n), dtype=np.int64)
+    i = 0
+    for _ in range(n_tournaments):
+        pool = rng.choice(POPULATION, size=(TEAMS, 2), replace=False)
+        for k in ROUND_MATCHES:
+            teams = pool[rng.permutation(TEAMS)[:2 * k]]
+            players[:, i:i + k] = np.concatenate([teams[:k].T, teams[k:].T])
+            i += k
+
+    return {
+        "run": np.repeat(np.arange(n_tournaments, dtype=np.int64), MATCHES_PER_TOURNAMENT),
+        "guild": np.zeros(n, dtype=np.int64),
+        "round": np.tile(np.repeat(np.arange(1, 8), ROUND_MATCHES), n_tournaments).astype(np.int16),
+        "map": rng.integers(-1, len(config.MAPS), size=n).astype(np.int8),
+        "forfeit": rng.random(n) < 0.05,
+        "w_pair": w.astype(np.int16),
+        "l_pair": l.astype(np.int16),
+        "w_p1": players[0],
+        "w_p2": players[1],
+        "l_p1": players[2],
+        "l_p2": players[3],
+    }
+
+
+async def _incremental(cols: warehouse.Columns) -> ratings.Table:
+    """Même historique rejoué match par match par RatingEngine.record."""
+    directory = tempfile.mkdtemp(prefix="bench_elo_")
+    engine = ratings.RatingEngine(os.path.join(directory, "ratings.json"))
+    try:
+        for i in np.lexsort((cols["round"], cols["run"])):
+            winner = Team(0, (Player(int(cols["w_p1"][i])), Player(int(cols["w_p2"][i]))))
+            loser = Team(1, (Player(int(cols["l_p1"][i])), Player(int(cols["l_p2"][i]))))
+            engine.record(winner, loser)
+        await engine.close()
+        return dict(engine._table)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _check_recompute(cols: warehouse.Columns, table: ratings.Table):
+    expected = asyncio.run(_incremental(cols))
+    assert table.keys() == expected.keys()
+    for uid, (r, games) in expected.items():
+        assert games == table[uid][1], uid
+        assert abs(r - table[uid][0]) < 1e-6, (uid, r, table[uid][0])
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'tournois':>9} {'matchs':>10} {'ms (moy.)':>10} {'ms (max)':>10} {'elo (ms)':>10}")
+    for n in SIZES:
+        cols = _columns(n, rng)
+        times = []
+        for _ in range(REPEAT):
+            t0 = time.perf_counter()
+            summary = warehouse.summarize(cols)
+            times.append((time.perf_counter() - t0) * 1000)
+        assert summary["matches"] == n * MATCHES_PER_TOURNAMENT
+        assert summary["tournaments"] == n
+
+        t0 = time.perf_counter()
+        table = ratings.recompute(cols)
+        elo_ms = (time.perf_counter() - t0) * 1000
+        if n == SIZES[0]:
+            # Le recalcul vectorisé doit reproduire les mises à jour incrémentales
+            _check_recompute(cols, table)
+
+        print(
+            f"{n:>9} {summary['matches']:>10} {sum(times) / len(times):>10.2f} "
+            f"{max(times):>10.2f} {elo_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
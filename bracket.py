@@ -0,0 +1,247 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import discord
+
+import metrics
+from provisioning import PairJob, RoundProvisioner
+from resolver import RESOLVER
+from state import BracketState, TournamentSettings
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Occupant d'un nœud : (décidé, team id) — (True, None) = sous-arbre vide (exempts)
+Occupant = Tuple[bool, Optional[int]]
+
+
+def bracket_size(n_teams: int) -> int:
+    size = 1
+    while size < n_teams:
+        size *= 2
+    return size
+
+
+def seed_order(size: int) -> List[int]:
+    """Têtes de série (1-based) par position de feuille : 1 et 2 ne se
+    rencontrent qu'en finale, et la tête k affronte size+1-k au premier tour."""
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for seed in order for s in (seed, n + 1 - seed)]
+    return order
+
+
+def build_bracket(team_ids: List[int], base_round: int, date_str: str, time_str: str) -> BracketState:
+    """Tableau pour `team_ids` classés par tête de série (le premier = tête 1).
+
+    Les exemptions vont aux meilleures têtes de série : avec n > size/2
+    équipes, deux exempts ne se rencontrent jamais.
+    """
+    size = bracket_size(len(team_ids))
+    leaves = [team_ids[s - 1] if s <= len(team_ids) else None for s in seed_order(size)]
+    return BracketState(size=size, leaves=leaves, base_round=base_round, date_str=date_str, time_str=time_str)
+
+
+def node_round(node: int, size: int) -> int:
+    """Tour (1 = premier tour) du match au nœud `node`."""
+    return size.bit_length() - node.bit_length()
+
+
+class BracketEngine:
+    """Avancement du tableau sans barrière de round.
+
+    Dès que les deux matchs d'alimentation d'un nœud sont décidés, le match
+    de ce nœud est créé (salon, embed, MatchView), sans horaire : il reste
+    en attente jusqu'à /planifier. Les exempts avancent sans match. Les
+    créations en échec sont reprises au passage suivant.
+    """
+
+    def __init__(self, store: TournamentStore, lock: asyncio.Lock, settings: TournamentSettings):
+        self.store = store
+        self.lock = lock
+        self.settings = settings
+        self.bot: discord.Client | None = None
+        self.view_factory: Callable[[int], discord.ui.View] | None = None
+
+        self._failed: Dict[int, PairJob] = {}  # nœud -> job à reprendre
+        self._task: asyncio.Task | None = None
+        self._again = False
+
+        # Occupant de chaque nœud (index = nœud) et nœuds dont le match est
+        # jouable, tenus à jour à chaque résultat sans reparcourir l'arbre
+        self._occ: List[Occupant] = []
+        self._ready: Set[int] = set()
+
+        store.subscribe(self._on_mutation)
+        self.rebuild()
+
+    # -------------------------
+    # Lecture du tableau
+    # -------------------------
+    @property
+    def bracket(self) -> BracketState:
+        return self.store.state.bracket
+
+    def rebuild(self):
+        """Recalcule les occupants des feuilles vers la finale (chargement, nouveau tableau)."""
+        size = self.bracket.size
+        occ: List[Occupant] = [(False, None)] * (2 * size)
+        self._ready = set()
+        for i, team_id in enumerate(self.bracket.leaves):
+            occ[size + i] = (True, team_id)
+
+        for node in range(size - 1, 0, -1):
+            (l_done, left), (r_done, right) = occ[2 * node], occ[2 * node + 1]
+            if not (l_done and r_done):
+                continue
+            if left is None or right is None:
+                occ[node] = (True, right if left is None else left)  # exemption
+                continue
+            m = self.store.match_by_node(node)
+            if m is None:
+                self._ready.add(node)
+            elif m.status == "DONE" and m.winner_team_id is not None:
+                occ[node] = (True, m.winner_team_id)
+        self._occ = occ
+
+        # Match enregistré mais message jamais posté (échec, redémarrage) :
+        # repris au prochain passage plutôt que de bloquer la branche
+        teams = self.store.teams_by_id
+        for node, m in self.store.matches_by_node.items():
+            if node in self._failed or m.created_message_id or m.status == "DONE":
+                continue
+            self._failed[node] = PairJob(
+                match_id=m.id, team1=teams[m.team1_id], team2=teams[m.team2_id], match=m, bracket_node=node,
+            )
+
+    def _settle(self, node: int):
+        """Remonte depuis un nœud décidé : exemptions propagées, match parent rendu jouable."""
+        occ = self._occ
+        while node > 1:
+            parent = node // 2
+            (l_done, left), (r_done, right) = occ[2 * parent], occ[2 * parent + 1]
+            if not (l_done and r_done):
+                return
+            if left is None or right is None:
+                occ[parent] = (True, right if left is None else left)
+                node = parent
+                continue
+            if self.store.match_by_node(parent) is None:
+                self._ready.add(parent)
+            return
+
+    def ready_nodes(self) -> List[Tuple[int, int, int]]:
+        """(nœud, équipe 1, équipe 2) des matchs jouables pas encore créés."""
+        occ = self._occ
+        ready = []
+        for node in sorted(self._ready):
+            if node in self._failed:
+                continue
+            (_, left), (_, right) = occ[2 * node], occ[2 * node + 1]
+            ready.append((node, left, right))
+        return ready
+
+    def champion(self) -> int | None:
+        if not self.bracket.size:
+            return None
+        done, team_id = self._occ[1]
+        return team_id if done else None
+
+    # -------------------------
+    # Avancement
+    # -------------------------
+    def start(self, bot: discord.Client):
+        self.bot = bot
+        if self.bracket.size:
+            self._kick()  # reprise après redémarrage
+
+    def _on_mutation(self, op: str, payload: dict):
+        if op == "match_add":
+            self._ready.discard(payload["match"].get("bracket_node"))
+        elif op == "match_update" and payload["fields"].get("status") == "DONE":
+            m = self.store.match(payload["id"])
+            if m is not None and m.bracket_node is not None and m.winner_team_id is not None:
+                self._occ[m.bracket_node] = (True, m.winner_team_id)
+                self._settle(m.bracket_node)
+                self._kick()
+        elif op == "bracket_set":
+            self.rebuild()
+        elif op == "reset":
+            self._failed.clear()
+            self.rebuild()
+
+    def _kick(self):
+        if self.bot is None:
+            return
+        if self._task is not None and not self._task.done():
+            self._again = True
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            self._again = False
+            try:
+                async with self.lock:
+                    await self.advance()
+            except Exception:
+                metrics.ERRORS.inc(source="bracket")
+                log.exception("Avancement du tableau en échec")
+            if not self._again:
+                return
+
+    async def advance(self, progress=None) -> Tuple[int, List[PairJob]]:
+        """Crée tous les matchs prêts et relance ceux en échec.
+
+        À appeler sous self.lock ; renvoie (matchs créés, jobs en échec).
+        """
+        if not self.bracket.size or self.view_factory is None:
+            return 0, []
+
+        category = await RESOLVER.channel(self.settings.match_category_id)
+        guild = category.guild
+        size = self.bracket.size
+        teams = self.store.teams_by_id
+
+        # Regroupement par tour : un RoundProvisioner par numéro de round
+        retries: Dict[int, List[PairJob]] = {}
+        for node, job in self._failed.items():
+            retries.setdefault(self.bracket.base_round + node_round(node, size), []).append(job)
+        ready: Dict[int, List[Tuple[int, int, int]]] = {}
+        for entry in self.ready_nodes():
+            ready.setdefault(self.bracket.base_round + node_round(entry[0], size), []).append(entry)
+
+        if not retries and not ready:
+            return 0, []
+
+        # Les jobs en échec gardent leur id réservé, même sans Match créé
+        next_id = max([self.store.next_match_id()] + [j.match_id + 1 for j in self._failed.values()])
+        created = 0
+        failed: List[PairJob] = []
+        for round_no in sorted(retries.keys() | ready.keys()):
+            if round_no > self.store.state.current_round:
+                self.store.set_round(round_no)
+            # Seul le premier tour a un horaire : les suivants, créés au fil des
+            # résultats, passent par /planifier (puis les rappels)
+            first = round_no == self.bracket.base_round + 1
+            provisioner = RoundProvisioner(
+                self.store, guild, self.settings, round_no,
+                self.bracket.date_str if first else "", self.bracket.time_str if first else "",
+                self.view_factory,
+            )
+            entries = ready.get(round_no, [])
+            jobs = retries.get(round_no, []) + provisioner.jobs_for(
+                [(teams[left], teams[right]) for _, left, right in entries],
+                first_id=next_id, nodes=[node for node, _, _ in entries],
+            )
+            next_id += len(entries)
+            for job in await provisioner.run(jobs, progress):
+                failed.append(job)
+            created += sum(j.done for j in jobs)
+
+        self._failed = {j.bracket_node: j for j in failed}
+        if created:
+            log.info("Tableau : %d match(s) créé(s), %d en échec", created, len(failed))
+        return created, failed
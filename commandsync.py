@@ -0,0 +1,69 @@
+import hashlib
+import json
+import logging
+import os
+
+import discord
+from discord import app_commands
+
+log = logging.getLogger(__name__)
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: discord.abc.Snowflake | None = None) -> str:
+    """Empreinte du payload exact que tree.sync() enverrait pour ce scope."""
+    payload = sorted(
+        (c.to_dict(tree) for c in tree.get_commands(guild=guild)),
+        key=lambda d: (d.get("type", 1), d["name"]),
+    )
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CommandSync:
+    """Sync des slash commands uniquement quand l'arbre a changé.
+
+    Le hash du dernier arbre synchronisé est conservé par scope (global ou
+    serveur de dev) ; un redémarrage sans changement ne fait aucun appel.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, hashes: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(tmp, self.path)
+
+    async def sync(self, tree: app_commands.CommandTree, dev_guild_id: int | None = None) -> bool:
+        """Synchronise si nécessaire ; renvoie True si un appel a été fait.
+
+        Avec dev_guild_id, les commandes sont copiées sur ce serveur et seul
+        ce scope est synchronisé (prise en compte immédiate, pas de sync globale).
+        """
+        guild = None
+        scope = "global"
+        if dev_guild_id:
+            guild = discord.Object(id=dev_guild_id)
+            tree.copy_global_to(guild=guild)
+            scope = f"guild:{dev_guild_id}"
+
+        hashes = self._load()
+        digest = tree_hash(tree, guild)
+        if hashes.get(scope) == digest:
+            log.info("Commandes inchangées (%s) : sync ignorée", scope)
+            return False
+
+        await tree.sync(guild=guild)
+        hashes[scope] = digest
+        self._save(hashes)
+        log.info("Commandes synchronisées (%s)", scope)
+        return True
@@ -1,7 +1,14 @@
+import os
+
 # IDs
 CHANNEL_EMBEDS_ID = 1463084740990206035
 ADMIN_ROLE_ID = 1280396795046006836
 ORGA_USER_ID = 1218696831211540522
+# Organisateurs du tournoi historique ; les autres tournois ont les leurs
+ORGA_IDS = (
+    ORGA_USER_ID,
+    1352575142668013588,  # nouvel organisateur
+)
 MATCH_CATEGORY_ID = 1326668604548186255
 
 # Emojis unicode
@@ -32,4 +39,40 @@ MAPS = [
 ]
 
 # Canal match : format sans accents/majuscules (déjà ok)
-MATCH_CHANNEL_TEMPLATE = "equipe-{a}-vs-equipe-{b}"
\ No newline at end of file
+MATCH_CHANNEL_TEMPLATE = "equipe-{a}-vs-equipe-{b}"
+
+# Persistance (snapshot + journal)
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+
+# Serveur de développement : sync des commandes sur ce serveur uniquement
+DEV_GUILD_ID = int(os.environ.get("DEV_GUILD_ID", "0")) or None
+
+# Images des maps : salon de stockage où chaque image est envoyée une fois
+# (0 = désactivé, URLs d'origine) et largeur des copies redimensionnées
+MAP_STORAGE_CHANNEL_ID = int(os.environ.get("MAP_STORAGE_CHANNEL_ID", "0")) or None
+MAP_IMAGE_WIDTH = 640
+
+# Archivage des screens de résultat (téléchargements simultanés, taille max)
+SCREEN_CONCURRENCY = 3
+SCREEN_MAX_BYTES = 10 * 1024 * 1024
+
+# /stats : matchs joués minimum pour classer un duo de classes
+STATS_MIN_GAMES = 5
+
+# Elo des joueurs : note de départ et facteur K
+RATING_INITIAL = 1500.0
+RATING_K = 32.0
+
+# Rappels avant match (minutes avant l'horaire prévu)
+REMINDER_OFFSETS = (24 * 60, 60, 30)
+
+# Planification (/planifier) : durée d'un match = pas de la grille (minutes),
+# et nombre de matchs simultanés que l'organisation peut suivre
+SCHEDULE_SLOT_MINUTES = 60
+SCHEDULE_CAPACITY = 4
+
+# Fermeture des rounds terminés : "delete" libère les places de la catégorie
+# (50 salons max), "lock" garde les salons en lecture seule
+ROUND_TEARDOWN = os.environ.get("ROUND_TEARDOWN", "delete")
+# Délai entre le dernier résultat d'un round et sa fermeture (secondes)
+ROUND_TEARDOWN_DELAY = 5 * 60
@@ -0,0 +1,88 @@
+import math
+import random
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from state import Player
+
+# Échanges aléatoires en unités de n·ln(n) : une chaîne de transpositions
+# aléatoires sur n joueurs ne mélange qu'après ~ n·ln(n)/2 échanges
+MIX_FACTOR = 1.0
+
+
+class DrawError(Exception):
+    """Tirage impossible ; le message explique pourquoi."""
+
+
+def check_feasible(players: List[Player]) -> Optional[str]:
+    """Renvoie la raison de l'impossibilité, ou None si un tirage existe."""
+    n = len(players)
+    if n == 0 or n % 2 != 0:
+        return "Nombre de joueurs invalide."
+
+    missing = [p for p in players if p.cls is None]
+    if missing:
+        return "Classes manquantes."
+
+    cls, count = Counter(p.cls for p in players).most_common(1)[0]
+    if count > n // 2:
+        return (
+            f"Impossible de créer des équipes valides : {count} joueurs {cls} "
+            f"pour {n // 2} équipes (au plus une par équipe)."
+        )
+    return None
+
+
+def draw_pairs(players: List[Player], rng: random.Random | None = None) -> List[Tuple[Player, Player]]:
+    """Paires de joueurs de classes différentes, tirées aléatoirement.
+
+    1. construction d'une solution valide en O(n) : joueurs regroupés par
+       classe puis appariés i <-> i + n/2 ; aucune classe ne dépassant n/2,
+       les deux membres d'une paire ne sont jamais dans le même bloc ;
+    2. mélange par échanges aléatoires de partenaires entre deux paires,
+       acceptés s'ils restent valides. La proposition étant symétrique, la
+       chaîne a pour loi stationnaire la loi uniforme sur les tirages
+       valides ; MIX_FACTOR · n·ln(n) échanges (au-delà du temps de mélange)
+       en donnent une approximation proche, sans biais visible vers la
+       construction par blocs.
+    """
+    reason = check_feasible(players)
+    if reason:
+        raise DrawError(reason)
+
+    rng = rng or random.Random()
+    n = len(players)
+    half = n // 2
+
+    # Blocs contigus par classe, ordre des blocs et des joueurs aléatoire
+    groups: dict = {}
+    for p in players:
+        groups.setdefault(p.cls, []).append(p)
+    blocks = list(groups.values())
+    rng.shuffle(blocks)
+    ordered: List[Player] = []
+    for block in blocks:
+        rng.shuffle(block)
+        ordered.extend(block)
+
+    pairs = [[ordered[i], ordered[i + half]] for i in range(half)]
+
+    if half >= 2:
+        for _ in range(math.ceil(MIX_FACTOR * n * math.log(n))):
+            i = rng.randrange(half)
+            j = rng.randrange(half - 1)
+            if j >= i:
+                j += 1
+            k = rng.randrange(2)
+            l = rng.randrange(2)
+            # Échange pairs[i][k] <-> pairs[j][l] si les deux paires restent valides
+            keep_i = pairs[i][1 - k]
+            keep_j = pairs[j][1 - l]
+            if keep_i.cls != pairs[j][l].cls and keep_j.cls != pairs[i][k].cls:
+                pairs[i][k], pairs[j][l] = pairs[j][l], pairs[i][k]
+
+    rng.shuffle(pairs)
+    for pair in pairs:
+        if rng.random() < 0.5:
+            pair.reverse()
+    return [(a, b) for a, b in pairs]
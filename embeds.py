@@ -1,40 +1,82 @@
+from typing import Dict
+
 import discord
 import config
+from mapcache import MAP_CACHE
 from state import Player, Team, Match
 
 GOLD = discord.Color.gold()
 
-def embed_players(players: list[Player]) -> discord.Embed:
-    e = discord.Embed(
-        title="👥 Tournoi 2v2 — Joueurs inscrits",
-        description="Chaque joueur doit avoir une classe avant le tirage des équipes.",
-        color=discord.Color.blue()
-    )
-    if not players:
-        e.add_field(name="Aucun joueur", value="—", inline=False)
+def match_mentions(team1: Team, team2: Team) -> str:
+    ids = [
+        team1.players[0].user_id,
+        team1.players[1].user_id,
+        team2.players[0].user_id,
+        team2.players[1].user_id,
+    ]
+    return " ".join(f"<@{i}>" for i in ids)
+
+# Pagination : PAGE_SIZE lignes par embed, une page = un message.
+# Une page regroupe des ids fixes (bucket) : un changement n'affecte
+# que la page qui contient l'équipe / le match concerné.
+PAGE_SIZE = 10
+FIELD_LIMIT = 1024
+
+Pages = Dict[int, discord.Embed]
+
+_MATCH_STATUS = {
+    "WAITING_AVAIL": "🟡 dispo",
+    "NEED_ORGA_VALIDATE": "🟢 dispo OK — orga",
+    "VALIDATED": "✅ validé",
+    "DONE": "🏁 terminé"
+}
+
+def _bucket(index: int) -> int:
+    return index // PAGE_SIZE
+
+def _field_value(lines: list[str]) -> str:
+    value = "\n".join(lines)
+    if len(value) > FIELD_LIMIT:
+        value = value[:FIELD_LIMIT - 1] + "…"
+    return value
+
+def _range_name(label: str, bucket: int) -> str:
+    return f"{label} ({bucket * PAGE_SIZE + 1}–{(bucket + 1) * PAGE_SIZE})"
+
+def pages_players(players: list[Player]) -> Pages:
+    def page(name: str, value: str) -> discord.Embed:
+        e = discord.Embed(
+            title="👥 Tournoi 2v2 — Joueurs inscrits",
+            description="Chaque joueur doit avoir une classe avant le tirage des équipes.",
+            color=discord.Color.blue()
+        )
+        e.add_field(name=name, value=value, inline=False)
         return e
 
-    lines = []
-    for p in players:
-        cls = p.cls if p.cls else "classe non définie"
-        lines.append(f"<@{p.user_id}> — {cls}")
-    e.add_field(name="Joueurs", value="\n".join(lines), inline=False)
-    return e
-
-def embed_teams(teams: list[Team]) -> discord.Embed:
-    e = discord.Embed(
-        title="🏆 Tournoi 2v2 — Classement",
-        description="Les équipes éliminées sont affichées en bas. ❌ = éliminée",
-        color=GOLD
-    )
+    if not players:
+        return {0: page("Aucun joueur", "—")}
 
-    if not teams:
-        e.add_field(name="Équipes", value="—", inline=False)
+    buckets: Dict[int, list[str]] = {}
+    for i, p in enumerate(players):
+        cls = p.cls if p.cls else "classe non définie"
+        buckets.setdefault(_bucket(i), []).append(f"<@{p.user_id}> — {cls}")
+    return {b: page(_range_name("Joueurs", b), _field_value(lines)) for b, lines in buckets.items()}
+
+def pages_teams(teams: list[Team]) -> Pages:
+    def page(name: str, value: str) -> discord.Embed:
+        e = discord.Embed(
+            title="🏆 Tournoi 2v2 — Classement",
+            description="Les équipes éliminées sont affichées en bas de chaque page. ❌ = éliminée",
+            color=GOLD
+        )
+        e.add_field(name=name, value=value, inline=False)
         return e
 
-    alive_lines = []
-    elim_lines = []
+    if not teams:
+        return {0: page("Équipes", "—")}
 
+    alive: Dict[int, list[str]] = {}
+    elim: Dict[int, list[str]] = {}
     for t in sorted(teams, key=lambda x: x.id):
         p1, p2 = t.players
         line = (
@@ -42,65 +84,59 @@ def embed_teams(teams: list[Team]) -> discord.Embed:
             f"<@{p1.user_id}> ({p1.cls}) — "
             f"<@{p2.user_id}> ({p2.cls})"
         )
+        b = _bucket(t.id - 1)
         if t.eliminated:
-            elim_lines.append(f"{config.EMOJI_CROSS} {line}")
+            elim.setdefault(b, []).append(f"{config.EMOJI_CROSS} {line}")
         else:
-            alive_lines.append(line)
-
-    e.add_field(name="Équipes", value="\n".join(alive_lines + elim_lines), inline=False)
-    return e
-
-def embed_upcoming(matches: list[Match]) -> discord.Embed:
-    e = discord.Embed(
-        title="📅 Tournoi 2v2 — Matchs à venir",
-        color=GOLD
-    )
-    if not matches:
-        e.add_field(name="Matchs", value="—", inline=False)
+            alive.setdefault(b, []).append(line)
+
+    return {
+        b: page(_range_name("Équipes", b), _field_value(alive.get(b, []) + elim.get(b, [])))
+        for b in sorted(set(alive) | set(elim))
+    }
+
+def pages_upcoming(matches: list[Match]) -> Pages:
+    def page(name: str, value: str) -> discord.Embed:
+        e = discord.Embed(
+            title="📅 Tournoi 2v2 — Matchs à venir",
+            color=GOLD
+        )
+        e.add_field(name=name, value=value, inline=False)
         return e
 
     # Only not done
-    pending = [m for m in matches if m.status != "DONE"]
-    if not pending:
-        e.add_field(name="Matchs", value="—", inline=False)
-        return e
-
-    lines = []
-    for m in pending:
-        status = {
-            "WAITING_AVAIL": "🟡 dispo",
-            "NEED_ORGA_VALIDATE": "🟢 dispo OK — orga",
-            "VALIDATED": "✅ validé",
-            "DONE": "🏁 terminé"
-        }.get(m.status, m.status)
-
+    buckets: Dict[int, list[str]] = {}
+    for m in sorted((m for m in matches if m.status != "DONE"), key=lambda m: m.id):
+        status = _MATCH_STATUS.get(m.status, m.status)
         map_part = f" — 🗺️ {m.map_name}" if m.map_name else ""
-        lines.append(
-            f"(R{m.round_no}) EQUIPE {m.team1_id} vs EQUIPE {m.team2_id} — {m.date_str} {m.time_str}{map_part} — {status}"
+        when = f"{m.date_str} {m.time_str}" if m.date_str else "à planifier"
+        buckets.setdefault(_bucket(m.id - 1), []).append(
+            f"(R{m.round_no}) EQUIPE {m.team1_id} vs EQUIPE {m.team2_id} — {when}{map_part} — {status}"
         )
 
-    e.add_field(name="Matchs", value="\n".join(lines), inline=False)
-    return e
+    if not buckets:
+        return {0: page("Matchs", "—")}
+    return {b: page(_range_name("Matchs", b), _field_value(lines)) for b, lines in buckets.items()}
 
-def embed_history(matches: list[Match]) -> discord.Embed:
-    e = discord.Embed(
-        title="📜 Tournoi 2v2 — Historique",
-        color=GOLD
-    )
-    done = [m for m in matches if m.status == "DONE" and m.winner_team_id]
-    if not done:
-        e.add_field(name="Résultats", value="—", inline=False)
+def pages_history(matches: list[Match]) -> Pages:
+    def page(name: str, value: str) -> discord.Embed:
+        e = discord.Embed(
+            title="📜 Tournoi 2v2 — Historique",
+            color=GOLD
+        )
+        e.add_field(name=name, value=value, inline=False)
         return e
 
-    lines = []
-    for m in done:
+    buckets: Dict[int, list[str]] = {}
+    for m in sorted((m for m in matches if m.status == "DONE" and m.winner_team_id), key=lambda m: m.id):
         loser = m.team2_id if m.winner_team_id == m.team1_id else m.team1_id
-        lines.append(
+        buckets.setdefault(_bucket(m.id - 1), []).append(
             f"(R{m.round_no}) {config.EMOJI_TROPHY} EQUIPE {m.winner_team_id} a gagné vs EQUIPE {loser}"
         )
 
-    e.add_field(name="Résultats", value="\n".join(lines), inline=False)
-    return e
+    if not buckets:
+        return {0: page("Résultats", "—")}
+    return {b: page(_range_name("Résultats", b), _field_value(lines)) for b, lines in buckets.items()}
 
 def embed_match(match: Match, team1: Team, team2: Team) -> discord.Embed:
     e = discord.Embed(
@@ -121,12 +157,16 @@ def embed_match(match: Match, team1: Team, team2: Team) -> discord.Embed:
         f"• <@{p2b.user_id}> — {p2b.cls}"
     )
     e.add_field(name="👥 Équipes", value=teams_block, inline=False)
-    e.add_field(name="📅 Date & Heure", value=f"{match.date_str} à {match.time_str}", inline=False)
+    # Tours suivants du tableau : horaire fixé plus tard par /planifier ou /modifier
+    when = f"{match.date_str} à {match.time_str}" if match.date_str else "À planifier"
+    e.add_field(name="📅 Date & Heure", value=when, inline=False)
 
     if match.map_name:
         e.add_field(name="🗺️ Map", value=match.map_name, inline=False)
-        if match.map_image:
-            e.set_image(url=match.map_image)
+        # Copie hébergée sur Discord si disponible, sinon l'URL d'origine
+        image = MAP_CACHE.url(match.map_name) or match.map_image
+        if image:
+            e.set_image(url=image)
     else:
         e.add_field(name="🗺️ Map", value="En attente de tirage", inline=False)
 
@@ -139,4 +179,57 @@ def embed_match(match: Match, team1: Team, team2: Team) -> discord.Embed:
 
     e.add_field(name="📌 Statut", value=status_txt, inline=False)
     e.set_footer(text="Merci d’indiquer votre disponibilité")
-    return e
\ No newline at end of file
+    return e
+
+
+def _stat_line(entry: tuple) -> str:
+    name, wins, games = entry
+    return f"{name} — {wins}/{games} ({100 * wins / games:.0f} %)"
+
+
+def embed_stats(summary: dict, min_games: int) -> discord.Embed:
+    e = discord.Embed(
+        title="📊 Statistiques — duos de classes",
+        description=(
+            f"{summary['tournaments']} tournoi(s), {summary['matches']} match(s) "
+            f"dont {summary['forfeits']} forfait(s), exclus des taux de victoire."
+        ),
+        color=discord.Color.purple()
+    )
+    if not summary["pairs"]:
+        e.add_field(name="Meilleurs duos", value=f"Pas assez de données (min. {min_games} matchs par duo).", inline=False)
+        return e
+
+    e.add_field(name="🏅 Meilleurs duos", value=_field_value([_stat_line(p) for p in summary["pairs"]]), inline=False)
+    if summary["by_map"]:
+        lines = [f"**{name}** : {_stat_line(best)}" for name, best in summary["by_map"].items()]
+        e.add_field(name="🗺️ Par map", value=_field_value(lines), inline=False)
+    if summary["by_round"]:
+        lines = [f"**Round {r}** : {_stat_line(best)}" for r, best in summary["by_round"].items()]
+        e.add_field(name="🔁 Par round", value=_field_value(lines), inline=False)
+    e.set_footer(text=f"Duos avec au moins {min_games} matchs joués")
+    return e
+
+def embed_ratings(lines: list[str], total: int) -> discord.Embed:
+    e = discord.Embed(
+        title="📈 Classement Elo des joueurs",
+        description=_field_value(lines)[:4096],
+        color=GOLD
+    )
+    e.set_footer(text=f"{total} joueur(s) classé(s)")
+    return e
+
+def embed_swiss_standings(rows: list[tuple], played: int, rounds: int, limit: int = 25) -> discord.Embed:
+    e = discord.Embed(
+        title="🇨🇭 Classement — système suisse",
+        description=f"Round {played}/{rounds} — points, puis Buchholz (points des adversaires)",
+        color=discord.Color.red()
+    )
+    lines = [
+        f"{i}. **EQUIPE {team_id}** — {points:g} pt(s), Buchholz {buchholz:g}"
+        for i, (team_id, points, buchholz) in enumerate(rows[:limit], 1)
+    ]
+    e.add_field(name="Équipes", value=_field_value(lines) if lines else "—", inline=False)
+    if len(rows) > limit:
+        e.set_footer(text=f"{len(rows) - limit} autre(s) équipe(s)")
+    return e
@@ -1,25 +1,52 @@
+import logging
 import os
-import threading
+import time
 
 import discord
 from discord.ext import commands
-from flask import Flask
 
+import config
+import metrics
 import tournoi
+from commandsync import CommandSync
+from mapcache import MAP_CACHE
+from ratings import RATINGS
+from resolver import RESOLVER
+from tournaments import REGISTRY
+from webserver import WebServer
+
+log = logging.getLogger(__name__)
 
 # -------------------------
-# Flask (keep-alive Render)
+# HTTP (keep-alive Render, santé, métriques)
 # -------------------------
-app = Flask(__name__)
+web = WebServer("0.0.0.0", int(os.environ.get("PORT", 10000)))
+
+
+@web.route("/")
+async def home():
+    return 200, "text/plain", "Bot tournoi actif"
+
+
+@web.route("/health")
+async def health():
+    # Vivant : la boucle répond
+    return 200, "text/plain", "ok"
+
 
-@app.route("/")
-def home():
-    return "Bot tournoi actif", 200
+@web.route("/ready")
+async def ready():
+    # Prêt : état restauré et gateway connectée
+    if not REGISTRY.loaded:
+        return 503, "text/plain", "état non chargé"
+    if not bot.is_ready() or bot.is_closed():
+        return 503, "text/plain", "gateway non connectée"
+    return 200, "text/plain", "ok"
 
 
-def run_flask():
-    port = int(os.environ.get("PORT", 10000))
-    app.run(host="0.0.0.0", port=port)
+@web.route("/metrics")
+async def metrics_route():
+    return 200, "text/plain; version=0.0.4", metrics.METRICS.render()
 
 
 # -------------------------
@@ -31,11 +58,47 @@ intents.message_content = True  # requis pour détecter les screens (attachments
 
 class TournamentBot(commands.Bot):
     async def setup_hook(self):
-        # Sync des slash commands
-        await self.tree.sync()
+        t0 = time.perf_counter()
+
+        # HTTP sur la boucle du bot : /health répond pendant le démarrage
+        await web.start()
+
+        # Requêtes REST (toutes sources), compteurs de 429 et vues actives
+        metrics.install_http_hook()
+        metrics.install_rate_limit_hook()
+        metrics.METRICS.add_collector(self._collect_metrics)
+
+        # Accès salons/messages via le cache gateway
+        RESOLVER.attach(self)
+
+        # Images des maps : vérification du cache, envoi des seules maps manquantes
+        MAP_CACHE.start(self)
+
+        # Restauration de chaque tournoi (snapshot + journal, embeds, rappels)
+        REGISTRY.load(self)
 
-        # Lancement de la boucle de rappel 30 minutes
-        self.loop.create_task(tournoi._reminder_loop(self))
+        # Boutons des matchs en cours (sans refetch des messages)
+        tournoi.register_persistent_views(self)
+
+        # Sync des slash commands, seulement si l'arbre a changé
+        await CommandSync(os.path.join(config.DATA_DIR, "commands.json")).sync(
+            self.tree, config.DEV_GUILD_ID
+        )
+
+        log.info("Démarrage terminé en %.1f ms", (time.perf_counter() - t0) * 1000)
+
+    def _collect_metrics(self):
+        yield ("bot_persistent_views", "gauge", "Vues persistantes enregistrées",
+               [({}, len(self.persistent_views))])
+        yield ("bot_gateway_latency_seconds", "gauge", "Latence du heartbeat gateway",
+               [({}, self.latency if self.latency == self.latency else 0.0)])
+
+    async def close(self):
+        await web.close()
+        await MAP_CACHE.close()
+        await REGISTRY.close()
+        await RATINGS.close()
+        await super().close()
 
 
 bot = TournamentBot(command_prefix="!", intents=intents)
@@ -46,45 +109,39 @@ async def on_ready():
     print(f"Bot prêt : {bot.user}")
 
 
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    RESOLVER.invalidate(channel.id)
+
+
 @bot.event
 async def on_message(message: discord.Message):
-    await bot.process_commands(message)
+    # Filtre O(1) : seuls les salons de match validés sont concernés
+    # (le bot n'a aucune commande préfixée, process_commands est inutile)
+    t = REGISTRY.by_channel(message.channel.id)
+    if not t or not t.store.is_validated_channel(message.channel.id):
+        return
 
     if message.author.bot:
         return
 
-    from state import STATE
-    import tournoi as tour_mod
-    import config as cfg
-
-    # Détection d'un screen de résultat dans un salon de match validé
-    m = next(
-        (x for x in STATE.matches if x.channel_id == message.channel.id and x.status == "VALIDATED"),
-        None
-    )
-    if not m:
+    # Détection d'un screen de résultat
+    images = [
+        att for att in message.attachments
+        if att.content_type and att.content_type.startswith("image/")
+    ]
+    if not images:
         return
 
-    has_image = any(
-        att.content_type and att.content_type.startswith("image/")
-        for att in message.attachments
-    )
-    if not has_image:
+    m = t.store.match_by_channel(message.channel.id)
+    if not m or not t.store.team(m.team1_id) or not t.store.team(m.team2_id):
         return
 
-    t1 = tour_mod._find_team(m.team1_id)
-    t2 = tour_mod._find_team(m.team2_id)
-    if not t1 or not t2:
-        return
+    # Copie locale des preuves (en tâche de fond), avant la suppression du salon
+    t.screens.submit(m, images)
 
-    # Message de sélection du gagnant (orga/admin uniquement)
-    view = tour_mod.ResultView(m.id)
-    await message.channel.send(
-        f"{cfg.EMOJI_TROPHY} **Résultat détecté**\n"
-        f"Match **EQUIPE {m.team1_id}** vs **EQUIPE {m.team2_id}**\n\n"
-        "👉 Organisateur : sélectionne l’équipe gagnante ci-dessous.",
-        view=view
-    )
+    # Un seul prompt par match : un nouveau screen met à jour l'existant
+    await tournoi.prompt_result(t, message, m)
 
 
 # -------------------------
@@ -97,10 +154,6 @@ tournoi.setup(bot.tree, bot)
 # Lancement
 # -------------------------
 def main():
-    # Flask en thread séparé
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
-
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         raise RuntimeError("DISCORD_TOKEN manquant")
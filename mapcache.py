@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+import discord
+
+import config
+import metrics
+import outbound
+from outbound import OUTBOUND
+from resolver import RESOLVER
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow absent : les images sont envoyées sans redimensionnement
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# Une URL signée est rafraîchie avant son expiration
+REFRESH_MARGIN = 60 * 60
+# Téléchargement initial des maps depuis leur hébergeur d'origine
+DOWNLOAD_TIMEOUT = 30
+
+
+def url_expiry(url: str) -> int | None:
+    """Expiration (timestamp) d'une URL signée du CDN Discord (paramètre ex=, en hexa)."""
+    ex = parse_qs(urlparse(url).query).get("ex")
+    try:
+        return int(ex[0], 16) if ex else None
+    except ValueError:
+        return None
+
+
+def _resize(data: bytes) -> bytes:
+    if Image is None:
+        return data
+    with Image.open(io.BytesIO(data)) as img:
+        fmt = img.format or "PNG"
+        if img.width <= config.MAP_IMAGE_WIDTH:
+            return data
+        img.thumbnail((config.MAP_IMAGE_WIDTH, config.MAP_IMAGE_WIDTH * 4))
+        out = io.BytesIO()
+        img.save(out, format=fmt, optimize=True)
+        return out.getvalue()
+
+
+class MapCache:
+    """Images des maps hébergées une seule fois sur Discord.
+
+    Chaque map est téléchargée et redimensionnée une fois dans
+    DATA_DIR/maps, puis envoyée en pièce jointe dans le salon de stockage.
+    L'URL de la pièce jointe (signée, à durée limitée) est conservée dans
+    cache.json : au démarrage, seules les maps absentes ou dont le fichier
+    local a changé sont renvoyées ; une URL expirée est rafraîchie en relisant
+    le message de stockage, sans nouvel envoi.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, "cache.json")
+        self.bot: discord.Client | None = None
+
+        # nom de map -> {"sha256", "filename", "message_id", "url"}
+        self._entries: Dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+        self.stats = {"downloads": 0, "uploads": 0, "refreshes": 0, "errors": 0}
+
+    # -------------------------
+    # Lecture (embeds)
+    # -------------------------
+    def url(self, name: str | None) -> str | None:
+        """URL de la copie hébergée ; None si absente ou expirée (repli sur l'URL d'origine)."""
+        entry = self._entries.get(name) if name else None
+        if entry is None:
+            return None
+        expiry = url_expiry(entry["url"])
+        if expiry is not None and expiry - REFRESH_MARGIN <= time.time():
+            self._wakeup.set()
+            if expiry <= time.time():
+                return None
+        return entry["url"]
+
+    # -------------------------
+    # Démarrage
+    # -------------------------
+    def start(self, bot: discord.Client):
+        if not config.MAP_STORAGE_CHANNEL_ID:
+            return
+        self.bot = bot
+        self._entries = self._load()
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+    # -------------------------
+    # Boucle
+    # -------------------------
+    async def _loop(self):
+        try:
+            await self._prepare()
+        except Exception:
+            self.stats["errors"] += 1
+            metrics.ERRORS.inc(source="mapcache")
+            log.exception("Préparation du cache des maps en échec")
+
+        while True:
+            self._wakeup.clear()
+            expiries = [url_expiry(e["url"]) for e in self._entries.values()]
+            expiries = [ex for ex in expiries if ex is not None]
+            timeout = max(0.0, min(expiries) - REFRESH_MARGIN - time.time()) if expiries else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._refresh_expired()
+            except Exception:
+                self.stats["errors"] += 1
+                metrics.ERRORS.inc(source="mapcache")
+                log.exception("Rafraîchissement des URLs de maps en échec")
+                await asyncio.sleep(REFRESH_MARGIN / 4)
+
+    async def _prepare(self):
+        """Vérifie le cache : fichiers locaux présents, envoi des seules maps manquantes."""
+        changed = False
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)) as session:
+            for m in config.MAPS:
+                data = await self._local_copy(session, m)
+                if data is None:
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                entry = self._entries.get(m["name"])
+                if entry is not None and entry["sha256"] == digest:
+                    continue
+                await self._upload(m["name"], self._filename(m), data, digest)
+                changed = True
+        if changed:
+            await asyncio.to_thread(self._save)
+        await self._refresh_expired()
+        log.info("Cache des maps prêt : %d/%d hébergées", len(self._entries), len(config.MAPS))
+
+    @staticmethod
+    def _filename(m: dict) -> str:
+        ext = os.path.splitext(urlparse(m["image"]).path)[1] or ".png"
+        return m["name"] + ext
+
+    async def _local_copy(self, session: aiohttp.ClientSession, m: dict) -> bytes | None:
+        path = os.path.join(self.directory, self._filename(m))
+        try:
+            return await asyncio.to_thread(_read, path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            async with session.get(m["image"]) as resp:
+                resp.raise_for_status()
+                raw = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["errors"] += 1
+            metrics.ERRORS.inc(source="mapcache")
+            log.warning("Téléchargement de la map %s impossible : %s", m["name"], e)
+            return None
+
+        data = await asyncio.to_thread(_resize, raw)
+        await asyncio.to_thread(_write, path, data)
+        self.stats["downloads"] += 1
+        return data
+
+    async def _upload(self, name: str, filename: str, data: bytes, digest: str):
+        msg = await RESOLVER.send(
+            config.MAP_STORAGE_CHANNEL_ID,
+            priority=outbound.BACKGROUND,
+            content=f"map:{name}",
+            file=discord.File(io.BytesIO(data), filename=filename),
+        )
+        self._entries[name] = {
+            "sha256": digest, "filename": filename, "message_id": msg.id, "url": msg.attachments[0].url,
+        }
+        self.stats["uploads"] += 1
+
+    async def _refresh_expired(self):
+        now = time.time()
+        changed = False
+        for name, entry in list(self._entries.items()):
+            expiry = url_expiry(entry["url"])
+            if expiry is None or expiry - REFRESH_MARGIN > now:
+                continue
+            # Relire le message de stockage renvoie une URL fraîchement signée
+            msg = RESOLVER.message(config.MAP_STORAGE_CHANNEL_ID, entry["message_id"])
+            try:
+                fresh = await OUTBOUND.submit(
+                    outbound.BACKGROUND, ("fetch", config.MAP_STORAGE_CHANNEL_ID), msg.fetch
+                )
+                entry["url"] = fresh.attachments[0].url
+                self.stats["refreshes"] += 1
+            except (discord.NotFound, IndexError):
+                # Message de stockage supprimé : seul cas où la map est renvoyée
+                data = await asyncio.to_thread(_read, os.path.join(self.directory, entry["filename"]))
+                await self._upload(name, entry["filename"], data, entry["sha256"])
+            changed = True
+        if changed:
+            await asyncio.to_thread(self._save)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+MAP_CACHE = MapCache(os.path.join(config.DATA_DIR, "maps"))
+metrics.add_stats_collector("mapcache", "Images de maps hébergées", lambda: [({}, MAP_CACHE.stats)])
@@ -0,0 +1,259 @@
+import functools
+import logging
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Instrumentation au format texte Prometheus (sans dépendance externe).
+# Les métriques sont des singletons de module ; les valeurs calculées à la
+# demande (tailles d'état, profondeur de file…) passent par des collecteurs.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# Collecteur : (nom, type, aide, [(labels, valeur)])
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def _key(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[str, str] | None = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: "_Metric"):
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            metric.render(lines)
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                logging.getLogger(__name__).exception("Collecteur de métriques en échec")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_fmt_labels(_key(labels))} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+
+def add_stats_collector(
+    prefix: str, help_text: str, source: Callable[[], Iterable[Tuple[Dict[str, str], Dict[str, float]]]]
+):
+    """Expose les dicts `stats` des composants : un compteur
+    `{prefix}_{clé}_total` par clé, un échantillon par (labels, stats)."""
+    def collect():
+        families: Dict[str, List[Sample]] = {}
+        for labels, stats in source():
+            for key, value in stats.items():
+                families.setdefault(key, []).append((labels, value))
+        for key, samples in families.items():
+            yield (f"{prefix}_{key}_total", "counter", f"{help_text} : {key}", samples)
+
+    METRICS.add_collector(collect)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        METRICS.register(self)
+
+    def _header(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0)
+
+    def render(self, lines: List[str]):
+        self._header(lines)
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_fmt_labels(key)} {_fmt_value(value)}")
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # labels -> [compte par bucket (non cumulé), somme, total]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self, lines: List[str]):
+        self._header(lines)
+        for key, (counts, total, n) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {n}")
+
+
+# =================================================
+# Métriques du bot
+# =================================================
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Durée des slash commands et des boutons (kind=command|button)",
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Exceptions non gérées dans les slash commands et les boutons",
+)
+ERRORS = Counter(
+    "bot_errors_total",
+    "Erreurs interceptées (et journalisées) par composant",
+)
+REST_CALLS = Counter(
+    "discord_rest_requests_total",
+    "Requêtes REST passées par la file sortante (outbound) uniquement, par route et résultat",
+)
+HTTP_REQUESTS = Counter(
+    "discord_http_requests_total",
+    "Toutes les requêtes REST vers Discord (client HTTP, webhooks, réponses d'interaction), "
+    "par méthode, route et statut",
+)
+RATE_LIMITS = Counter(
+    "discord_rate_limit_hits_total",
+    "Réponses 429 reçues de Discord (signalées par discord.http)",
+)
+REMINDER_LAG = Histogram(
+    "bot_reminder_lag_seconds",
+    "Retard entre l'échéance d'un rappel et son traitement",
+    LAG_BUCKETS,
+)
+
+
+def timed(kind: str, name: str):
+    """Mesure la durée et les exceptions d'un handler (commande ou bouton).
+
+    functools.wraps conserve la signature : discord.py continue d'en
+    extraire les paramètres des slash commands.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                HANDLER_ERRORS.inc(kind=kind, name=name)
+                raise
+            finally:
+                HANDLER_LATENCY.observe(time.perf_counter() - t0, kind=kind, name=name)
+        return wrapper
+    return decorator
+
+
+class _RateLimitHandler(logging.Handler):
+    # discord.py gère les 429 lui-même et ne les signale que dans ses logs
+    def emit(self, record: logging.LogRecord):
+        msg = record.getMessage()
+        if "responded with 429" in msg:
+            RATE_LIMITS.inc(scope="route")
+        elif msg.startswith("Global rate limit"):
+            RATE_LIMITS.inc(scope="global")
+
+
+def _count_requests(request):
+    @functools.wraps(request)
+    async def wrapper(self, route, *args, **kwargs):
+        status = "error"
+        try:
+            result = await request(self, route, *args, **kwargs)
+            status = "ok"
+            return result
+        except Exception as e:
+            status = str(getattr(e, "status", "error"))
+            raise
+        finally:
+            HTTP_REQUESTS.inc(method=route.method, route=route.path, status=status)
+    wrapper._counted = True
+    return wrapper
+
+
+def install_http_hook():
+    """Compte chaque requête au niveau des clients HTTP de discord.py.
+
+    Couvre aussi ce qui ne passe pas par la file sortante : envois et
+    éditions directs, réponses d'interaction et followups (webhooks). Une
+    requête réessayée par discord.py après un 429 compte une fois.
+    """
+    from discord.http import HTTPClient
+    from discord.webhook.async_ import AsyncWebhookAdapter
+
+    for cls in (HTTPClient, AsyncWebhookAdapter):
+        if not getattr(cls.request, "_counted", False):
+            cls.request = _count_requests(cls.request)
+
+
+def install_rate_limit_hook():
+    handler = _RateLimitHandler(level=logging.WARNING)
+    logger = logging.getLogger("discord.http")
+    logger.addHandler(handler)
+    if logger.getEffectiveLevel() > logging.WARNING:
+        logger.setLevel(logging.WARNING)
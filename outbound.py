@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Tuple
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+# Classes de priorité (plus petit = servi en premier)
+INTERACTION = 0  # followups d'interaction : jeton valable 15 min, l'utilisateur attend
+MATCH = 1        # messages dans les salons de match (validation, rappels, prompts)
+EMBED = 2        # embeds globaux du canal principal
+BACKGROUND = 3   # réactions, nettoyage des boutons
+
+PRIORITY_NAMES = {INTERACTION: "interaction", MATCH: "match", EMBED: "embed", BACKGROUND: "background"}
+
+# Budgets par route (requêtes, fenêtre en secondes), estimés d'après les
+# limites publiées par Discord ; un bucket = (route, id du salon / jeton)
+ROUTE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "followup": (5, 2.0),
+    "send": (5, 5.0),
+    "edit": (5, 5.0),
+    "delete": (5, 1.0),
+    "react": (1, 0.25),
+    "create_channel": (2, 1.0),
+    "delete_channel": (2, 1.0),
+}
+DEFAULT_LIMIT = (5, 5.0)
+
+# Limite globale du bot (toutes routes confondues)
+GLOBAL_LIMIT = (50, 1.0)
+
+# Requêtes REST simultanées au maximum
+MAX_IN_FLIGHT = 8
+
+Bucket = Tuple[str, Hashable]
+
+
+class Budget:
+    """Seau à jetons : `limit` requêtes par fenêtre de `per` secondes."""
+
+    __slots__ = ("limit", "per", "tokens", "updated")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.per)
+        self.updated = now
+
+    def available(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def consume(self):
+        self.tokens -= 1.0
+
+    def delay(self, now: float) -> float:
+        """Secondes avant le prochain jeton disponible."""
+        self._refill(now)
+        return max(0.0, (1.0 - self.tokens) * self.per / self.limit)
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.limit
+
+
+@dataclass
+class _Item:
+    priority: int
+    bucket: Bucket
+    call: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class OutboundQueue:
+    """File des requêtes sortantes vers Discord, par priorité puis par bucket.
+
+    Un élément n'est lancé que si son bucket et le budget global ont un
+    jeton : un salon saturé ne bloque pas les autres. Au sein d'une même
+    priorité, les buckets sont servis à tour de rôle. La boucle de
+    répartition n'est lancée qu'au premier envoi.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT):
+        # priorité -> bucket -> éléments en attente (ordre d'arrivée)
+        self._queues: Dict[int, "OrderedDict[Bucket, Deque[_Item]]"] = {
+            p: OrderedDict() for p in PRIORITY_NAMES
+        }
+        self._budgets: Dict[Bucket, Budget] = {}
+        self._global = Budget(*GLOBAL_LIMIT)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {"queued": 0, "done": 0, "errors": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+        self.throttled = 0
+
+    # -------------------------
+    # API
+    # -------------------------
+    async def submit(self, priority: int, bucket: Bucket, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Met `call` en file et attend son résultat (ou son exception)."""
+        item = _Item(priority, bucket, call, asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(bucket, deque()).append(item)
+        self.stats[PRIORITY_NAMES[priority]]["queued"] += 1
+        self._wakeup.set()
+        self._ensure_task()
+        return await item.future
+
+    def depth(self) -> Dict[str, int]:
+        return {
+            PRIORITY_NAMES[p]: sum(len(dq) for dq in buckets.values())
+            for p, buckets in self._queues.items()
+        }
+
+    def oldest_wait(self) -> Dict[str, float]:
+        """Ancienneté (s) du plus vieil élément en attente, par priorité."""
+        now = time.monotonic()
+        return {
+            PRIORITY_NAMES[p]: max((now - dq[0].queued_at for dq in buckets.values()), default=0.0)
+            for p, buckets in self._queues.items()
+        }
+
+    # -------------------------
+    # Répartition
+    # -------------------------
+    def _budget(self, bucket: Bucket) -> Budget:
+        b = self._budgets.get(bucket)
+        if b is None:
+            b = self._budgets[bucket] = Budget(*ROUTE_LIMITS.get(bucket[0], DEFAULT_LIMIT))
+        return b
+
+    def _pick(self) -> Tuple[_Item | None, float | None]:
+        """Prochain élément lançable, sinon le délai avant d'en avoir un."""
+        now = time.monotonic()
+        if not self._global.available(now):
+            self.throttled += 1
+            return None, self._global.delay(now)
+
+        delay = None
+        for buckets in self._queues.values():
+            for bucket, dq in buckets.items():
+                while dq and dq[0].future.done():  # appelant annulé
+                    dq.popleft()
+                if not dq:
+                    continue
+                budget = self._budget(bucket)
+                if not budget.available(now):
+                    wait = budget.delay(now)
+                    delay = wait if delay is None else min(delay, wait)
+                    continue
+
+                item = dq.popleft()
+                if dq:
+                    buckets.move_to_end(bucket)  # tour de rôle entre buckets
+                else:
+                    del buckets[bucket]
+                budget.consume()
+                self._global.consume()
+                return item, None
+
+            # Nettoyage des buckets vidés par des annulations
+            for bucket in [b for b, dq in buckets.items() if not dq]:
+                del buckets[bucket]
+
+        if delay is not None:
+            self.throttled += 1
+        return None, delay
+
+    def _ensure_task(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            await self._slots.acquire()
+            self._wakeup.clear()
+            item, delay = self._pick()
+            if item is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._prune_budgets()
+                continue
+            asyncio.get_running_loop().create_task(self._execute(item))
+
+    async def _execute(self, item: _Item):
+        stats = self.stats[PRIORITY_NAMES[item.priority]]
+        waited = time.monotonic() - item.queued_at
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        try:
+            result = await item.call()
+        except Exception as e:
+            stats["errors"] += 1
+            metrics.REST_CALLS.inc(route=item.bucket[0], status=getattr(e, "status", "error"))
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            stats["done"] += 1
+            metrics.REST_CALLS.inc(route=item.bucket[0], status="ok")
+            if not item.future.done():
+                item.future.set_result(result)
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def _prune_budgets(self):
+        # Les buckets revenus à plein et sans attente n'ont plus d'état utile
+        if len(self._budgets) < 1024:
+            return
+        now = time.monotonic()
+        queued = {b for buckets in self._queues.values() for b in buckets}
+        self._budgets = {
+            b: budget for b, budget in self._budgets.items()
+            if b in queued or not budget.full(now)
+        }
+
+
+OUTBOUND = OutboundQueue()
+
+
+def _collect():
+    depth = OUTBOUND.depth()
+    oldest = OUTBOUND.oldest_wait()
+    yield ("outbound_queue_depth", "gauge", "Requêtes en attente dans la file sortante",
+           [({"priority": p}, v) for p, v in depth.items()])
+    yield ("outbound_queue_oldest_wait_seconds", "gauge", "Ancienneté de la plus vieille requête en attente",
+           [({"priority": p}, v) for p, v in oldest.items()])
+    yield ("outbound_queue_wait_seconds_total", "counter", "Temps d'attente cumulé avant envoi",
+           [({"priority": p}, s["wait_total"]) for p, s in OUTBOUND.stats.items()])
+    yield ("outbound_throttled_total", "counter", "Répartitions différées faute de budget de rate limit",
+           [({}, OUTBOUND.throttled)])
+
+
+metrics.METRICS.add_collector(_collect)
+
+
+# -------------------------
+# Raccourcis
+# -------------------------
+async def followup(interaction, content: str | None = None, **kwargs):
+    """interaction.followup.send en priorité maximale."""
+    return await OUTBOUND.submit(
+        INTERACTION, ("followup", interaction.token),
+        lambda: interaction.followup.send(content, **kwargs),
+    )
+
+
+async def followup_edit(interaction, message, **kwargs):
+    return await OUTBOUND.submit(
+        INTERACTION, ("followup", interaction.token), lambda: message.edit(**kwargs)
+    )
+
+
+async def send(channel, priority: int = MATCH, **kwargs):
+    return await OUTBOUND.submit(priority, ("send", channel.id), lambda: channel.send(**kwargs))
+
+
+async def react(message, emoji, priority: int = BACKGROUND):
+    return await OUTBOUND.submit(
+        priority, ("react", message.channel.id), lambda: message.add_reaction(emoji)
+    )
+
@@ -1,27 +1,25 @@
-import config
+from state import TournamentSettings
 
-# Organisateurs (IDs fixes)
-ORGA_IDS = {
-    config.ORGA_USER_ID,
-    1352575142668013588,  # nouvel organisateur
-}
+# Organisateurs et rôle admin : propres à chaque tournoi (TournamentSettings)
 
-def is_orga(interaction) -> bool:
-    return interaction.user.id in ORGA_IDS
+def is_orga(interaction, settings: TournamentSettings) -> bool:
+    return interaction.user.id in settings.orga_ids
 
-def is_admin_role(member) -> bool:
-    return any(r.id == config.ADMIN_ROLE_ID for r in getattr(member, "roles", []))
+def is_admin_role(member, settings: TournamentSettings) -> bool:
+    if not settings.admin_role_id:
+        return False
+    return any(r.id == settings.admin_role_id for r in getattr(member, "roles", []))
 
-def is_orga_or_admin(interaction) -> bool:
-    return is_orga(interaction) or is_admin_role(interaction.user)
+def is_orga_or_admin(interaction, settings: TournamentSettings) -> bool:
+    return is_orga(interaction, settings) or is_admin_role(interaction.user, settings)
 
-def can_manage_match(interaction) -> bool:
-    return is_orga_or_admin(interaction)
+def can_manage_match(interaction, settings: TournamentSettings) -> bool:
+    return is_orga_or_admin(interaction, settings)
 
-def is_orga_or_admin_user(guild, user_id: int) -> bool:
-    if user_id in ORGA_IDS:
+def is_orga_or_admin_user(guild, user_id: int, settings: TournamentSettings) -> bool:
+    if user_id in settings.orga_ids:
         return True
     m = guild.get_member(user_id)
     if not m:
         return False
-    return is_admin_role(m)
\ No newline at end of file
+    return is_admin_role(m, settings)
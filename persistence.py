@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import List
+
+import metrics
+from state import state_to_dict, state_load_dict
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Regroupement des écritures : une seule écriture + fsync par fenêtre
+FLUSH_DELAY = 0.25
+# Compaction du journal en snapshot au-delà de N opérations
+COMPACT_EVERY = 2000
+
+
+class Journal:
+    """Persistance de TournamentState : snapshot compacté + journal append-only.
+
+    - snapshot.json : état complet au dernier compactage
+    - journal.jsonl : une opération du store par ligne depuis ce snapshot
+
+    Les opérations sont collectées depuis la boucle asyncio puis écrites
+    par lots dans un thread (asyncio.to_thread), avec un seul fsync par lot.
+    La tâche d'écriture n'est lancée qu'à la première opération.
+    """
+
+    def __init__(self, store: TournamentStore, directory: str):
+        self.store = store
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+
+        self._pending: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._journal_len = 0
+        # Numéro de séquence de la dernière opération enregistrée
+        self._seq = 0
+
+    # -------------------------
+    # Chargement
+    # -------------------------
+    def load(self):
+        t0 = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snap = json.load(f)
+            state_load_dict(self.store.state, snap["state"])
+            self._seq = snap["seq"]
+            self.store.rebuild()
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne tronquée par un arrêt brutal
+                        log.warning("Journal : ligne illisible ignorée")
+                        break
+                    # Déjà couvert par le snapshot (arrêt pendant un compactage)
+                    if entry["seq"] <= self._seq:
+                        continue
+                    self.store.apply(entry["op"], entry["data"])
+                    self._seq = entry["seq"]
+                    replayed += 1
+        self._journal_len = replayed
+
+        # Premier écouteur : l'opération est journalisée avant tout traitement
+        self.store.subscribe(self._record, first=True)
+        log.info(
+            "État chargé en %.1f ms (%d opérations rejouées)",
+            (time.perf_counter() - t0) * 1000, replayed
+        )
+
+    # -------------------------
+    # Écriture
+    # -------------------------
+    def _record(self, op: str, payload: dict):
+        self._seq += 1
+        self._pending.append(
+            json.dumps({"seq": self._seq, "op": op, "data": payload}, separators=(",", ":"))
+        )
+        self._wakeup.set()
+        if self._task is None and not self._closing:
+            self._task = asyncio.get_running_loop().create_task(self._writer_loop())
+
+    async def _writer_loop(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            if not self._closing:
+                await asyncio.sleep(FLUSH_DELAY)
+            try:
+                await self.flush()
+            except Exception:
+                metrics.ERRORS.inc(source="journal")
+                log.exception("Journal : échec d'écriture")
+
+    async def flush(self):
+        async with self._flush_lock:
+            self._wakeup.clear()
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, []
+            if self._journal_len + len(batch) < COMPACT_EVERY:
+                await asyncio.to_thread(self._append, batch)
+                self._journal_len += len(batch)
+                return
+
+            # Snapshot pris dans la boucle, au même instant que le lot :
+            # il couvre exactement les opérations jusqu'à self._seq
+            snapshot = json.dumps(
+                {"seq": self._seq, "state": state_to_dict(self.store.state)},
+                separators=(",", ":")
+            )
+            await asyncio.to_thread(self._compact, snapshot)
+            self._journal_len = 0
+
+    def _append(self, lines: List[str]):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self, snapshot: str):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Le snapshot couvre tout le journal : on repart d'un journal vide
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def close(self):
+        # Pas d'annulation : une écriture en cours dans son thread doit se
+        # terminer avant le dernier flush (ordre des seq, journal non tronqué)
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
@@ -0,0 +1,195 @@
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from reminders import PARIS_TZ, match_datetime
+from state import Match, Team
+
+# Créneau de disponibilité : (début, fin) en timestamps Unix
+Window = Tuple[int, int]
+
+# "12/03 20h-23h", "12/03/2026 18h30-22h00"
+_WINDOW_RE = re.compile(r"^\s*(\d{1,2}/\d{1,2}(?:/\d{4})?)\s+(\d{1,2}h\d{0,2})\s*-\s*(\d{1,2}h\d{0,2})\s*$")
+
+
+class PlanningError(Exception):
+    """Saisie de disponibilités ou grille de créneaux invalide."""
+
+
+def _time(value: str) -> str:
+    # "20h" -> "20h00" (format attendu par match_datetime)
+    return value if not value.endswith("h") else value + "00"
+
+
+def parse_windows(text: str) -> List[Window]:
+    """Disponibilités saisies par un joueur, séparées par des virgules.
+
+    Une fin antérieure au début passe au lendemain (ex : 22h-1h). Les
+    créneaux qui se chevauchent sont fusionnés.
+    """
+    windows: List[Window] = []
+    for chunk in re.split(r"[,;\n]", text):
+        if not chunk.strip():
+            continue
+        found = _WINDOW_RE.match(chunk)
+        if not found:
+            raise PlanningError(f"Créneau illisible : « {chunk.strip()} » (ex : 12/03 20h-23h).")
+        day, start_str, end_str = found.groups()
+        start = match_datetime(day, _time(start_str))
+        end = match_datetime(day, _time(end_str))
+        if start is None or end is None:
+            raise PlanningError(f"Date ou heure invalide : « {chunk.strip()} ».")
+        if end <= start:
+            end += timedelta(days=1)
+        windows.append((int(start.timestamp()), int(end.timestamp())))
+    return merge_windows(windows)
+
+
+def merge_windows(windows: Iterable[Window]) -> List[Window]:
+    merged: List[Window] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_slots(date_str: str, start_str: str, end_str: str, days: int, duration: int) -> List[int]:
+    """Débuts des créneaux proposés par l'organisation : chaque jour de
+    start_str à end_str, un créneau toutes les `duration` secondes."""
+    first = match_datetime(date_str, _time(start_str))
+    last = match_datetime(date_str, _time(end_str))
+    if first is None or last is None:
+        raise PlanningError("Date ou heure invalide.")
+    if last <= first:
+        last += timedelta(days=1)
+    if days < 1 or last - first < timedelta(seconds=duration):
+        raise PlanningError("Plage horaire trop courte pour un match.")
+
+    slots = []
+    for d in range(days):
+        # Arithmétique en heure locale : les créneaux restent à la même heure après un changement d'heure
+        t = first + timedelta(days=d)
+        end = last + timedelta(days=d)
+        while t + timedelta(seconds=duration) <= end:
+            slots.append(int(t.timestamp()))
+            t += timedelta(seconds=duration)
+    return slots
+
+
+def slot_label(ts: int) -> Tuple[str, str]:
+    """(date_str, time_str) au format des matchs."""
+    dt = datetime.fromtimestamp(ts, PARIS_TZ)
+    return dt.strftime("%d/%m/%Y"), dt.strftime("%Hh%M")
+
+
+# =================================================
+# Solveur
+# =================================================
+@dataclass
+class Schedule:
+    slots: List[int]
+    assigned: Dict[int, int] = field(default_factory=dict)  # match id -> timestamp du créneau
+    unscheduled: List[int] = field(default_factory=list)    # match ids sans créneau commun
+
+    @property
+    def makespan(self) -> int | None:
+        return max(self.assigned.values()) if self.assigned else None
+
+
+def _player_mask(windows: List[Window], slots: List[int], duration: int) -> int:
+    # Bit i = le joueur est disponible pendant tout le créneau i (fusion de deux listes triées)
+    mask = 0
+    w = 0
+    for i, start in enumerate(slots):
+        while w < len(windows) and windows[w][1] < start + duration:
+            w += 1
+        if w == len(windows):
+            break
+        if windows[w][0] <= start:
+            mask |= 1 << i
+    return mask
+
+
+def _greedy(items: List[Tuple[int, int, int, int]], limit: int, n_slots: int, capacity: int):
+    """Placement au plus tôt, matchs les plus contraints d'abord.
+
+    items = (match id, team1, team2, masque des créneaux possibles)
+    """
+    free = limit            # créneaux ayant encore de la capacité
+    load = [0] * n_slots
+    busy: Dict[int, int] = {}  # équipe -> créneaux déjà occupés
+    placed: Dict[int, int] = {}
+    missed: List[int] = []
+
+    for match_id, t1, t2, mask in sorted(items, key=lambda it: ((it[3] & limit).bit_count(), it[0])):
+        candidates = mask & free & ~busy.get(t1, 0) & ~busy.get(t2, 0)
+        if not candidates:
+            missed.append(match_id)
+            continue
+        bit = candidates & -candidates  # créneau le plus tôt
+        i = bit.bit_length() - 1
+        placed[match_id] = i
+        busy[t1] = busy.get(t1, 0) | bit
+        busy[t2] = busy.get(t2, 0) | bit
+        load[i] += 1
+        if load[i] >= capacity:
+            free &= ~bit
+    return placed, missed
+
+
+def solve(
+    matches: List[Match],
+    teams: Dict[int, Team],
+    availability: Dict[int, List[Window]],
+    slots: List[int],
+    duration: int,
+    capacity: int,
+) -> Schedule:
+    """Attribue un créneau à chaque match en minimisant le dernier créneau utilisé.
+
+    Contraintes : les quatre joueurs sont disponibles pendant tout le
+    créneau (un joueur sans disponibilité saisie n'est pas contraint), une
+    équipe ne joue qu'un match par créneau, au plus `capacity` matchs par
+    créneau. Les créneaux possibles sont des masques de bits ; le plus grand
+    nombre de matchs plaçables est calculé sur toute la grille, puis une
+    recherche dichotomique trouve le plus petit horizon qui les place tous.
+    """
+    n_slots = len(slots)
+    schedule = Schedule(slots=slots)
+    if not matches or not n_slots:
+        schedule.unscheduled = [m.id for m in matches]
+        return schedule
+
+    everything = (1 << n_slots) - 1
+    masks: Dict[int, int] = {}
+    items = []
+    for m in matches:
+        mask = everything
+        for team_id in (m.team1_id, m.team2_id):
+            for p in teams[team_id].players:
+                if p.user_id not in masks:
+                    windows = availability.get(p.user_id)
+                    masks[p.user_id] = _player_mask(windows, slots, duration) if windows else everything
+                mask &= masks[p.user_id]
+        items.append((m.id, m.team1_id, m.team2_id, mask))
+
+    placed, missed = _greedy(items, everything, n_slots, capacity)
+    target = len(placed)
+
+    lo, hi = max(1, -(-target // capacity)), n_slots
+    while lo < hi:
+        mid = (lo + hi) // 2
+        trial, _ = _greedy(items, (1 << mid) - 1, n_slots, capacity)
+        if len(trial) >= target:
+            hi = mid
+        else:
+            lo = mid + 1
+    if hi < n_slots:
+        placed, missed = _greedy(items, (1 << hi) - 1, n_slots, capacity)
+
+    schedule.assigned = {match_id: slots[i] for match_id, i in placed.items()}
+    schedule.unscheduled = sorted(missed)
+    return schedule
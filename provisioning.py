@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+import config
+import embeds
+import metrics
+import outbound
+from outbound import OUTBOUND
+from resolver import RESOLVER
+from state import Team, Match, TournamentSettings
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Créations de salons : une seule route (POST /guilds/{id}/channels) partagée
+CREATE_CONCURRENCY = 2
+# Envois de messages : un bucket par salon, on peut paralléliser davantage
+POST_CONCURRENCY = 8
+# Tentatives par paire avant abandon
+MAX_ATTEMPTS = 3
+# Intervalle minimal entre deux mises à jour de la progression
+PROGRESS_INTERVAL = 2.0
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class PairJob:
+    """Création d'un match : chaque étape terminée n'est jamais refaite."""
+    match_id: int
+    team1: Team
+    team2: Team
+    channel: Optional[discord.TextChannel] = None
+    match: Optional[Match] = None
+    mentions_sent: bool = False
+    message: Optional[discord.Message] = None
+    reacted: bool = False
+    attempts: int = 0
+    error: Optional[str] = None
+    bracket_node: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.reacted
+
+
+def round_overwrites(guild: discord.Guild, settings: TournamentSettings) -> Dict:
+    """Permissions communes à tous les salons d'un round (calculées une fois)."""
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False)
+    }
+
+    admin_role = guild.get_role(settings.admin_role_id) if settings.admin_role_id else None
+    if admin_role:
+        overwrites[admin_role] = discord.PermissionOverwrite(
+            view_channel=True, send_messages=True
+        )
+
+    for oid in settings.orga_ids:
+        overwrites[discord.Object(id=oid)] = discord.PermissionOverwrite(
+            view_channel=True, send_messages=True
+        )
+    return overwrites
+
+
+class RoundProvisioner:
+    """Création parallèle (bornée) des salons et messages d'un round."""
+
+    def __init__(
+        self,
+        store: TournamentStore,
+        guild: discord.Guild,
+        settings: TournamentSettings,
+        round_no: int,
+        date_str: str,
+        time_str: str,
+        view_factory: Callable[[int], discord.ui.View],
+    ):
+        self.store = store
+        self.guild = guild
+        self.category = guild.get_channel(settings.match_category_id)
+        self.round_no = round_no
+        self.date_str = date_str
+        self.time_str = time_str
+        self.view_factory = view_factory
+
+        self.base_overwrites = round_overwrites(guild, settings)
+        self._create_sem = asyncio.Semaphore(CREATE_CONCURRENCY)
+        self._post_sem = asyncio.Semaphore(POST_CONCURRENCY)
+
+    def jobs_for(
+        self, pairs: List[tuple], first_id: int | None = None, nodes: List[int] | None = None
+    ) -> List[PairJob]:
+        """Un job par paire d'équipes, ids consécutifs à partir de `first_id`
+        (par défaut le prochain id libre) ; `nodes` : nœuds du tableau."""
+        if first_id is None:
+            first_id = self.store.next_match_id()
+        return [
+            PairJob(match_id=first_id + i, team1=t1, team2=t2, bracket_node=nodes[i] if nodes else None)
+            for i, (t1, t2) in enumerate(pairs)
+        ]
+
+    async def run(self, jobs: List[PairJob], progress: ProgressCallback | None = None) -> List[PairJob]:
+        """Exécute les jobs ; renvoie ceux qui ont échoué après MAX_ATTEMPTS."""
+        total = len(jobs)
+        last_report = 0.0
+
+        async def report(force: bool = False):
+            nonlocal last_report
+            if progress is None:
+                return
+            now = time.monotonic()
+            if not force and now - last_report < PROGRESS_INTERVAL:
+                return
+            last_report = now
+            try:
+                await progress(sum(j.done for j in jobs), total)
+            except discord.HTTPException:
+                metrics.ERRORS.inc(source="provisioning")
+
+        async def run_one(job: PairJob):
+            await self._run_job(job)
+            await report()
+
+        pending = jobs
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(2 ** attempt)
+            await asyncio.gather(*(run_one(j) for j in pending))
+            pending = [j for j in pending if not j.done]
+            if not pending:
+                break
+
+        await report(force=True)
+        return pending
+
+    async def _run_job(self, job: PairJob):
+        job.attempts += 1
+        job.error = None
+        t1, t2 = job.team1, job.team2
+        try:
+            if job.channel is None and job.match is not None:
+                # Reprise d'un match déjà enregistré : son salon existe peut-être encore
+                try:
+                    job.channel = await RESOLVER.channel(job.match.channel_id)
+                except discord.NotFound:
+                    pass
+
+            if job.channel is None:
+                overwrites = dict(self.base_overwrites)
+                for p in (*t1.players, *t2.players):
+                    overwrites[discord.Object(id=p.user_id)] = discord.PermissionOverwrite(
+                        view_channel=True, send_messages=True
+                    )
+                async with self._create_sem:
+                    job.channel = await OUTBOUND.submit(
+                        outbound.MATCH, ("create_channel", self.guild.id),
+                        lambda: self.guild.create_text_channel(
+                            name=config.MATCH_CHANNEL_TEMPLATE.format(a=t1.id, b=t2.id),
+                            category=self.category,
+                            overwrites=overwrites,
+                        ),
+                    )
+
+            if job.match is None:
+                job.match = Match(
+                    id=job.match_id,
+                    round_no=self.round_no,
+                    team1_id=t1.id,
+                    team2_id=t2.id,
+                    date_str=self.date_str,
+                    time_str=self.time_str,
+                    channel_id=job.channel.id,
+                    bracket_node=job.bracket_node,
+                )
+                self.store.add_match(job.match)
+            elif job.match.channel_id != job.channel.id:
+                self.store.update_match(job.match, channel_id=job.channel.id)
+
+            async with self._post_sem:
+                if not job.mentions_sent:
+                    await outbound.send(job.channel, content=embeds.match_mentions(t1, t2))
+                    job.mentions_sent = True
+
+                if job.message is None:
+                    job.message = await outbound.send(
+                        job.channel,
+                        embed=embeds.embed_match(job.match, t1, t2),
+                        view=self.view_factory(job.match.id)
+                    )
+                    self.store.update_match(job.match, created_message_id=job.message.id)
+
+                if not job.reacted:
+                    # Réaction en arrière-plan : ne retarde pas les messages des autres salons
+                    await outbound.react(job.message, config.EMOJI_THUMBS)
+                    job.reacted = True
+        except discord.HTTPException as e:
+            metrics.ERRORS.inc(source="provisioning")
+            job.error = f"{e.status} {e.text}"
+            log.warning(
+                "Provisioning EQUIPE %s vs EQUIPE %s (essai %d) : %s",
+                t1.id, t2.id, job.attempts, job.error
+            )
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import config
+import metrics
+from state import Team
+
+log = logging.getLogger(__name__)
+
+# Regroupement des sauvegardes après une série de résultats
+SAVE_DELAY = 5.0
+
+# user id -> (rating, matchs comptés)
+Table = Dict[int, Tuple[float, int]]
+
+
+def expected(rating_a: float, rating_b: float) -> float:
+    """Probabilité de victoire de A contre B (Elo, échelle 400)."""
+    return 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0))
+
+
+class RatingEngine:
+    """Elo des joueurs, partagé par tous les tournois.
+
+    Une équipe vaut la moyenne de ses deux joueurs ; après un résultat,
+    chaque joueur reçoit K * (score - attendu) de son équipe. La table est
+    un dict (lecture O(1) par joueur), sauvegardée par lots dans
+    ratings.json. recompute() la reconstruit depuis l'historique complet.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table: Table = {}
+        self._loaded = False
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    # -------------------------
+    # Lecture
+    # -------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._table = {int(uid): (r, n) for uid, (r, n) in json.load(f).items()}
+        except (OSError, ValueError):
+            self._table = {}
+
+    def rating(self, user_id: int) -> float:
+        self._ensure_loaded()
+        entry = self._table.get(user_id)
+        return entry[0] if entry else config.RATING_INITIAL
+
+    def team_rating(self, team: Team) -> float:
+        return (self.rating(team.players[0].user_id) + self.rating(team.players[1].user_id)) / 2
+
+    def top(self, n: int) -> List[Tuple[int, float, int]]:
+        self._ensure_loaded()
+        best = sorted(self._table.items(), key=lambda kv: -kv[1][0])[:n]
+        return [(uid, r, games) for uid, (r, games) in best]
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._table)
+
+    # -------------------------
+    # Mise à jour incrémentale
+    # -------------------------
+    def record(self, winner: Team, loser: Team):
+        self._ensure_loaded()
+        delta = config.RATING_K * (1.0 - expected(self.team_rating(winner), self.team_rating(loser)))
+        for team, sign in ((winner, 1.0), (loser, -1.0)):
+            for p in team.players:
+                r, games = self._table.get(p.user_id, (config.RATING_INITIAL, 0))
+                self._table[p.user_id] = (r + sign * delta, games + 1)
+        self._schedule_save()
+
+    def replace(self, table: Table):
+        self._loaded = True
+        self._table = table
+        self._schedule_save()
+
+    # -------------------------
+    # Sauvegarde
+    # -------------------------
+    def _schedule_save(self):
+        self._wakeup.set()
+        if self._task is None and not self._closing:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            if not self._closing:
+                await asyncio.sleep(SAVE_DELAY)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except OSError:
+                metrics.ERRORS.inc(source="ratings")
+                log.exception("Sauvegarde des ratings en échec")
+
+    async def flush(self):
+        snapshot = {str(uid): [r, n] for uid, (r, n) in self._table.items()}
+        await asyncio.to_thread(_write_json, self.path, snapshot)
+
+    async def close(self):
+        # Comme Journal.close : une sauvegarde en cours dans son thread se
+        # termine avant la dernière (même fichier .tmp)
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            await self.flush()
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+# =================================================
+# Recalcul complet (vectorisé)
+# =================================================
+def _replay(ratings: np.ndarray, batch: np.ndarray):
+    """Applique un lot de matchs (4 x k index de joueurs) sans joueur en commun."""
+    w1, w2, l1, l2 = batch
+    winner = (ratings[w1] + ratings[w2]) / 2
+    loser = (ratings[l1] + ratings[l2]) / 2
+    delta = config.RATING_K / (1.0 + 10.0 ** ((winner - loser) / 400.0))
+    ratings[w1] += delta
+    ratings[w2] += delta
+    ratings[l1] -= delta
+    ratings[l2] -= delta
+
+
+def recompute(cols: Dict[str, np.ndarray]) -> Table:
+    """Rejoue tout l'historique de l'entrepôt de résultats.
+
+    Les matchs d'un même round d'un même tournoi n'ont normalement aucun
+    joueur en commun : chaque (tournoi, round) est un lot traité en une
+    opération vectorisée (attendus, deltas). Un lot où un joueur apparaît
+    deux fois (données incohérentes) est rejoué match par match. Les lots
+    sont rejoués dans l'ordre chronologique (run puis round), comme
+    RatingEngine.record.
+    """
+    n = len(cols["run"])
+    if not n:
+        return {}
+
+    # Index dense des joueurs : notes dans un tableau plutôt qu'un dict
+    players = np.stack([cols["w_p1"], cols["w_p2"], cols["l_p1"], cols["l_p2"]])
+    ids, dense = np.unique(players, return_inverse=True)
+    dense = dense.reshape(4, n)
+    ratings = np.full(len(ids), config.RATING_INITIAL, dtype=np.float64)
+    games = np.bincount(dense.ravel(), minlength=len(ids))
+
+    order = np.lexsort((cols["round"], cols["run"]))
+    changed = (np.diff(cols["run"][order]) != 0) | (np.diff(cols["round"][order]) != 0)
+    starts = np.flatnonzero(changed) + 1
+    batches = np.split(order, starts)
+
+    # L'indexation directe (ratings[w1] += delta) perd les mises à jour en
+    # double : lots contenant deux fois le même joueur repérés en une passe
+    step = np.zeros(n, dtype=np.int64)
+    step[starts] = 1
+    batch_of = np.empty(n, dtype=np.int64)
+    batch_of[order] = np.cumsum(step)
+    keys = np.sort((batch_of * len(ids) + dense).ravel())
+    shared = set(np.unique(keys[1:][keys[1:] == keys[:-1]] // len(ids)).tolist())
+
+    for b, idx in enumerate(batches):
+        if b in shared:
+            for i in idx:
+                _replay(ratings, dense[:, i:i + 1])
+        else:
+            _replay(ratings, dense[:, idx])
+
+    return {int(uid): (float(r), int(g)) for uid, r, g in zip(ids, ratings, games)}
+
+
+RATINGS = RatingEngine(os.path.join(config.DATA_DIR, "ratings.json"))
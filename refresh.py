@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Set
+
+import discord
+
+import embeds
+import metrics
+import outbound
+from resolver import RESOLVER
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Fenêtre de regroupement des rafraîchissements (secondes)
+REFRESH_DELAY = 1.5
+
+# Reprise d'un embed en échec : délai doublé à chaque échec consécutif, borné,
+# puis abandon jusqu'à la prochaine mutation (salon supprimé, permissions…)
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 300.0
+MAX_RETRIES = 6
+
+# Ordre d'envoi / d'édition des embeds principaux
+KINDS = ("players", "teams", "upcoming", "history")
+
+# Champs de Match affichés dans les embeds globaux
+_UPCOMING_FIELDS = {"status", "date_str", "time_str", "map_name", "round_no", "team1_id", "team2_id"}
+_HISTORY_FIELDS = {"status", "winner_team_id"}
+
+
+def _payload_hash(embed: discord.Embed) -> str:
+    raw = json.dumps(embed.to_dict(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class EmbedRefresher:
+    """Rafraîchissement différé des embeds du canal principal.
+
+    Les mutations du store marquent les embeds concernés comme « sales ».
+    Une rafale de mutations est regroupée dans une fenêtre de REFRESH_DELAY,
+    puis chaque embed est rendu page par page : seules les pages dont le
+    rendu a réellement changé sont éditées, les pages en trop supprimées.
+    Un embed en échec est repris avec un délai exponentiel.
+    """
+
+    def __init__(self, store: TournamentStore, channel_id: int):
+        self.store = store
+        self.channel_id = channel_id
+        self.bot: discord.Client | None = None
+
+        self._dirty: Set[str] = set()
+        self._hashes: Dict[int, str] = {}  # message id -> hash du dernier rendu envoyé
+        self._failures: Dict[str, int] = {}     # embed -> échecs consécutifs
+        self._retry_at: Dict[str, float] = {}   # embed -> pas de nouvel essai avant (monotonic)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.stats = {
+            "marked": 0, "runs": 0, "created": 0, "edited": 0,
+            "deleted": 0, "skipped": 0, "errors": 0,
+        }
+
+        store.subscribe(self._on_mutation)
+
+    # -------------------------
+    # Marquage
+    # -------------------------
+    def mark_dirty(self, *kinds: str):
+        self._dirty.update(kinds)
+        self.stats["marked"] += len(kinds)
+        self._wakeup.set()
+        self._ensure_task()
+
+    def _on_mutation(self, op: str, payload: dict):
+        if op in ("player_add", "player_remove", "player_class"):
+            self.mark_dirty("players")
+        elif op == "teams_set":
+            self.mark_dirty("players", "teams", "upcoming", "history")
+        elif op == "team_eliminate":
+            self.mark_dirty("teams")
+        elif op == "match_add":
+            self.mark_dirty("upcoming")
+        elif op == "match_update":
+            fields = payload["fields"].keys()
+            if _UPCOMING_FIELDS.intersection(fields):
+                self.mark_dirty("upcoming")
+            if _HISTORY_FIELDS.intersection(fields):
+                self.mark_dirty("history")
+        elif op == "reset":
+            self._hashes.clear()
+            self._failures.clear()
+            self._retry_at.clear()
+
+    # -------------------------
+    # Boucle
+    # -------------------------
+    def start(self, bot: discord.Client):
+        self.bot = bot
+        self._ensure_task()
+
+    def _ensure_task(self):
+        # Aucune tâche tant que le tournoi n'a rien à rafraîchir
+        if self._task is None and self.bot is not None and self._dirty:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def _next_retry(self) -> float | None:
+        """Secondes avant le prochain embed en attente de reprise (None : aucun)."""
+        pending = [self._retry_at[k] for k in self._dirty if k in self._retry_at]
+        if not pending:
+            return None
+        return max(0.0, min(pending) - time.monotonic())
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_retry())
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(REFRESH_DELAY)
+            try:
+                await self.flush()
+            except Exception:
+                self.stats["errors"] += 1
+                metrics.ERRORS.inc(source="refresh")
+                log.exception("Rafraîchissement des embeds en échec")
+
+    async def flush(self):
+        self._wakeup.clear()
+        if not self._dirty or self.bot is None:
+            return
+
+        # Embeds en attente de reprise : laissés sales jusqu'à leur échéance
+        now = time.monotonic()
+        deferred = {k for k in self._dirty if self._retry_at.get(k, 0.0) > now}
+        dirty, self._dirty = self._dirty - deferred, deferred
+        if not dirty:
+            return
+        self.stats["runs"] += 1
+
+        for kind in KINDS:
+            if kind not in dirty:
+                continue
+            # Un embed en échec ne bloque pas les suivants
+            try:
+                ok = await self._refresh_one(self.channel_id, kind)
+            except Exception:
+                self.stats["errors"] += 1
+                metrics.ERRORS.inc(source="refresh")
+                log.exception("Rafraîchissement de l'embed %s en échec", kind)
+                ok = False
+            if ok:
+                self._failures.pop(kind, None)
+                self._retry_at.pop(kind, None)
+            else:
+                self._schedule_retry(kind)
+
+    def _schedule_retry(self, kind: str):
+        failures = self._failures.get(kind, 0) + 1
+        self._failures[kind] = failures
+        if failures >= MAX_RETRIES:
+            # Plus de reprise automatique : une nouvelle mutation retentera
+            # l'embed, au plus une fois par RETRY_MAX_DELAY
+            self._retry_at[kind] = time.monotonic() + RETRY_MAX_DELAY
+            log.error("Embed %s abandonné après %d échecs consécutifs", kind, failures)
+            return
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (failures - 1))
+        self._retry_at[kind] = time.monotonic() + delay
+        self._dirty.add(kind)
+
+    def _render(self, kind: str) -> embeds.Pages:
+        state = self.store.state
+        if kind == "players":
+            # L'embed joueurs n'existe que pendant les inscriptions
+            if state.teams or (not state.players and not state.embeds.players_pages):
+                return {}
+            return embeds.pages_players(state.players)
+        if kind == "teams":
+            return embeds.pages_teams(state.teams)
+        if kind == "upcoming":
+            return embeds.pages_upcoming(state.matches)
+        return embeds.pages_history(state.matches)
+
+    async def _refresh_one(self, channel_id: int, kind: str) -> bool:
+        """Rend et envoie un embed ; False si une page n'a pas pu être envoyée."""
+        field = f"{kind}_pages"
+        current: Dict[int, int] = getattr(self.store.state.embeds, field)
+        pages = self._render(kind)
+        updated = dict(current)
+        ok = True
+
+        try:
+            # Pages disparues : suppression du message
+            for page_no in sorted(set(current) - set(pages)):
+                msg_id = updated.pop(page_no)
+                self._hashes.pop(msg_id, None)
+                try:
+                    await RESOLVER.delete_message(channel_id, msg_id, priority=outbound.EMBED)
+                except discord.HTTPException:
+                    metrics.ERRORS.inc(source="refresh")
+                    log.warning("Suppression de la page %s/%s impossible", kind, page_no)
+                self.stats["deleted"] += 1
+
+            for page_no in sorted(pages):
+                embed = pages[page_no]
+                digest = _payload_hash(embed)
+                msg_id = updated.get(page_no)
+
+                if msg_id is not None and self._hashes.get(msg_id) == digest:
+                    self.stats["skipped"] += 1
+                    continue
+
+                if msg_id is not None:
+                    try:
+                        edited = await RESOLVER.edit_message(channel_id, msg_id, priority=outbound.EMBED, embed=embed)
+                    except discord.HTTPException:
+                        self.stats["errors"] += 1
+                        metrics.ERRORS.inc(source="refresh")
+                        log.exception("Édition de la page %s/%s impossible", kind, page_no)
+                        ok = False
+                        continue
+                    if edited is not None:
+                        self._hashes[msg_id] = digest
+                        self.stats["edited"] += 1
+                        continue
+                    # Message supprimé à la main : on le recrée
+                    self._hashes.pop(msg_id, None)
+
+                try:
+                    msg = await RESOLVER.send(channel_id, priority=outbound.EMBED, embed=embed)
+                except discord.HTTPException:
+                    self.stats["errors"] += 1
+                    metrics.ERRORS.inc(source="refresh")
+                    log.exception("Création de la page %s/%s impossible", kind, page_no)
+                    ok = False
+                    continue
+                updated[page_no] = msg.id
+                self._hashes[msg.id] = digest
+                self.stats["created"] += 1
+        finally:
+            # Même en cas d'échec : les pages déjà créées ne seront pas repostées
+            if updated != current:
+                self.store.update_embeds(**{field: updated})
+        return ok
@@ -0,0 +1,204 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+import discord
+
+import config
+import embeds
+import metrics
+from resolver import RESOLVER
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+PARIS_TZ = ZoneInfo("Europe/Paris")
+
+# Un rappel plus en retard que ça (ex : bot redémarré) n'est pas envoyé
+LATE_GRACE = 5 * 60
+
+# (timestamp d'échéance, séquence, match id, offset en minutes, génération)
+Entry = Tuple[float, int, int, int, int]
+
+
+def match_datetime(date_str: str, time_str: str) -> datetime | None:
+    try:
+        ts = time_str.lower().replace("h", ":")
+        hh, mm = ts.split(":")
+        parts = date_str.split("/")
+        if len(parts) == 2:
+            day, month = map(int, parts)
+            year = datetime.now(PARIS_TZ).year
+        else:
+            day, month, year = map(int, parts)
+        return datetime(year, month, day, int(hh), int(mm), tzinfo=PARIS_TZ)
+    except ValueError:
+        return None
+
+
+def _offset_label(minutes: int) -> str:
+    if minutes % 60 == 0:
+        return f"{minutes // 60} h"
+    return f"{minutes} minutes"
+
+
+class ReminderScheduler:
+    """Rappels de match planifiés dans un tas (heapq).
+
+    La date d'un match est analysée une seule fois, à sa création ou à sa
+    modification. La boucle dort jusqu'à la prochaine échéance ; une
+    modification incrémente la génération du match, ce qui invalide ses
+    anciennes entrées sans avoir à les retirer du tas.
+    """
+
+    def __init__(self, store: TournamentStore):
+        self.store = store
+        self._heap: List[Entry] = []
+        self._generation: Dict[int, int] = {}
+        self._live: Dict[int, int] = {}  # match id -> nb d'entrées valides dans le tas
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.bot: discord.Client | None = None
+
+        self.stats = {"sent": 0, "skipped": 0, "late": 0, "errors": 0, "wakeups": 0}
+
+        store.subscribe(self._on_mutation)
+
+    # -------------------------
+    # Planification
+    # -------------------------
+    def schedule(self, match_id: int, date_str: str, time_str: str):
+        self.cancel(match_id)
+
+        dt = match_datetime(date_str, time_str)
+        if dt is None:
+            return
+
+        gen = self._generation.get(match_id, 0)
+        now = time.time()
+        count = 0
+        for minutes in config.REMINDER_OFFSETS:
+            deadline = dt.timestamp() - minutes * 60
+            if deadline <= now:
+                continue
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, match_id, minutes, gen))
+            count += 1
+
+        if count:
+            self._live[match_id] = count
+            self._wakeup.set()
+            self._ensure_task()
+
+    def cancel(self, match_id: int):
+        if self._live.pop(match_id, None) is not None:
+            self._generation[match_id] = self._generation.get(match_id, 0) + 1
+            self._compact_if_needed()
+
+    def schedule_all(self):
+        for m in self.store.state.matches:
+            if m.status != "DONE":
+                self.schedule(m.id, m.date_str, m.time_str)
+
+    def clear(self):
+        self._heap.clear()
+        self._generation.clear()
+        self._live.clear()
+
+    def _compact_if_needed(self):
+        # Mémoire proportionnelle aux rappels valides : on purge les entrées
+        # obsolètes dès qu'elles deviennent majoritaires
+        live = sum(self._live.values())
+        if len(self._heap) > 2 * live + 16:
+            self._heap = [e for e in self._heap if self._is_current(e)]
+            heapq.heapify(self._heap)
+
+    def _is_current(self, entry: Entry) -> bool:
+        _, _, match_id, _, gen = entry
+        return match_id in self._live and self._generation.get(match_id, 0) == gen
+
+    def _on_mutation(self, op: str, payload: dict):
+        if op == "match_add":
+            m = payload["match"]
+            self.schedule(m["id"], m["date_str"], m["time_str"])
+        elif op == "match_update":
+            fields = payload["fields"]
+            if fields.get("status") == "DONE":
+                self.cancel(payload["id"])
+            elif "date_str" in fields or "time_str" in fields:
+                m = self.store.match(payload["id"])
+                if m:
+                    self.schedule(m.id, m.date_str, m.time_str)
+        elif op == "reset":
+            self.clear()
+
+    # -------------------------
+    # Boucle
+    # -------------------------
+    def start(self, bot: discord.Client):
+        self.bot = bot
+        self.schedule_all()
+
+    def _ensure_task(self):
+        # Aucune tâche tant que le tournoi n'a aucun rappel
+        if self._task is None and self.bot is not None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                continue  # nouvelle entrée : on recalcule la prochaine échéance
+            except asyncio.TimeoutError:
+                pass
+
+            self.stats["wakeups"] += 1
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_current(entry):
+                    continue
+                match_id = entry[2]
+                self._live[match_id] -= 1
+                if not self._live[match_id]:
+                    del self._live[match_id]
+
+                metrics.REMINDER_LAG.observe(now - entry[0])
+                if now - entry[0] > LATE_GRACE:
+                    self.stats["late"] += 1
+                    continue
+                try:
+                    await self._send(match_id, entry[3])
+                except Exception:
+                    self.stats["errors"] += 1
+                    metrics.ERRORS.inc(source="reminders")
+                    log.exception("Rappel du match %s en échec", match_id)
+
+    async def _send(self, match_id: int, minutes: int):
+        m = self.store.match(match_id)
+        # Rappel uniquement pour les matchs validés (horaire confirmé)
+        if not m or m.status != "VALIDATED":
+            self.stats["skipped"] += 1
+            return
+
+        t1 = self.store.team(m.team1_id)
+        t2 = self.store.team(m.team2_id)
+        await RESOLVER.send(
+            m.channel_id,
+            content=(
+                f"{embeds.match_mentions(t1, t2)}\n\n"
+                f"⏰ **Rappel : match dans {_offset_label(minutes)}**\n"
+                "📸 Pensez à poster le screen du résultat."
+            ),
+        )
+        self.stats["sent"] += 1
+
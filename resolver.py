@@ -0,0 +1,99 @@
+import logging
+from typing import Dict
+
+import discord
+
+import metrics
+import outbound
+from outbound import OUTBOUND
+
+log = logging.getLogger(__name__)
+
+# Codes d'erreur Discord
+UNKNOWN_CHANNEL = 10003
+UNKNOWN_MESSAGE = 10008
+
+
+class ChannelResolver:
+    """Accès aux salons/messages sans aller-retour REST inutile.
+
+    - les salons viennent du cache gateway, avec repli sur fetch_channel
+    - les messages sont manipulés via des PartialMessage (pas de fetch_message)
+    - les erreurs « Unknown Channel / Unknown Message » invalident le cache
+    """
+
+    def __init__(self):
+        self.bot: discord.Client | None = None
+        self._channels: Dict[int, discord.abc.GuildChannel] = {}
+        self.stats = {"cache_hits": 0, "rest_fetches": 0, "invalidations": 0}
+
+    def attach(self, bot: discord.Client):
+        self.bot = bot
+
+    # -------------------------
+    # Salons
+    # -------------------------
+    async def channel(self, channel_id: int):
+        ch = self.bot.get_channel(channel_id) or self._channels.get(channel_id)
+        if ch is not None:
+            self.stats["cache_hits"] += 1
+            return ch
+
+        self.stats["rest_fetches"] += 1
+        ch = await self.bot.fetch_channel(channel_id)
+        self._channels[channel_id] = ch
+        return ch
+
+    def messageable(self, channel_id: int) -> discord.abc.Messageable:
+        """Salon utilisable pour send() sans aucun appel REST."""
+        ch = self.bot.get_channel(channel_id) or self._channels.get(channel_id)
+        if ch is not None:
+            self.stats["cache_hits"] += 1
+            return ch
+        return self.bot.get_partial_messageable(channel_id)
+
+    def invalidate(self, channel_id: int):
+        if self._channels.pop(channel_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    # -------------------------
+    # Messages
+    # -------------------------
+    def message(self, channel_id: int, message_id: int) -> discord.PartialMessage:
+        return self.messageable(channel_id).get_partial_message(message_id)
+
+    def _handle_not_found(self, channel_id: int, exc: discord.NotFound):
+        if exc.code == UNKNOWN_CHANNEL:
+            self.invalidate(channel_id)
+
+    async def send(self, channel_id: int, priority: int = outbound.MATCH, **kwargs) -> discord.Message:
+        ch = self.messageable(channel_id)
+        return await OUTBOUND.submit(priority, ("send", channel_id), lambda: ch.send(**kwargs))
+
+    async def edit_message(
+        self, channel_id: int, message_id: int, priority: int = outbound.MATCH, **kwargs
+    ) -> discord.Message | None:
+        """Édite un message ; None s'il (ou son salon) n'existe plus."""
+        msg = self.message(channel_id, message_id)
+        try:
+            return await OUTBOUND.submit(priority, ("edit", channel_id), lambda: msg.edit(**kwargs))
+        except discord.NotFound as e:
+            self._handle_not_found(channel_id, e)
+            return None
+
+    async def delete_message(
+        self, channel_id: int, message_id: int | None, priority: int = outbound.MATCH
+    ) -> bool:
+        if not message_id:
+            return False
+        msg = self.message(channel_id, message_id)
+        try:
+            await OUTBOUND.submit(priority, ("delete", channel_id), msg.delete)
+            return True
+        except discord.NotFound as e:
+            self._handle_not_found(channel_id, e)
+            return False
+
+
+RESOLVER = ChannelResolver()
+metrics.add_stats_collector("resolver", "Résolution des salons", lambda: [({}, RESOLVER.stats)])
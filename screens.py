@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Dict, List, Set
+
+import aiohttp
+import discord
+
+import config
+import metrics
+from state import Match
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Taille des morceaux lus puis écrits pendant le téléchargement
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+
+class ScreenTooLarge(Exception):
+    pass
+
+
+class ContentStore:
+    """Fichiers nommés par leur sha256 (screens/ab/abcdef….png), partagés
+    par tous les tournois : un screen reposté n'est stocké qu'une fois.
+
+    Les téléchargements sont limités à config.SCREEN_CONCURRENCY en
+    parallèle et à config.SCREEN_MAX_BYTES par fichier.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._sem = asyncio.Semaphore(config.SCREEN_CONCURRENCY)
+        self._session: aiohttp.ClientSession | None = None
+        # Hashes déjà présents ou en cours d'écriture (doublons simultanés)
+        self._known: Set[str] = set()
+
+        self.stats = {"stored": 0, "dedup": 0, "too_large": 0, "errors": 0, "bytes": 0}
+
+    def path(self, digest: str, ext: str = "") -> str:
+        return os.path.join(self.directory, digest[:2], digest + ext)
+
+    def find(self, digest: str) -> str | None:
+        folder = os.path.join(self.directory, digest[:2])
+        try:
+            for name in os.listdir(folder):
+                if name.startswith(digest):
+                    return os.path.join(folder, name)
+        except FileNotFoundError:
+            pass
+        return None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def put(self, url: str, ext: str) -> str:
+        """Télécharge `url` en flux (hash calculé au fil de l'eau) ; renvoie le sha256."""
+        async with self._sem:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT))
+
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = os.path.join(self.directory, f".tmp-{id(asyncio.current_task())}")
+            h = hashlib.sha256()
+            size = 0
+            f = await asyncio.to_thread(open, tmp, "wb")
+            try:
+                async with self._session.get(url) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > config.SCREEN_MAX_BYTES:
+                            raise ScreenTooLarge(url)
+                        h.update(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+                await asyncio.to_thread(f.close)
+
+                digest = h.hexdigest()
+                final = self.path(digest, ext)
+                on_disk = digest in self._known or await asyncio.to_thread(os.path.exists, final)
+                # Re-test après l'await : un doublon simultané a pu être écrit entre-temps
+                if on_disk or digest in self._known:
+                    self._known.add(digest)
+                    self.stats["dedup"] += 1
+                else:
+                    self._known.add(digest)
+                    await asyncio.to_thread(os.makedirs, os.path.dirname(final), exist_ok=True)
+                    await asyncio.to_thread(os.replace, tmp, final)
+                    self.stats["stored"] += 1
+                    self.stats["bytes"] += size
+                return digest
+            finally:
+                f.close()
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+
+CONTENT = ContentStore(os.path.join(config.DATA_DIR, "screens"))
+metrics.add_stats_collector("screens", "Archive des screens de résultat", lambda: [({}, CONTENT.stats)])
+
+
+class ScreenshotArchive:
+    """Archivage des screens de résultat d'un tournoi.
+
+    Chaque image postée dans un salon de match est copiée dans CONTENT et
+    son hash ajouté à Match.screenshots (journalisé avec le reste du match,
+    donc lié à Match.id et à winner_team_id). L'archivage tourne en tâche de
+    fond : on_message n'attend jamais un téléchargement.
+    """
+
+    def __init__(self, store: TournamentStore):
+        self.store = store
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, m: Match, attachments: List[discord.Attachment]):
+        for att in attachments:
+            if att.size > config.SCREEN_MAX_BYTES:
+                CONTENT.stats["too_large"] += 1
+                log.info("Screen ignoré (%d octets) pour le match %s", att.size, m.id)
+                continue
+            task = asyncio.get_running_loop().create_task(self._archive(m.id, att))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _archive(self, match_id: int, att: discord.Attachment):
+        ext = os.path.splitext(att.filename)[1].lower()[:8]
+        try:
+            digest = await CONTENT.put(att.url, ext)
+        except ScreenTooLarge:
+            CONTENT.stats["too_large"] += 1
+            return
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            CONTENT.stats["errors"] += 1
+            metrics.ERRORS.inc(source="screens")
+            log.warning("Archivage du screen %s (match %s) impossible : %s", att.id, match_id, e)
+            return
+
+        # Relu après le téléchargement : le match a pu changer entre-temps
+        m = self.store.match(match_id)
+        if m is not None and digest not in m.screenshots:
+            self.store.update_match(m, screenshots=m.screenshots + [digest])
+
+    def files(self, m: Match) -> Dict[str, str | None]:
+        """hash -> chemin local (None si le fichier a disparu)."""
+        return {digest: CONTENT.find(digest) for digest in m.screenshots}
@@ -28,13 +28,45 @@ class Match:
     status: str = "WAITING_AVAIL"  # WAITING_AVAIL / NEED_ORGA_VALIDATE / VALIDATED / DONE
     thumbs: Set[int] = field(default_factory=set)
     winner_team_id: Optional[int] = None
+    forfeit: bool = False  # victoire par forfait de l'adversaire
+    archived: bool = False  # salon archivé puis supprimé/verrouillé (round fermé)
+    bracket_node: Optional[int] = None  # nœud du tableau (1 = finale)
+    screenshots: List[str] = field(default_factory=list)  # sha256 des screens archivés
 
 @dataclass
 class EmbedsState:
-    players_msg_id: Optional[int] = None
-    teams_msg_id: Optional[int] = None
-    upcoming_msg_id: Optional[int] = None
-    history_msg_id: Optional[int] = None
+    # Pages de chaque embed : numéro de page -> message id
+    players_pages: Dict[int, int] = field(default_factory=dict)
+    teams_pages: Dict[int, int] = field(default_factory=dict)
+    upcoming_pages: Dict[int, int] = field(default_factory=dict)
+    history_pages: Dict[int, int] = field(default_factory=dict)
+
+@dataclass
+class BracketState:
+    # Tableau à élimination directe en tas : nœud 1 = finale, nœud k oppose
+    # les vainqueurs de 2k et 2k+1, feuilles = size..2*size-1
+    size: int = 0
+    leaves: List[Optional[int]] = field(default_factory=list)  # team id par feuille, None = exempt
+    base_round: int = 0  # numéro de round avant le premier tour du tableau
+    date_str: str = ""   # horaire du premier tour (les suivants sont à planifier)
+    time_str: str = ""
+
+@dataclass
+class SwissState:
+    # Système suisse : aucune élimination, appariement par score à chaque round
+    rounds: int = 0      # nombre de rounds prévus (0 = pas de système suisse)
+    base_round: int = 0  # numéro de round avant le premier round suisse
+    byes: Dict[int, int] = field(default_factory=dict)  # round -> team id exemptée (1 point)
+
+@dataclass
+class TournamentSettings:
+    guild_id: int
+    name: str
+    embeds_channel_id: int
+    match_category_id: int
+    # Organisation propre au tournoi : rôle admin (0 = aucun) et organisateurs
+    admin_role_id: int = 0
+    orga_ids: List[int] = field(default_factory=list)
 
 @dataclass
 class TournamentState:
@@ -49,11 +81,143 @@ class TournamentState:
     # Embed messages in the main embeds channel
     embeds: EmbedsState = field(default_factory=EmbedsState)
 
+    # Bracket (vide tant que /tournoi n'a pas été lancé)
+    bracket: BracketState = field(default_factory=BracketState)
+
+    # Système suisse (vide tant que /suisse n'a pas été lancé)
+    swiss: SwissState = field(default_factory=SwissState)
+
+    # Disponibilités (/dispo) : user id -> [(début, fin)] en timestamps, triés
+    availability: Dict[int, List[Tuple[int, int]]] = field(default_factory=dict)
+
     def reset(self):
         self.players.clear()
         self.teams.clear()
         self.matches.clear()
         self.current_round = 0
         self.embeds = EmbedsState()
+        self.bracket = BracketState()
+        self.swiss = SwissState()
+        self.availability.clear()
+
+
+# =================================================
+# Sérialisation (persistance)
+# =================================================
+def player_to_dict(p: Player) -> dict:
+    return {"user_id": p.user_id, "cls": p.cls}
+
+
+def team_to_dict(t: Team) -> dict:
+    return {
+        "id": t.id,
+        "players": [player_to_dict(p) for p in t.players],
+        "eliminated": t.eliminated,
+        "eliminated_round": t.eliminated_round,
+    }
+
+
+def team_from_dict(d: dict, players: Dict[int, Player]) -> Team:
+    # Les équipes partagent les objets Player du lobby quand ils existent
+    members = []
+    for pd in d["players"]:
+        p = players.get(pd["user_id"])
+        if p is None:
+            p = Player(user_id=pd["user_id"], cls=pd["cls"])
+        members.append(p)
+    return Team(
+        id=d["id"],
+        players=(members[0], members[1]),
+        eliminated=d.get("eliminated", False),
+        eliminated_round=d.get("eliminated_round"),
+    )
+
+
+def match_field_to_json(name: str, value):
+    if name == "thumbs":
+        return sorted(value)
+    return value
+
+
+def match_field_from_json(name: str, value):
+    if name == "thumbs":
+        return set(value)
+    return value
+
+
+def match_to_dict(m: Match) -> dict:
+    return {k: match_field_to_json(k, v) for k, v in vars(m).items()}
+
+
+def match_from_dict(d: dict) -> Match:
+    return Match(**{k: match_field_from_json(k, v) for k, v in d.items()})
+
+
+def embeds_fields_from_json(fields: dict) -> dict:
+    out = {}
+    for k, v in fields.items():
+        if k.endswith("_msg_id"):
+            # Ancien format : un seul message par embed
+            out[k.replace("_msg_id", "_pages")] = {0: v} if v else {}
+        else:
+            out[k] = {int(page): msg_id for page, msg_id in v.items()}
+    return out
+
+
+def bracket_to_dict(b: BracketState) -> dict:
+    return {
+        "size": b.size,
+        "leaves": list(b.leaves),
+        "base_round": b.base_round,
+        "date_str": b.date_str,
+        "time_str": b.time_str,
+    }
+
+
+def swiss_to_dict(s: SwissState) -> dict:
+    return {
+        "rounds": s.rounds,
+        "base_round": s.base_round,
+        "byes": {str(r): team_id for r, team_id in s.byes.items()},
+    }
+
+
+def swiss_from_dict(d: dict) -> SwissState:
+    return SwissState(
+        rounds=d.get("rounds", 0),
+        base_round=d.get("base_round", 0),
+        byes={int(r): team_id for r, team_id in d.get("byes", {}).items()},
+    )
+
+
+def availability_to_json(availability: Dict[int, List[Tuple[int, int]]]) -> dict:
+    return {str(uid): [list(w) for w in windows] for uid, windows in availability.items()}
+
+
+def availability_from_json(d: dict) -> Dict[int, List[Tuple[int, int]]]:
+    return {int(uid): [tuple(w) for w in windows] for uid, windows in d.items()}
+
+
+def state_to_dict(state: TournamentState) -> dict:
+    return {
+        "players": [player_to_dict(p) for p in state.players],
+        "teams": [team_to_dict(t) for t in state.teams],
+        "matches": [match_to_dict(m) for m in state.matches],
+        "current_round": state.current_round,
+        "embeds": dict(vars(state.embeds)),
+        "bracket": bracket_to_dict(state.bracket),
+        "swiss": swiss_to_dict(state.swiss),
+        "availability": availability_to_json(state.availability),
+    }
+
 
-STATE = TournamentState()
\ No newline at end of file
+def state_load_dict(state: TournamentState, d: dict):
+    state.players = [Player(**pd) for pd in d.get("players", [])]
+    by_id = {p.user_id: p for p in state.players}
+    state.teams = [team_from_dict(td, by_id) for td in d.get("teams", [])]
+    state.matches = [match_from_dict(md) for md in d.get("matches", [])]
+    state.current_round = d.get("current_round", 0)
+    state.embeds = EmbedsState(**embeds_fields_from_json(d.get("embeds", {})))
+    state.bracket = BracketState(**d.get("bracket", {}))
+    state.swiss = swiss_from_dict(d.get("swiss", {}))
+    state.availability = availability_from_json(d.get("availability", {}))
@@ -0,0 +1,287 @@
+import logging
+from typing import Callable, Dict, List, Set, Tuple
+
+import metrics
+from state import (
+    TournamentState, BracketState, SwissState, Player, Team, Match, bracket_to_dict,
+    swiss_to_dict, swiss_from_dict,
+    team_to_dict, team_from_dict, match_to_dict, match_from_dict,
+    match_field_to_json, match_field_from_json, embeds_fields_from_json,
+)
+
+log = logging.getLogger(__name__)
+
+# Écouteur de mutations : (op, payload JSON-sérialisable)
+Listener = Callable[[str, dict], None]
+
+
+class TournamentStore:
+    """Couche d'accès à TournamentState avec index (recherches O(1)).
+
+    Toute mutation de l'état doit passer par ce store afin de garder
+    les index cohérents. Chaque mutation est aussi publiée aux écouteurs
+    (journal de persistance, etc.) sous forme d'opération rejouable.
+    """
+
+    def __init__(self, state: TournamentState):
+        self.state = state
+
+        self.matches_by_id: Dict[int, Match] = {}
+        self.matches_by_channel: Dict[int, Match] = {}
+        self.matches_by_message: Dict[int, Match] = {}
+        self.teams_by_id: Dict[int, Team] = {}
+        self.players_by_id: Dict[int, Player] = {}
+        self.matches_by_round: Dict[int, List[Match]] = {}
+        self.matches_by_node: Dict[int, Match] = {}
+        self.validated_channels: Set[int] = set()
+        self._max_match_id = 0
+
+        self._listeners: List[Listener] = []
+        self._replaying = False
+
+        self.rebuild()
+
+    # -------------------------
+    # Écouteurs
+    # -------------------------
+    def subscribe(self, listener: Listener, first: bool = False):
+        # first : appelé avant les écouteurs déjà inscrits (journal de persistance)
+        if first:
+            self._listeners.insert(0, listener)
+        else:
+            self._listeners.append(listener)
+
+    def _emit(self, op: str, payload: dict):
+        if self._replaying:
+            return
+        # La mutation est déjà appliquée en mémoire : un écouteur en échec ne
+        # doit priver ni le journal ni les suivants de l'opération
+        for listener in self._listeners:
+            try:
+                listener(op, payload)
+            except Exception:
+                metrics.ERRORS.inc(source="store")
+                log.exception("Écouteur de mutation en échec (%s)", op)
+
+    def apply(self, op: str, payload: dict):
+        """Rejoue une opération publiée par _emit (sans la republier)."""
+        self._replaying = True
+        try:
+            if op == "player_add":
+                self.add_player(payload["user_id"])
+            elif op == "player_remove":
+                self.remove_player(payload["user_id"])
+            elif op == "player_class":
+                self.set_player_class(payload["user_id"], payload["cls"])
+            elif op == "teams_set":
+                self.set_teams([team_from_dict(d, self.players_by_id) for d in payload["teams"]])
+            elif op == "team_eliminate":
+                self.eliminate_team(payload["team_id"], payload["round_no"])
+            elif op == "match_add":
+                self.add_match(match_from_dict(payload["match"]))
+            elif op == "match_update":
+                m = self.match(payload["id"])
+                if m:
+                    fields = {k: match_field_from_json(k, v) for k, v in payload["fields"].items()}
+                    self.update_match(m, **fields)
+            elif op == "bracket_set":
+                self.set_bracket(BracketState(**payload["bracket"]))
+            elif op == "swiss_set":
+                self.set_swiss(swiss_from_dict(payload["swiss"]))
+            elif op == "availability_set":
+                self.set_availability(payload["user_id"], [tuple(w) for w in payload["windows"]])
+            elif op == "round_set":
+                self.set_round(payload["round_no"])
+            elif op == "embeds_update":
+                self.update_embeds(**embeds_fields_from_json(payload["fields"]))
+            elif op == "reset":
+                self.reset()
+            else:
+                raise ValueError(f"Opération inconnue : {op}")
+        finally:
+            self._replaying = False
+
+    # -------------------------
+    # Index
+    # -------------------------
+    def rebuild(self):
+        self.matches_by_id.clear()
+        self.matches_by_channel.clear()
+        self.matches_by_message.clear()
+        self.teams_by_id.clear()
+        self.players_by_id.clear()
+        self.matches_by_round.clear()
+        self.matches_by_node.clear()
+        self.validated_channels.clear()
+        self._max_match_id = 0
+
+        for p in self.state.players:
+            self.players_by_id[p.user_id] = p
+        for t in self.state.teams:
+            self.teams_by_id[t.id] = t
+            for p in t.players:
+                self.players_by_id.setdefault(p.user_id, p)
+        for m in self.state.matches:
+            self.matches_by_round.setdefault(m.round_no, []).append(m)
+            self._index_match(m)
+
+    def _index_match(self, m: Match):
+        self.matches_by_id[m.id] = m
+        self._max_match_id = max(self._max_match_id, m.id)
+        if m.bracket_node is not None:
+            self.matches_by_node[m.bracket_node] = m
+        if m.channel_id:
+            self.matches_by_channel[m.channel_id] = m
+        if m.created_message_id:
+            self.matches_by_message[m.created_message_id] = m
+        if m.status == "VALIDATED" and m.channel_id:
+            self.validated_channels.add(m.channel_id)
+
+    def _unindex_match(self, m: Match):
+        if self.matches_by_channel.get(m.channel_id) is m:
+            del self.matches_by_channel[m.channel_id]
+        if self.matches_by_message.get(m.created_message_id) is m:
+            del self.matches_by_message[m.created_message_id]
+        self.validated_channels.discard(m.channel_id)
+
+    # -------------------------
+    # Lectures
+    # -------------------------
+    def match(self, match_id: int) -> Match | None:
+        return self.matches_by_id.get(match_id)
+
+    def match_by_channel(self, channel_id: int) -> Match | None:
+        return self.matches_by_channel.get(channel_id)
+
+    def match_by_message(self, message_id: int) -> Match | None:
+        return self.matches_by_message.get(message_id)
+
+    def team(self, team_id: int) -> Team | None:
+        return self.teams_by_id.get(team_id)
+
+    def player(self, user_id: int) -> Player | None:
+        return self.players_by_id.get(user_id)
+
+    def is_validated_channel(self, channel_id: int) -> bool:
+        return channel_id in self.validated_channels
+
+    def match_by_node(self, node: int) -> Match | None:
+        return self.matches_by_node.get(node)
+
+    def round_matches(self, round_no: int) -> List[Match]:
+        return self.matches_by_round.get(round_no, [])
+
+    def round_open(self, round_no: int) -> bool:
+        return any(m.status != "DONE" for m in self.round_matches(round_no))
+
+    # -------------------------
+    # Lobby
+    # -------------------------
+    def add_player(self, user_id: int) -> Player | None:
+        if user_id in self.players_by_id:
+            return None
+        p = Player(user_id=user_id)
+        self.state.players.append(p)
+        self.players_by_id[user_id] = p
+        self._emit("player_add", {"user_id": user_id})
+        return p
+
+    def remove_player(self, user_id: int) -> bool:
+        p = self.players_by_id.pop(user_id, None)
+        if p is None:
+            return False
+        self.state.players = [x for x in self.state.players if x.user_id != user_id]
+        self._emit("player_remove", {"user_id": user_id})
+        return True
+
+    def set_player_class(self, user_id: int, cls: str) -> Player | None:
+        p = self.players_by_id.get(user_id)
+        if p is not None:
+            p.cls = cls
+            self._emit("player_class", {"user_id": user_id, "cls": cls})
+        return p
+
+    # -------------------------
+    # Équipes
+    # -------------------------
+    def set_teams(self, teams: List[Team]):
+        self.state.teams = teams
+        self.teams_by_id = {t.id: t for t in teams}
+        self._emit("teams_set", {"teams": [team_to_dict(t) for t in teams]})
+
+    def eliminate_team(self, team_id: int, round_no: int) -> Team | None:
+        t = self.teams_by_id.get(team_id)
+        if t is not None:
+            t.eliminated = True
+            t.eliminated_round = round_no
+            self._emit("team_eliminate", {"team_id": team_id, "round_no": round_no})
+        return t
+
+    # -------------------------
+    # Matchs
+    # -------------------------
+    def next_match_id(self) -> int:
+        # max + 1 : pas de collision même si un round a laissé des trous d'ids
+        return self._max_match_id + 1
+
+    def add_match(self, m: Match):
+        self.state.matches.append(m)
+        self.matches_by_round.setdefault(m.round_no, []).append(m)
+        self._index_match(m)
+        self._emit("match_add", {"match": match_to_dict(m)})
+
+    def update_match(self, m: Match, **fields):
+        self._unindex_match(m)
+        for k, v in fields.items():
+            setattr(m, k, v)
+        self._index_match(m)
+        self._emit("match_update", {
+            "id": m.id,
+            "fields": {k: match_field_to_json(k, v) for k, v in fields.items()},
+        })
+
+    def transition_match(self, m: Match, expected: Tuple[str, ...], **fields) -> bool:
+        """Compare-and-set sur le statut : n'applique `fields` que si le match
+        est encore dans un des statuts attendus. Synchrone, donc atomique
+        vis-à-vis des autres handlers de la boucle asyncio."""
+        if m.status not in expected:
+            return False
+        self.update_match(m, **fields)
+        return True
+
+    def set_bracket(self, bracket: BracketState):
+        self.state.bracket = bracket
+        self._emit("bracket_set", {"bracket": bracket_to_dict(bracket)})
+
+    def set_swiss(self, swiss: SwissState):
+        self.state.swiss = swiss
+        self._emit("swiss_set", {"swiss": swiss_to_dict(swiss)})
+
+    def set_availability(self, user_id: int, windows: List[Tuple[int, int]]):
+        # Liste vide : le joueur n'a plus de contrainte
+        if windows:
+            self.state.availability[user_id] = list(windows)
+        else:
+            self.state.availability.pop(user_id, None)
+        self._emit("availability_set", {"user_id": user_id, "windows": [list(w) for w in windows]})
+
+    def set_round(self, round_no: int):
+        self.state.current_round = round_no
+        self._emit("round_set", {"round_no": round_no})
+
+    # -------------------------
+    # Embeds
+    # -------------------------
+    def update_embeds(self, **fields):
+        for k, v in fields.items():
+            setattr(self.state.embeds, k, dict(v))
+        self._emit("embeds_update", {"fields": {k: dict(v) for k, v in fields.items()}})
+
+    # -------------------------
+    # Reset
+    # -------------------------
+    def reset(self):
+        self.state.reset()
+        self.rebuild()
+        self._emit("reset", {})
+
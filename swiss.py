@@ -0,0 +1,267 @@
+import logging
+import math
+import random
+from dataclasses import replace
+from typing import Callable, Dict, List, Set, Tuple
+
+import discord
+import numpy as np
+
+from provisioning import PairJob, ProgressCallback, RoundProvisioner
+from resolver import RESOLVER
+from state import Match, SwissState, TournamentSettings
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Poids d'un écart de score (au carré) : prioritaire sur la distance de classement
+SCORE_WEIGHT = 1000.0
+# Coût d'une revanche : seulement si aucune autre paire n'est possible dans la bande
+REMATCH_PENALTY = 1e9
+# Largeur initiale puis maximale de la bande (adversaires possibles parmi les suivants)
+BAND = 6
+MAX_BAND = 12
+
+Standing = Tuple[int, float, float]  # (team id, points, Buchholz)
+
+
+def default_rounds(n_teams: int) -> int:
+    return max(1, math.ceil(math.log2(max(2, n_teams))))
+
+
+def pair_banded(
+    points: List[float], met: List[Set[int]], band: int = BAND
+) -> Tuple[List[Tuple[int, int]], int]:
+    """Couplage parfait de coût minimal entre positions d'un classement trié.
+
+    Chaque position i ne peut affronter que i+1 … i+band-1 : la
+    programmation dynamique porte sur (position, masque des `band`
+    positions suivantes déjà prises), vectorisée sur les masques. Coût
+    d'une paire : écart de points au carré, revanche (REMATCH_PENALTY),
+    puis distance dans le classement. Renvoie (paires, nombre de revanches).
+    """
+    n = len(points)
+    size = 1 << band
+    masks = np.arange(size)
+    bit0 = (masks & 1).astype(bool)
+
+    dp_next = np.full(size, np.inf)
+    dp_next[0] = 0.0
+    choice = np.zeros((n, size), dtype=np.int8)
+
+    for i in range(n - 1, -1, -1):
+        # Position déjà prise : on passe à la suivante
+        dp = np.where(bit0, dp_next[masks >> 1], np.inf)
+        best = np.zeros(size, dtype=np.int8)
+        for k in range(1, band):
+            j = i + k
+            if j >= n:
+                break
+            cost = SCORE_WEIGHT * (points[i] - points[j]) ** 2 + k
+            if j in met[i]:
+                cost += REMATCH_PENALTY
+            ok = ~bit0 & (((masks >> k) & 1) == 0)
+            cand = dp_next[(masks | (1 << k)) >> 1] + cost
+            better = ok & (cand < dp)
+            dp = np.where(better, cand, dp)
+            best = np.where(better, k, best)
+        choice[i] = best
+        dp_next = dp
+
+    if not np.isfinite(dp_next[0]):
+        raise ValueError("Nombre de positions impair")
+
+    pairs = []
+    rematches = 0
+    mask = 0
+    for i in range(n):
+        k = int(choice[i][mask])
+        if k:
+            pairs.append((i, i + k))
+            rematches += (i + k) in met[i]
+            mask |= 1 << k
+        mask >>= 1
+    return pairs, rematches
+
+
+class SwissEngine:
+    """Système suisse d'un tournoi : classement incrémental et appariements.
+
+    Points (victoire ou exemption = 1) et Buchholz (somme des points des
+    adversaires rencontrés) sont mis à jour à chaque résultat, sans
+    recalcul global. Les adversaires déjà appariés sont mémorisés pour
+    éviter les revanches.
+    """
+
+    def __init__(self, store: TournamentStore, settings: TournamentSettings):
+        self.store = store
+        self.settings = settings
+        self.view_factory: Callable[[int], discord.ui.View] | None = None
+        self.rating: Callable[[int], float] = lambda team_id: 0.0
+
+        self.points: Dict[int, float] = {}
+        self.buchholz: Dict[int, float] = {}
+        self._opponents: Dict[int, List[int]] = {}  # adversaires des matchs décidés
+        self._met: Dict[int, Set[int]] = {}         # adversaires appariés (même non joués)
+        self._failed: List[PairJob] = []
+
+        store.subscribe(self._on_mutation)
+        self.rebuild()
+
+    # -------------------------
+    # Classement
+    # -------------------------
+    @property
+    def swiss(self) -> SwissState:
+        return self.store.state.swiss
+
+    @property
+    def active(self) -> bool:
+        return self.swiss.rounds > 0
+
+    def _in_swiss(self, m: Match) -> bool:
+        return self.active and m.round_no > self.swiss.base_round
+
+    def rebuild(self):
+        self.points.clear()
+        self.buchholz.clear()
+        self._opponents.clear()
+        self._met.clear()
+        if not self.active:
+            return
+        for team in self.store.state.teams:
+            self.points[team.id] = 0.0
+            self.buchholz[team.id] = 0.0
+        for team_id in self.swiss.byes.values():
+            self._win(team_id)
+        teams = self.store.teams_by_id
+        pending = {job.match_id for job in self._failed}
+        for m in self.store.state.matches:
+            if not self._in_swiss(m):
+                continue
+            self._pair(m)
+            if m.status == "DONE":
+                self._decide(m)
+            elif not m.created_message_id and m.id not in pending:
+                # Match enregistré mais message jamais posté (échec, redémarrage) :
+                # repris par le prochain /suisse plutôt que de bloquer le round
+                self._failed.append(PairJob(
+                    match_id=m.id, team1=teams[m.team1_id], team2=teams[m.team2_id], match=m,
+                ))
+
+    def _pair(self, m: Match):
+        self._met.setdefault(m.team1_id, set()).add(m.team2_id)
+        self._met.setdefault(m.team2_id, set()).add(m.team1_id)
+
+    def _win(self, team_id: int):
+        self.points[team_id] = self.points.get(team_id, 0.0) + 1
+        for o in self._opponents.get(team_id, ()):
+            self.buchholz[o] = self.buchholz.get(o, 0.0) + 1
+
+    def _decide(self, m: Match):
+        a, b = m.team1_id, m.team2_id
+        self._opponents.setdefault(a, []).append(b)
+        self._opponents.setdefault(b, []).append(a)
+        self.buchholz[a] = self.buchholz.get(a, 0.0) + self.points.get(b, 0.0)
+        self.buchholz[b] = self.buchholz.get(b, 0.0) + self.points.get(a, 0.0)
+        if m.winner_team_id is not None:
+            self._win(m.winner_team_id)
+
+    def _on_mutation(self, op: str, payload: dict):
+        if op == "match_add":
+            m = self.store.match(payload["match"]["id"])
+            if m is not None and self._in_swiss(m):
+                self._pair(m)
+        elif op == "match_update" and payload["fields"].get("status") == "DONE":
+            m = self.store.match(payload["id"])
+            if m is not None and self._in_swiss(m):
+                self._decide(m)
+        elif op in ("swiss_set", "teams_set", "reset"):
+            if op == "reset":
+                self._failed.clear()
+            self.rebuild()
+
+    def standings(self) -> List[Standing]:
+        rows = [(tid, pts, self.buchholz.get(tid, 0.0)) for tid, pts in self.points.items()]
+        rows.sort(key=lambda r: (-r[1], -r[2], r[0]))
+        return rows
+
+    def rounds_played(self) -> int:
+        return self.store.state.current_round - self.swiss.base_round
+
+    @property
+    def retry_pending(self) -> bool:
+        """Créations du round courant en échec, à relancer avant le round suivant."""
+        return bool(self._failed)
+
+    def finished(self) -> bool:
+        return (
+            self.active
+            and self.rounds_played() >= self.swiss.rounds
+            and not self._failed
+            and not self.store.round_open(self.store.state.current_round)
+        )
+
+    # -------------------------
+    # Appariement
+    # -------------------------
+    def pair_next(self, rng: random.Random | None = None) -> Tuple[List[Tuple[int, int]], int | None, int]:
+        """Paires du prochain round, équipe exemptée, nombre de revanches."""
+        rng = rng or random.Random()
+        teams = list(self.points)
+        rng.shuffle(teams)
+        # Tri stable : points, Buchholz, puis Elo ; le hasard départage le reste
+        teams.sort(key=lambda tid: (-self.points[tid], -self.buchholz.get(tid, 0.0), -self.rating(tid)))
+
+        bye = None
+        if len(teams) % 2:
+            # Exemption : équipe la moins bien classée qui n'en a pas déjà eu
+            had_bye = set(self.swiss.byes.values())
+            bye = next((tid for tid in reversed(teams) if tid not in had_bye), teams[-1])
+            teams.remove(bye)
+
+        points = [self.points[tid] for tid in teams]
+        position = {tid: i for i, tid in enumerate(teams)}
+        met = [
+            {position[o] for o in self._met.get(tid, ()) if o in position}
+            for tid in teams
+        ]
+        band = BAND
+        while True:
+            pairs, rematches = pair_banded(points, met, min(band, max(2, len(teams))))
+            if not rematches or band >= MAX_BAND:
+                break
+            band += 2
+        return [(teams[i], teams[j]) for i, j in pairs], bye, rematches
+
+    # -------------------------
+    # Rounds
+    # -------------------------
+    async def next_round(
+        self, date_str: str, time_str: str, progress: ProgressCallback | None = None
+    ) -> Tuple[int, List[PairJob], int | None, int]:
+        """Crée le round suivant (ou relance les créations en échec du round
+        courant). À appeler sous le verrou du tournoi ; renvoie
+        (matchs créés, jobs en échec, équipe exemptée, revanches)."""
+        category = await RESOLVER.channel(self.settings.match_category_id)
+        round_no = self.store.state.current_round
+        bye = None
+        rematches = 0
+
+        pairs: List[Tuple[int, int]] = []
+        if not self._failed:
+            pairs, bye, rematches = self.pair_next()
+            round_no += 1
+            self.store.set_round(round_no)
+            if bye is not None:
+                self.store.set_swiss(replace(self.swiss, byes={**self.swiss.byes, round_no: bye}))
+
+        provisioner = RoundProvisioner(
+            self.store, category.guild, self.settings, round_no, date_str, time_str, self.view_factory,
+        )
+        teams = self.store.teams_by_id
+        jobs = self._failed or provisioner.jobs_for([(teams[a], teams[b]) for a, b in pairs])
+        self._failed = await provisioner.run(jobs, progress)
+        created = sum(j.done for j in jobs)
+        log.info("Suisse round %s : %d match(s) créé(s), %d revanche(s)", round_no, created, rematches)
+        return created, self._failed, bye, rematches
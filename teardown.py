@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List
+
+import discord
+
+import config
+import metrics
+import outbound
+from outbound import OUTBOUND
+from resolver import RESOLVER
+from state import Match, match_to_dict
+from store import TournamentStore
+
+log = logging.getLogger(__name__)
+
+# Salons traités en parallèle à la fermeture d'un round
+TEARDOWN_CONCURRENCY = 4
+# Messages relus par salon pour l'archive
+ARCHIVE_SCAN_LIMIT = 200
+# Longueur maximale conservée d'un message texte
+ARCHIVE_TEXT_LIMIT = 500
+
+
+def _archive_message(msg: discord.Message) -> dict | None:
+    """Messages clés : screens (pièces jointes) et messages des joueurs."""
+    if msg.author.bot and not msg.attachments:
+        return None
+    entry = {
+        "id": msg.id,
+        "author_id": msg.author.id,
+        "at": msg.created_at.isoformat(),
+    }
+    if msg.content:
+        entry["content"] = msg.content[:ARCHIVE_TEXT_LIMIT]
+    if msg.attachments:
+        entry["attachments"] = [a.url for a in msg.attachments]
+    return entry
+
+
+class RoundTeardown:
+    """Fermeture d'un round : archive puis suppression (ou verrouillage) des salons.
+
+    Déclenchée quand tous les matchs du round courant sont DONE, après
+    config.ROUND_TEARDOWN_DELAY pour laisser les joueurs lire le résultat.
+    Chaque match archivé est marqué `archived` : une fermeture interrompue
+    reprend au démarrage suivant sans refaire les salons déjà traités.
+    """
+
+    def __init__(self, store: TournamentStore, directory: str):
+        self.store = store
+        self.directory = os.path.join(directory, "archives")
+        self.bot: discord.Client | None = None
+
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._now = asyncio.Event()
+        self._sem = asyncio.Semaphore(TEARDOWN_CONCURRENCY)
+
+        self.stats = {"rounds": 0, "archived": 0, "deleted": 0, "locked": 0, "errors": 0}
+
+        store.subscribe(self._on_mutation)
+
+    # -------------------------
+    # Déclenchement
+    # -------------------------
+    def start(self, bot: discord.Client):
+        self.bot = bot
+        # Reprise des rounds terminés mais pas encore nettoyés
+        for round_no in sorted(self.store.matches_by_round):
+            if self._pending(round_no):
+                self.schedule(round_no, delay=0)
+
+    def _pending(self, round_no: int) -> List[Match]:
+        matches = self.store.round_matches(round_no)
+        if not matches or self.store.round_open(round_no):
+            return []
+        return [m for m in matches if not m.archived]
+
+    def _on_mutation(self, op: str, payload: dict):
+        if op == "match_update" and payload["fields"].get("status") == "DONE":
+            m = self.store.match(payload["id"])
+            if m and self._pending(m.round_no):
+                self.schedule(m.round_no)
+
+    def schedule(self, round_no: int, delay: float | None = None):
+        if self.bot is None or round_no in self._tasks:
+            return
+        if delay is None:
+            delay = config.ROUND_TEARDOWN_DELAY
+        self._tasks[round_no] = asyncio.get_running_loop().create_task(self._run(round_no, delay))
+
+    async def flush(self):
+        """Ferme sans attendre les rounds programmés (avant un nouveau round)."""
+        if not self._tasks:
+            return
+        self._now.set()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._now.clear()
+
+    # -------------------------
+    # Fermeture
+    # -------------------------
+    async def _run(self, round_no: int, delay: float):
+        try:
+            if delay:
+                try:
+                    await asyncio.wait_for(self._now.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self.close_round(round_no)
+        except Exception:
+            self.stats["errors"] += 1
+            metrics.ERRORS.inc(source="teardown")
+            log.exception("Fermeture du round %s en échec", round_no)
+        finally:
+            self._tasks.pop(round_no, None)
+
+    async def close_round(self, round_no: int):
+        matches = self._pending(round_no)
+        if not matches:
+            return
+        records = await asyncio.gather(*(self._close_match(m) for m in matches))
+        records = [r for r in records if r is not None]
+        if records:
+            await asyncio.to_thread(self._write_archive, round_no, records)
+            for m, _ in records:
+                self.store.update_match(m, archived=True)
+        self.stats["rounds"] += 1
+        log.info("Round %s fermé : %d/%d salons traités", round_no, len(records), len(matches))
+
+    async def _close_match(self, m: Match) -> tuple | None:
+        async with self._sem:
+            try:
+                ch = await RESOLVER.channel(m.channel_id)
+            except discord.NotFound:
+                # Salon déjà supprimé à la main : seul le match est archivé
+                return m, {"match": match_to_dict(m), "messages": []}
+
+            try:
+                messages = [
+                    entry async for entry in self._scan(ch) if entry is not None
+                ]
+                record = {"match": match_to_dict(m), "messages": messages}
+
+                if config.ROUND_TEARDOWN == "lock":
+                    await OUTBOUND.submit(
+                        outbound.BACKGROUND, ("edit_channel", ch.id),
+                        lambda: ch.edit(overwrites=self._locked_overwrites(ch)),
+                    )
+                    self.stats["locked"] += 1
+                else:
+                    await OUTBOUND.submit(
+                        outbound.BACKGROUND, ("delete_channel", ch.guild.id),
+                        lambda: ch.delete(reason=f"Round {m.round_no} terminé"),
+                    )
+                    RESOLVER.invalidate(ch.id)
+                    self.stats["deleted"] += 1
+            except discord.HTTPException as e:
+                self.stats["errors"] += 1
+                metrics.ERRORS.inc(source="teardown")
+                log.warning("Fermeture du salon %s impossible : %s %s", m.channel_id, e.status, e.text)
+                return None
+
+            self.stats["archived"] += 1
+            return m, record
+
+    async def _scan(self, ch: discord.TextChannel):
+        async for msg in ch.history(limit=ARCHIVE_SCAN_LIMIT, oldest_first=True):
+            yield _archive_message(msg)
+
+    @staticmethod
+    def _locked_overwrites(ch: discord.TextChannel) -> dict:
+        overwrites = dict(ch.overwrites)
+        for target, ow in overwrites.items():
+            if ow.send_messages:
+                ow.send_messages = False
+        return overwrites
+
+    def _write_archive(self, round_no: int, records: List[tuple]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"round-{round_no}.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            for _, record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
@@ -0,0 +1,109 @@
+"""Fixtures communes : dossier de données jetable, boucle asyncio partagée
+et doublures discord.py minimales (aucun accès réseau)."""
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+
+# Avant l'import de config : données dans un dossier jetable
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="tests_tournoi_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from resolver import RESOLVER
+from state import Player, Team, TournamentSettings, TournamentState
+from store import TournamentStore
+
+_ids = itertools.count(10**15)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    # Une seule boucle : OUTBOUND et les Event des singletons y restent liés
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    return loop.run_until_complete
+
+
+def make_store(n_teams: int) -> TournamentStore:
+    store = TournamentStore(TournamentState())
+    store.set_teams([
+        Team(id=i, players=(Player(user_id=2 * i, cls="iop"), Player(user_id=2 * i + 1, cls="cra")))
+        for i in range(1, n_teams + 1)
+    ])
+    return store
+
+
+# =================================================
+# Doublures discord.py
+# =================================================
+class FakeMessage:
+    def __init__(self, channel):
+        self.id = next(_ids)
+        self.channel = channel
+
+    async def add_reaction(self, emoji):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, client, guild):
+        self.id = next(_ids)
+        self.guild = guild
+        self.messages = []
+        client.channels[self.id] = self
+
+    async def send(self, content=None, *, embed=None, view=None):
+        msg = FakeMessage(self)
+        self.messages.append(msg)
+        return msg
+
+
+class FakeGuild:
+    def __init__(self, client):
+        self.id = next(_ids)
+        self.client = client
+        self.default_role = object()
+
+    def get_role(self, role_id):
+        return None
+
+    def get_channel(self, channel_id):
+        return self.client.channels.get(channel_id)
+
+    async def create_text_channel(self, name, category=None, overwrites=None):
+        return FakeChannel(self.client, self)
+
+
+class FakeClient:
+    def __init__(self):
+        self.channels = {}
+        self.guild = FakeGuild(self)
+        self.category = FakeChannel(self, self.guild)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        return self.channels[channel_id]
+
+
+@pytest.fixture
+def client():
+    client = FakeClient()
+    RESOLVER.attach(client)
+    return client
+
+
+@pytest.fixture
+def settings(client):
+    return TournamentSettings(
+        guild_id=client.guild.id, name="test", embeds_channel_id=0, match_category_id=client.category.id,
+    )
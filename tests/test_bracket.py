@@ -0,0 +1,98 @@
+import asyncio
+
+from bracket import BracketEngine, build_bracket, node_round
+from state import Match
+
+from conftest import make_store
+
+
+def _engine(store, settings) -> BracketEngine:
+    engine = BracketEngine(store, asyncio.Lock(), settings)
+    engine.view_factory = lambda match_id: None
+    return engine
+
+
+def _finish(store, node: int, winner: int):
+    m = store.match_by_node(node)
+    store.update_match(m, status="DONE", winner_team_id=winner)
+
+
+def test_byes_go_to_top_seeds():
+    bracket = build_bracket([1, 2, 3, 4, 5], base_round=0, date_str="01/01", time_str="21h00")
+    assert bracket.size == 8
+    assert bracket.leaves == [1, None, 4, 5, 2, None, 3, None]
+    # Deux exempts ne se rencontrent jamais au premier tour
+    for i in range(0, bracket.size, 2):
+        assert bracket.leaves[i] is not None or bracket.leaves[i + 1] is not None
+
+
+def test_advance_with_byes(run, settings):
+    store = make_store(5)
+    store.set_bracket(build_bracket([1, 2, 3, 4, 5], base_round=0, date_str="01/01", time_str="21h00"))
+    engine = _engine(store, settings)
+
+    # 4-5 au premier tour ; 2-3, tous deux exemptés, dès le deuxième tour
+    assert [(n, a, b) for n, a, b in engine.ready_nodes()] == [(3, 2, 3), (5, 4, 5)]
+    created, failed = run(engine.advance())
+    assert (created, failed) == (2, [])
+
+    first, second = store.match_by_node(5), store.match_by_node(3)
+    assert (first.round_no, first.date_str, first.time_str) == (1, "01/01", "21h00")
+    # Tours suivants sans horaire : /planifier
+    assert (second.round_no, second.date_str) == (2, "")
+    assert first.created_message_id and second.created_message_id
+    assert store.state.current_round == 2
+    assert engine.ready_nodes() == []
+    assert run(engine.advance()) == (0, [])
+
+    _finish(store, 5, 4)
+    assert engine.ready_nodes() == [(2, 1, 4)]
+    run(engine.advance())
+    assert node_round(2, 8) == store.match_by_node(2).round_no == 2
+
+    _finish(store, 2, 1)
+    assert engine.ready_nodes() == []  # l'autre demi-finale n'est pas jouée
+    _finish(store, 3, 3)
+    run(engine.advance())
+    final = store.match_by_node(1)
+    assert (final.team1_id, final.team2_id, final.round_no, final.date_str) == (1, 3, 3, "")
+    assert engine.champion() is None
+
+    _finish(store, 1, 3)
+    assert engine.champion() == 3
+    assert len({m.id for m in store.state.matches}) == 4
+
+
+def test_incremental_matches_rebuild(run, settings):
+    store = make_store(13)
+    store.set_bracket(build_bracket(list(range(1, 14)), base_round=0, date_str="01/01", time_str="21h00"))
+    engine = _engine(store, settings)
+    while engine.champion() is None:
+        run(engine.advance())
+        for m in store.state.matches:
+            if m.status != "DONE":
+                _finish(store, m.bracket_node, min(m.team1_id, m.team2_id))
+        fresh = _engine(store, settings)
+        assert fresh._occ == engine._occ
+        assert fresh.ready_nodes() == engine.ready_nodes()
+    assert engine.champion() == 1
+
+
+def test_unposted_match_resumes_after_restart(run, client, settings):
+    store = make_store(2)
+    store.set_bracket(build_bracket([1, 2], base_round=0, date_str="01/01", time_str="21h00"))
+    channel = run(client.guild.create_text_channel("match"))
+    # Match enregistré, message jamais posté (arrêt pendant la création)
+    store.add_match(Match(id=1, round_no=1, team1_id=1, team2_id=2, date_str="01/01", time_str="21h00",
+                          channel_id=channel.id, bracket_node=1))
+
+    engine = _engine(store, settings)
+    assert list(engine._failed) == [1]
+    assert engine.ready_nodes() == []
+
+    n_channels = len(client.channels)
+    created, failed = run(engine.advance())
+    assert (created, failed) == (1, [])
+    assert len(client.channels) == n_channels  # salon existant réutilisé
+    assert len(store.state.matches) == 1
+    assert store.match(1).created_message_id == channel.messages[-1].id
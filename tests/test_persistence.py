@@ -0,0 +1,144 @@
+import asyncio
+import json
+import time
+
+import persistence
+from persistence import Journal
+from state import BracketState, Match, SwissState, TournamentState, state_to_dict
+from store import TournamentStore
+
+from conftest import make_store
+
+
+def _mutate(store: TournamentStore):
+    store.set_teams(make_store(4).state.teams)
+    for uid in range(100, 108):
+        store.add_player(uid)
+    store.set_player_class(100, "iop")
+    store.remove_player(107)
+    store.set_bracket(BracketState(size=4, leaves=[1, 2, 3, None], base_round=0, date_str="01/01", time_str="21h00"))
+    store.set_swiss(SwissState(rounds=3, base_round=0, byes={1: 4}))
+    store.set_round(1)
+    for i, (a, b) in enumerate([(1, 2), (3, 4)], start=1):
+        store.add_match(Match(id=i, round_no=1, team1_id=a, team2_id=b, date_str="01/01", time_str="21h00",
+                              channel_id=1000 + i, bracket_node=2 + i))
+    m = store.match(1)
+    store.update_match(m, status="VALIDATED", thumbs={2, 4}, map_name="iop")
+    store.update_match(m, status="DONE", winner_team_id=1, screenshots=["ab" * 32])
+    store.eliminate_team(2, 1)
+    store.set_availability(2, [(0, 3600), (7200, 10800)])
+    store.update_embeds(teams_pages={0: 55, 1: 56})
+
+
+def _reload(directory) -> TournamentStore:
+    store = TournamentStore(TournamentState())
+    Journal(store, directory).load()
+    return store
+
+
+def _journaled(directory) -> tuple[TournamentStore, Journal]:
+    store = TournamentStore(TournamentState())
+    journal = Journal(store, directory)
+    journal.load()
+    return store, journal
+
+
+def test_replay_matches_live_state(run, tmp_path):
+    store, journal = _journaled(str(tmp_path))
+
+    async def scenario():
+        _mutate(store)
+        await journal.close()
+
+    run(scenario())
+
+    replayed = _reload(str(tmp_path))
+    assert state_to_dict(replayed.state) == state_to_dict(store.state)
+    assert replayed.match(1).thumbs == {2, 4}
+    assert replayed.is_validated_channel(1001) is False
+    assert replayed.next_match_id() == 3
+
+
+def test_replay_after_compaction(run, tmp_path, monkeypatch):
+    # Snapshot + fin de journal : même état qu'en mémoire
+    monkeypatch.setattr(persistence, "COMPACT_EVERY", 5)
+    store, journal = _journaled(str(tmp_path))
+
+    async def scenario():
+        _mutate(store)
+        await journal.flush()
+        store.add_player(200)
+        store.set_round(2)
+        await journal.close()
+
+    run(scenario())
+
+    assert (tmp_path / "snapshot.json").exists()
+    replayed = _reload(str(tmp_path))
+    assert state_to_dict(replayed.state) == state_to_dict(store.state)
+
+
+def test_truncated_last_line_is_ignored(run, tmp_path):
+    store, journal = _journaled(str(tmp_path))
+
+    async def scenario():
+        store.add_player(1)
+        store.add_player(2)
+        await journal.close()
+
+    run(scenario())
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"seq": 99, "op": "player_add", "da')
+
+    replayed = _reload(str(tmp_path))
+    assert [p.user_id for p in replayed.state.players] == [1, 2]
+
+
+def test_close_waits_for_running_write(run, tmp_path, monkeypatch):
+    store, journal = _journaled(str(tmp_path))
+    append = journal._append
+    calls = []
+
+    def slow_append(lines):
+        calls.append(len(lines))
+        if len(calls) == 1:
+            time.sleep(0.3)
+        append(lines)
+
+    monkeypatch.setattr(journal, "_append", slow_append)
+
+    async def scenario():
+        for uid in range(10):
+            store.add_player(uid)
+        await asyncio.sleep(persistence.FLUSH_DELAY + 0.05)  # écriture en cours dans son thread
+        for uid in range(10, 20):
+            store.add_player(uid)
+        await journal.close()
+
+    run(scenario())
+    with open(tmp_path / "journal.jsonl", encoding="utf-8") as f:
+        seqs = [json.loads(line)["seq"] for line in f]
+    assert seqs == list(range(1, 21))
+    assert [p.user_id for p in _reload(str(tmp_path)).state.players] == list(range(20))
+
+
+def test_failing_listener_does_not_lose_mutation(run, tmp_path):
+    store = TournamentStore(TournamentState())
+    seen = []
+
+    def broken(op, payload):
+        raise RuntimeError(op)
+
+    # Écouteurs inscrits avant le chargement du journal (moteurs, embeds…)
+    store.subscribe(broken)
+    store.subscribe(lambda op, payload: seen.append(op))
+    journal = Journal(store, str(tmp_path))
+    journal.load()
+
+    async def scenario():
+        store.add_player(1)
+        await journal.close()
+
+    run(scenario())
+    assert seen == ["player_add"]
+    assert [p.user_id for p in _reload(str(tmp_path)).state.players] == [1]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import ratings
+from state import Player, Team
+
+
+def _columns(rng, n_matches: int, n_players: int) -> dict:
+    players = rng.integers(1, n_players + 1, size=(4, n_matches))
+    return {
+        "run": rng.integers(1, 4, size=n_matches),
+        "round": rng.integers(1, 4, size=n_matches),
+        "w_p1": players[0], "w_p2": players[1], "l_p1": players[2], "l_p2": players[3],
+    }
+
+
+@pytest.mark.parametrize("n_players", [12, 400])
+def test_recompute_matches_incremental(run, tmp_path, n_players):
+    # Peu de joueurs : un même joueur revient souvent dans un lot (run, round)
+    cols = _columns(np.random.default_rng(n_players), 60, n_players)
+    engine = ratings.RatingEngine(str(tmp_path / "ratings.json"))
+
+    async def incremental():
+        for i in np.lexsort((cols["round"], cols["run"])):
+            engine.record(
+                Team(0, (Player(int(cols["w_p1"][i])), Player(int(cols["w_p2"][i])))),
+                Team(1, (Player(int(cols["l_p1"][i])), Player(int(cols["l_p2"][i])))),
+            )
+        await engine.close()
+
+    run(incremental())
+    table = ratings.recompute(cols)
+    assert table.keys() == engine._table.keys()
+    for uid, (rating, games) in engine._table.items():
+        assert table[uid][1] == games
+        assert table[uid][0] == pytest.approx(rating, abs=1e-9)
+
+
+def test_recompute_empty():
+    assert ratings.recompute({name: np.empty(0, dtype=np.int64) for name in ("run", "round")}) == {}
@@ -0,0 +1,53 @@
+import types
+
+import pytest
+
+import refresh
+from refresh import MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY, EmbedRefresher
+
+from conftest import make_store
+
+
+def test_failing_embed_backs_off_then_gives_up(run, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(refresh, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+    refresher = EmbedRefresher(make_store(2), channel_id=1)
+    calls = []
+    results = {"teams": False}
+
+    async def refresh_one(channel_id, kind):
+        calls.append((clock[0], kind))
+        return results.get(kind, True)
+
+    monkeypatch.setattr(refresher, "_refresh_one", refresh_one)
+    refresher.mark_dirty("teams")
+    refresher.bot = object()
+
+    def flush_at(t):
+        clock[0] = t
+        run(refresher.flush())
+
+    # Délais doublés à chaque échec, sans appel entre deux échéances
+    t, delay = 0.0, RETRY_BASE_DELAY
+    for _ in range(MAX_RETRIES - 1):
+        flush_at(t)
+        flush_at(t + delay - 0.1)
+        assert refresher._next_retry() == pytest.approx(0.1)
+        t, delay = t + delay, min(RETRY_MAX_DELAY, delay * 2)
+    flush_at(t)
+    assert [kind for _, kind in calls] == ["teams"] * MAX_RETRIES
+    assert [c for c, _ in calls] == [RETRY_BASE_DELAY * (2 ** i - 1) for i in range(MAX_RETRIES)]
+
+    # Abandon : plus d'essai sans nouvelle mutation
+    assert "teams" not in refresher._dirty
+    flush_at(t + 10 * RETRY_MAX_DELAY)
+    assert len(calls) == MAX_RETRIES
+
+    # Les autres embeds ne sont pas retardés ; un succès remet à zéro
+    refresher.bot = None
+    refresher.mark_dirty("history", "teams")
+    refresher.bot = object()
+    results["teams"] = True
+    flush_at(t + 10 * RETRY_MAX_DELAY + 1)
+    assert [kind for _, kind in calls[MAX_RETRIES:]] == ["teams", "history"]
+    assert refresher._failures == {} and refresher._retry_at == {} and not refresher._dirty
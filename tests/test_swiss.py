@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from bench_swiss import play_round
+from state import Match, SwissState
+from swiss import SwissEngine, default_rounds, pair_banded
+
+from conftest import make_store
+
+
+def test_pair_banded_avoids_rematch():
+    # 0-1 déjà joué : le couplage le moins coûteux sans revanche est 0-2 / 1-3
+    points = [2.0, 2.0, 2.0, 2.0]
+    met = [{1}, {0}, set(), set()]
+    pairs, rematches = pair_banded(points, met, band=4)
+    assert rematches == 0
+    assert sorted(pairs) == [(0, 2), (1, 3)]
+
+
+def test_pair_banded_prefers_equal_points():
+    points = [3.0, 2.0, 2.0, 1.0]
+    pairs, rematches = pair_banded(points, [set()] * 4, band=4)
+    assert rematches == 0
+    assert sorted(pairs) == [(0, 1), (2, 3)]
+
+
+@pytest.mark.parametrize("n_teams", [8, 13, 32, 101])
+def test_tournament_without_rematches(n_teams, settings):
+    rng = random.Random(n_teams)
+    store = make_store(n_teams)
+    engine = SwissEngine(store, settings)
+    store.set_swiss(SwissState(rounds=default_rounds(n_teams)))
+
+    played = set()
+    byes = []
+    for _ in range(store.state.swiss.rounds):
+        _, pairs, bye, rematches = play_round(store, engine, rng)
+        assert rematches == 0
+        seen = [t for pair in pairs for t in pair] + ([bye] if bye is not None else [])
+        assert sorted(seen) == list(range(1, n_teams + 1))
+        for a, b in pairs:
+            assert frozenset((a, b)) not in played
+            played.add(frozenset((a, b)))
+        if bye is not None:
+            byes.append(bye)
+
+    assert (bye is not None) == bool(n_teams % 2)
+    assert len(byes) == len(set(byes))
+    assert engine.finished()
+
+    # Classement incrémental == recalcul complet
+    incremental = engine.standings()
+    engine.rebuild()
+    assert engine.standings() == incremental
+    assert sum(points for _, points, _ in incremental) == len(played) + len(byes)
+
+
+def test_next_round_creates_matches(run, settings):
+    store = make_store(5)
+    engine = SwissEngine(store, settings)
+    engine.view_factory = lambda match_id: None
+    store.set_swiss(SwissState(rounds=3))
+
+    created, failed, bye, rematches = run(engine.next_round("01/01", "21h00"))
+    assert (created, failed, rematches) == (2, [], 0)
+    assert store.state.swiss.byes == {1: bye}
+    assert engine.points[bye] == 1.0
+    matches = store.round_matches(1)
+    assert all(m.created_message_id and m.date_str == "01/01" for m in matches)
+    assert {t for m in matches for t in (m.team1_id, m.team2_id)} | {bye} == {1, 2, 3, 4, 5}
+
+
+def test_unposted_match_resumes_after_restart(run, client, settings):
+    store = make_store(4)
+    store.set_swiss(SwissState(rounds=2))
+    store.set_round(1)
+    channel = run(client.guild.create_text_channel("match"))
+    # Match enregistré, message jamais posté (arrêt pendant la création)
+    store.add_match(Match(id=1, round_no=1, team1_id=1, team2_id=2, date_str="01/01", time_str="21h00",
+                          channel_id=channel.id))
+
+    engine = SwissEngine(store, settings)
+    engine.view_factory = lambda match_id: None
+    assert engine.retry_pending
+    assert not engine.finished()
+
+    n_channels = len(client.channels)
+    created, failed, bye, _ = run(engine.next_round("01/01", "21h00"))
+    assert (created, failed, bye) == (1, [], None)
+    assert store.state.current_round == 1  # le round est repris, pas recréé
+    assert len(client.channels) == n_channels
+    assert store.match(1).created_message_id == channel.messages[-1].id
+    assert not engine.retry_pending
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+import os
+import weakref
+from dataclasses import asdict
+from typing import Callable, Dict, List, Tuple
+
+import discord
+
+import config
+import metrics
+from bracket import BracketEngine
+from persistence import Journal
+from refresh import EmbedRefresher
+from reminders import ReminderScheduler
+from screens import CONTENT, ScreenshotArchive
+from swiss import SwissEngine
+from state import TournamentSettings, TournamentState
+from store import TournamentStore
+from teardown import RoundTeardown
+
+log = logging.getLogger(__name__)
+
+# Tournoi historique (configuration de config.py), valable sur tout serveur
+DEFAULT_NAME = "principal"
+ANY_GUILD = 0
+
+Key = Tuple[int, str]
+
+
+class Tournament:
+    """Partition complète d'un tournoi : état, index, persistance, embeds,
+    rappels et verrou propres. Les tâches de fond ne démarrent qu'à la
+    première activité : un tournoi inactif ne coûte que ses structures.
+    """
+
+    __slots__ = (
+        "settings", "store", "journal", "refresher", "reminders", "teardown", "bracket_engine",
+        "swiss_engine", "screens", "lock", "result_prompts", "_match_locks",
+    )
+
+    def __init__(self, settings: TournamentSettings, directory: str):
+        self.settings = settings
+        self.store = TournamentStore(TournamentState())
+        self.refresher = EmbedRefresher(self.store, settings.embeds_channel_id)
+        self.reminders = ReminderScheduler(self.store)
+        self.teardown = RoundTeardown(self.store, directory)
+        self.screens = ScreenshotArchive(self.store)
+        self.journal = Journal(self.store, directory)
+        self.lock = asyncio.Lock()
+        self.bracket_engine = BracketEngine(self.store, self.lock, settings)
+        self.swiss_engine = SwissEngine(self.store, settings)
+        self.result_prompts: Dict[int, discord.ui.View] = {}
+        # Un verrou par match, libéré par le GC dès que plus personne ne le tient
+        self._match_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    @property
+    def key(self) -> Key:
+        return (self.settings.guild_id, self.settings.name)
+
+    @property
+    def state(self) -> TournamentState:
+        return self.store.state
+
+    def match_lock(self, match_id: int) -> asyncio.Lock:
+        """Verrou des transitions d'un match ; les autres matchs restent parallèles."""
+        lock = self._match_locks.get(match_id)
+        if lock is None:
+            lock = self._match_locks[match_id] = asyncio.Lock()
+        return lock
+
+    def start(self, bot: discord.Client):
+        self.journal.load()
+        # Le rejeu du journal ne notifie pas les écouteurs : tableau et
+        # classement suisse recalculés une fois
+        self.bracket_engine.rebuild()
+        self.swiss_engine.rebuild()
+        self.refresher.start(bot)
+        self.reminders.start(bot)
+        self.teardown.start(bot)
+        self.bracket_engine.start(bot)
+
+
+def _with_access(d: dict) -> dict:
+    # Réglages enregistrés avant l'organisation par tournoi : l'accès global
+    # de l'époque est conservé
+    if "orga_ids" not in d:
+        d = {**d, "admin_role_id": config.ADMIN_ROLE_ID, "orga_ids": list(config.ORGA_IDS)}
+    return d
+
+
+class TournamentRegistry:
+    """Tournois par (serveur, nom) + index salon de match -> tournoi."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.settings_path = os.path.join(directory, "tournois.json")
+        self.bot: discord.Client | None = None
+        self.loaded = False
+
+        self._by_key: Dict[Key, Tournament] = {}
+        self._by_channel: Dict[int, Tournament] = {}
+        # Appelés à la création de chaque tournoi (abonnements au store, etc.)
+        self._hooks: List[Callable[[Tournament], None]] = []
+
+    # -------------------------
+    # Cycle de vie
+    # -------------------------
+    def add_hook(self, hook: Callable[[Tournament], None]):
+        self._hooks.append(hook)
+        for t in self._by_key.values():
+            hook(t)
+
+    def load(self, bot: discord.Client):
+        self.bot = bot
+        os.makedirs(self.directory, exist_ok=True)
+
+        saved = []
+        if os.path.exists(self.settings_path):
+            with open(self.settings_path, encoding="utf-8") as f:
+                saved = [TournamentSettings(**_with_access(d)) for d in json.load(f)]
+
+        default = TournamentSettings(
+            guild_id=ANY_GUILD,
+            name=DEFAULT_NAME,
+            embeds_channel_id=config.CHANNEL_EMBEDS_ID,
+            match_category_id=config.MATCH_CATEGORY_ID,
+            admin_role_id=config.ADMIN_ROLE_ID,
+            orga_ids=list(config.ORGA_IDS),
+        )
+        for settings in [default, *saved]:
+            if (settings.guild_id, settings.name) not in self._by_key:
+                self._create(settings)
+        self.loaded = True
+
+    def _directory_for(self, settings: TournamentSettings) -> str:
+        # Le tournoi historique garde le dossier de données d'origine
+        if (settings.guild_id, settings.name) == (ANY_GUILD, DEFAULT_NAME):
+            return self.directory
+        return os.path.join(self.directory, "tournois", f"{settings.guild_id}-{settings.name}")
+
+    def _create(self, settings: TournamentSettings) -> Tournament:
+        t = Tournament(settings, self._directory_for(settings))
+        self._by_key[t.key] = t
+        t.store.subscribe(lambda op, payload: self._on_mutation(t, op, payload))
+        for hook in self._hooks:
+            hook(t)
+        if self.bot is not None:
+            t.start(self.bot)
+            for channel_id, m in t.store.matches_by_channel.items():
+                if not m.archived:
+                    self._by_channel[channel_id] = t
+        return t
+
+    def create(self, settings: TournamentSettings) -> Tournament | None:
+        if (settings.guild_id, settings.name) in self._by_key:
+            return None
+        t = self._create(settings)
+        self._save()
+        return t
+
+    def save(self):
+        """Enregistre les réglages après une modification (organisateurs…)."""
+        self._save()
+
+    def _save(self):
+        data = [asdict(t.settings) for t in self._by_key.values() if t.key[0] != ANY_GUILD]
+        tmp = self.settings_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.settings_path)
+
+    async def close(self):
+        # Screens en cours de téléchargement : liés à leur match avant l'arrêt du journal
+        await asyncio.gather(*(t.screens.flush() for t in self._by_key.values()))
+        await CONTENT.close()
+        await asyncio.gather(*(t.journal.close() for t in self._by_key.values()))
+
+    # -------------------------
+    # Index salon -> tournoi
+    # -------------------------
+    def _on_mutation(self, t: Tournament, op: str, payload: dict):
+        if op == "match_add":
+            self._by_channel[payload["match"]["channel_id"]] = t
+        elif op == "match_update" and "channel_id" in payload["fields"]:
+            # Salon recréé à la reprise d'une création en échec
+            self._by_channel[payload["fields"]["channel_id"]] = t
+        elif op == "match_update" and payload["fields"].get("archived"):
+            m = t.store.match(payload["id"])
+            if m and self._by_channel.get(m.channel_id) is t:
+                del self._by_channel[m.channel_id]
+        elif op == "reset":
+            for channel_id in [c for c, owner in self._by_channel.items() if owner is t]:
+                del self._by_channel[channel_id]
+
+    # -------------------------
+    # Lectures
+    # -------------------------
+    def get(self, guild_id: int | None, name: str | None = None) -> Tournament | None:
+        name = (name or DEFAULT_NAME).lower().strip()
+        return self._by_key.get((guild_id or ANY_GUILD, name)) or self._by_key.get((ANY_GUILD, name))
+
+    def by_channel(self, channel_id: int) -> Tournament | None:
+        return self._by_channel.get(channel_id)
+
+    def all(self) -> List[Tournament]:
+        return list(self._by_key.values())
+
+
+REGISTRY = TournamentRegistry(config.DATA_DIR)
+
+
+def _labels(t: Tournament) -> Dict[str, str]:
+    return {"guild": str(t.settings.guild_id), "tournament": t.settings.name}
+
+
+def _collect():
+    sizes = {"players": [], "teams": [], "matches": [], "live_channels": [], "result_prompts": []}
+    for t in REGISTRY.all():
+        labels = _labels(t)
+        state = t.state
+        sizes["players"].append((labels, len(state.players)))
+        sizes["teams"].append((labels, len(state.teams)))
+        sizes["matches"].append((labels, len(state.matches)))
+        sizes["live_channels"].append((labels, sum(1 for m in state.matches if not m.archived)))
+        sizes["result_prompts"].append((labels, len(t.result_prompts)))
+    for name, samples in sizes.items():
+        yield (f"tournament_{name}", "gauge", f"Taille de l'état : {name}", samples)
+
+
+metrics.METRICS.add_collector(_collect)
+# Éditions évitées par le hash de rendu : refresh_skipped_total
+metrics.add_stats_collector(
+    "refresh", "Rafraîchissement des embeds",
+    lambda: ((_labels(t), t.refresher.stats) for t in REGISTRY.all()),
+)
+metrics.add_stats_collector(
+    "reminders", "Rappels de match",
+    lambda: ((_labels(t), t.reminders.stats) for t in REGISTRY.all()),
+)
+metrics.add_stats_collector(
+    "teardown", "Archivage des salons de round",
+    lambda: ((_labels(t), t.teardown.stats) for t in REGISTRY.all()),
+)
@@ -1,7 +1,7 @@
 import asyncio
+import logging
 import random
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+import time
 
 import discord
 from discord import app_commands
@@ -10,53 +10,52 @@ from discord.ext import commands
 import config
 import permissions
 import embeds
-from state import STATE, Player, Team, Match
-
-PARIS_TZ = ZoneInfo("Europe/Paris")
-
-ORGA_IDS = {
-    config.ORGA_USER_ID,
-    1352575142668013588,
-}
+import metrics
+import outbound
+import planning
+import ratings
+import swiss
+import warehouse
+from state import Team, Match, SwissState
+from bracket import build_bracket
+from draw import DrawError, draw_pairs
+from resolver import RESOLVER
+from ratings import RATINGS
+from tournaments import ANY_GUILD, REGISTRY, Tournament, TournamentSettings
+from warehouse import WAREHOUSE
+
+log = logging.getLogger(__name__)
 
 # =================================================
 # Utils
 # =================================================
-def _find_team(team_id: int) -> Team | None:
-    return next((t for t in STATE.teams if t.id == team_id), None)
+def _alive_teams(t: Tournament) -> list[Team]:
+    return [team for team in t.state.teams if not team.eliminated]
 
 
-def _alive_teams() -> list[Team]:
-    return [t for t in STATE.teams if not t.eliminated]
+def _tournament(interaction: discord.Interaction, competition: str | None) -> Tournament | None:
+    return REGISTRY.get(interaction.guild_id, competition)
 
 
-def _channel_mentions_for_match(team1: Team, team2: Team) -> str:
-    ids = [
-        team1.players[0].user_id,
-        team1.players[1].user_id,
-        team2.players[0].user_id,
-        team2.players[1].user_id,
-    ]
-    return " ".join(f"<@{i}>" for i in ids)
+def _is_guild_orga(interaction: discord.Interaction) -> bool:
+    # Commandes inter-tournois : organisation du tournoi par défaut du serveur
+    t = _tournament(interaction, None)
+    return t is not None and permissions.is_orga_or_admin(interaction, t.settings)
 
 
-def _match_datetime(date_str: str, time_str: str) -> datetime | None:
-    try:
-        ts = time_str.lower().replace("h", ":")
-        hh, mm = ts.split(":")
-        parts = date_str.split("/")
-        if len(parts) == 2:
-            day, month = map(int, parts)
-            year = datetime.now(PARIS_TZ).year
-        else:
-            day, month, year = map(int, parts)
-        return datetime(year, month, day, int(hh), int(mm), tzinfo=PARIS_TZ)
-    except:
-        return None
+# Statuts d'un match pas encore validé par un organisateur
+PENDING = ("WAITING_AVAIL", "NEED_ORGA_VALIDATE")
+
 
+def _eliminate(t: Tournament, team_id: int, round_no: int):
+    # Système suisse : personne n'est éliminé, seul le score compte
+    if not t.swiss_engine.active:
+        t.store.eliminate_team(team_id, round_no)
 
-def _valid_team(p1: Player, p2: Player) -> bool:
-    return p1.cls is not None and p2.cls is not None and p1.cls != p2.cls
+
+async def _already_handled(interaction: discord.Interaction):
+    # Clic perdant : une seule réponse, aucun autre appel REST
+    await interaction.response.send_message("Déjà traité.", ephemeral=True)
 
 # =================================================
 # Views
@@ -64,16 +63,17 @@ def _valid_team(p1: Player, p2: Player) -> bool:
 
 class MatchView(discord.ui.View):
     """AVANT validation : indisponible / valider"""
-    def __init__(self, match_id: int):
+    def __init__(self, tournament: Tournament, match_id: int):
         super().__init__(timeout=None)
+        self.tournament = tournament
         self.match_id = match_id
 
     def _get_match(self) -> Match | None:
-        return next((m for m in STATE.matches if m.id == self.match_id), None)
+        return self.tournament.store.match(self.match_id)
 
     def _is_player(self, user_id: int, m: Match) -> bool:
-        t1 = _find_team(m.team1_id)
-        t2 = _find_team(m.team2_id)
+        t1 = self.tournament.store.team(m.team1_id)
+        t2 = self.tournament.store.team(m.team2_id)
         if not t1 or not t2:
             return False
         return user_id in {
@@ -83,73 +83,96 @@ class MatchView(discord.ui.View):
             t2.players[1].user_id,
         }
 
-    @discord.ui.button(label="INDISPONIBLE", emoji=config.EMOJI_CROSS, style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="INDISPONIBLE", emoji=config.EMOJI_CROSS, style=discord.ButtonStyle.danger, custom_id="match:indispo")
+    @metrics.timed("button", "indispo")
     async def indispo(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer()
         m = self._get_match()
-        if not m or m.status == "DONE":
-            return await interaction.followup.send("Action impossible.", ephemeral=True)
+        if not m or m.status not in PENDING:
+            return await interaction.response.send_message("Action impossible.", ephemeral=True)
 
         if not self._is_player(interaction.user.id, m):
-            return await interaction.followup.send("Accès refusé.", ephemeral=True)
+            return await interaction.response.send_message("Accès refusé.", ephemeral=True)
 
-        orga_mentions = " ".join(f"<@{oid}>" for oid in ORGA_IDS)
+        lock = self.tournament.match_lock(m.id)
+        if lock.locked():
+            return await _already_handled(interaction)
 
-        await interaction.followup.send(
-            f"{config.EMOJI_CROSS} **INDISPONIBLE**\n\n"
-            f"{interaction.user.mention} n’est pas disponible à l’horaire prévu.\n\n"
-            "👉 Merci d’indiquer tes disponibilités alternatives dans ce canal.\n\n"
-            f"🔔 Organisateurs : {orga_mentions}"
-        )
+        async with lock:
+            if not self.tournament.store.transition_match(m, PENDING, status="WAITING_AVAIL", thumbs=set()):
+                return await _already_handled(interaction)
 
-        m.status = "WAITING_AVAIL"
-        m.thumbs.clear()
+            orga_mentions = " ".join(f"<@{oid}>" for oid in self.tournament.settings.orga_ids)
 
-    @discord.ui.button(label="VALIDER", emoji=config.EMOJI_VALIDATE, style=discord.ButtonStyle.success)
-    async def validate(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
+            await interaction.response.send_message(
+                f"{config.EMOJI_CROSS} **INDISPONIBLE**\n\n"
+                f"{interaction.user.mention} n’est pas disponible à l’horaire prévu.\n\n"
+                "👉 Merci d’indiquer tes disponibilités avec /dispo (ex : 12/03 20h-23h).\n\n"
+                f"🔔 Organisateurs : {orga_mentions}"
+            )
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
+    @discord.ui.button(label="VALIDER", emoji=config.EMOJI_VALIDATE, style=discord.ButtonStyle.success, custom_id="match:valider")
+    @metrics.timed("button", "valider")
+    async def validate(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not permissions.is_orga_or_admin(interaction, self.tournament.settings):
+            return await interaction.response.send_message("Accès refusé.", ephemeral=True)
 
         m = self._get_match()
-        if not m or m.status == "DONE":
-            return await interaction.followup.send("Action impossible.")
-
-        picked = random.choice(config.MAPS)
-        m.map_name = picked["name"]
-        m.map_image = picked["image"]
-        m.status = "VALIDATED"
-
-        try:
-            old = await interaction.channel.fetch_message(m.created_message_id)
-            await old.delete()
-        except:
-            pass
-
-        t1 = _find_team(m.team1_id)
-        t2 = _find_team(m.team2_id)
+        if not m or m.status not in PENDING:
+            return await _already_handled(interaction)
 
-        embed = embeds.embed_match(m, t1, t2)
-        view = ValidatedMatchView(m.id)
+        if not m.date_str:
+            return await interaction.response.send_message(
+                "Horaire à planifier d'abord (/planifier ou /modifier).", ephemeral=True
+            )
 
-        msg = await interaction.channel.send(
-            content=_channel_mentions_for_match(t1, t2),
-            embed=embed,
-            view=view
-        )
-        m.created_message_id = msg.id
+        # Verrou tenu jusqu'à l'envoi du nouveau message : une seule validation
+        lock = self.tournament.match_lock(m.id)
+        if lock.locked():
+            return await _already_handled(interaction)
+
+        async with lock:
+            store = self.tournament.store
+            picked = random.choice(config.MAPS)
+            if not store.transition_match(
+                m, PENDING,
+                map_name=picked["name"],
+                map_image=picked["image"],
+                status="VALIDATED",
+            ):
+                return await _already_handled(interaction)
+
+            await interaction.response.defer(ephemeral=True)
+
+            try:
+                await RESOLVER.delete_message(m.channel_id, m.created_message_id)
+            except discord.HTTPException:
+                metrics.ERRORS.inc(source="tournoi")
+
+            t1 = store.team(m.team1_id)
+            t2 = store.team(m.team2_id)
+
+            embed = embeds.embed_match(m, t1, t2)
+            view = ValidatedMatchView(self.tournament, m.id)
+
+            msg = await outbound.send(
+                interaction.channel,
+                content=embeds.match_mentions(t1, t2),
+                embed=embed,
+                view=view
+            )
+            store.update_match(m, created_message_id=msg.id)
 
-        await interaction.followup.send("Match validé.")
+        await outbound.followup(interaction, "Match validé.")
 
 
 class ValidatedMatchView(discord.ui.View):
     """APRÈS validation : forfait / résultat"""
-    def __init__(self, match_id: int):
+    def __init__(self, tournament: Tournament, match_id: int):
         super().__init__(timeout=None)
+        self.tournament = tournament
         self.match_id = match_id
 
-        m = next((x for x in STATE.matches if x.id == match_id), None)
+        m = tournament.store.match(match_id)
         if m:
             self.team1_id = m.team1_id
             self.team2_id = m.team2_id
@@ -157,27 +180,27 @@ class ValidatedMatchView(discord.ui.View):
             self.team1_id = None
             self.team2_id = None
 
-    @discord.ui.button(label="FORFAIT", emoji=config.EMOJI_FORFAIT, style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="FORFAIT", emoji=config.EMOJI_FORFAIT, style=discord.ButtonStyle.secondary, custom_id="match:forfait")
+    @metrics.timed("button", "forfait")
     async def forfait(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer(ephemeral=True)
+        if not permissions.is_orga_or_admin(interaction, self.tournament.settings):
+            return await interaction.response.send_message("Accès refusé.", ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        m = next((x for x in STATE.matches if x.id == self.match_id), None)
+        m = self.tournament.store.match(self.match_id)
         if not m or m.status != "VALIDATED":
-            return await interaction.followup.send("Action impossible.")
+            return await _already_handled(interaction)
 
-        await interaction.followup.send(
+        await interaction.response.send_message(
             "Quelle équipe déclare forfait ?",
-            view=ForfeitChoiceView(self.match_id, self.team1_id, self.team2_id),
+            view=ForfeitChoiceView(self.tournament, self.match_id, self.team1_id, self.team2_id),
             ephemeral=True
         )
 
 
 class ForfeitChoiceView(discord.ui.View):
-    def __init__(self, match_id: int, team1_id: int, team2_id: int):
+    def __init__(self, tournament: Tournament, match_id: int, team1_id: int, team2_id: int):
         super().__init__(timeout=60)
+        self.tournament = tournament
         self.match_id = match_id
         self.team1_id = team1_id
         self.team2_id = team2_id
@@ -186,31 +209,30 @@ class ForfeitChoiceView(discord.ui.View):
         self.team2.label = f"EQUIPE {team2_id}"
 
     async def _apply(self, interaction: discord.Interaction, forfeiting_team_id: int):
-        await interaction.response.defer(ephemeral=True)
-
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        m = next((x for x in STATE.matches if x.id == self.match_id), None)
-        if not m or m.status != "VALIDATED":
-            return await interaction.followup.send("Action impossible.")
+        if not permissions.is_orga_or_admin(interaction, self.tournament.settings):
+            return await interaction.response.send_message("Accès refusé.", ephemeral=True)
 
-        winner = m.team1_id if forfeiting_team_id == m.team2_id else m.team2_id
-        m.winner_team_id = winner
-        m.status = "DONE"
+        store = self.tournament.store
+        m = store.match(self.match_id)
+        if not m:
+            return await _already_handled(interaction)
 
-        loser = _find_team(forfeiting_team_id)
-        if loser:
-            loser.eliminated = True
-            loser.eliminated_round = m.round_no
+        # Attend une éventuelle validation ou /modifier en cours sur ce match
+        async with self.tournament.match_lock(m.id):
+            winner = m.team1_id if forfeiting_team_id == m.team2_id else m.team2_id
+            if not store.transition_match(m, ("VALIDATED",), winner_team_id=winner, forfeit=True, status="DONE"):
+                return await _already_handled(interaction)
+            _eliminate(self.tournament, forfeiting_team_id, m.round_no)
 
-        await interaction.followup.send(f"Forfait enregistré. **EQUIPE {winner} gagne**.")
+        await interaction.response.send_message(f"Forfait enregistré. **EQUIPE {winner} gagne**.", ephemeral=True)
 
     @discord.ui.button(label="EQUIPE ?", style=discord.ButtonStyle.danger)
+    @metrics.timed("button", "forfait_equipe1")
     async def team1(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._apply(interaction, self.team1_id)
 
     @discord.ui.button(label="EQUIPE ?", style=discord.ButtonStyle.danger)
+    @metrics.timed("button", "forfait_equipe2")
     async def team2(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._apply(interaction, self.team2_id)
 
@@ -219,11 +241,14 @@ class ForfeitChoiceView(discord.ui.View):
 # =================================================
 class ResultView(discord.ui.View):
     """Choix du gagnant après envoi du screen"""
-    def __init__(self, match_id: int):
+    def __init__(self, tournament: Tournament, match_id: int):
         super().__init__(timeout=3600)
+        self.tournament = tournament
         self.match_id = match_id
+        self.message_id: int | None = None
+        self.screens = 0
 
-        m = next((x for x in STATE.matches if x.id == match_id), None)
+        m = tournament.store.match(match_id)
         if m:
             self.team1_id = m.team1_id
             self.team2_id = m.team2_id
@@ -235,365 +260,773 @@ class ResultView(discord.ui.View):
         self.win2.label = f"EQUIPE {self.team2_id}"
 
     async def _set_winner(self, interaction: discord.Interaction, winner_team_id: int):
-        await interaction.response.defer(ephemeral=True)
-
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        m = next((x for x in STATE.matches if x.id == self.match_id), None)
-        if not m or m.status != "VALIDATED":
-            return await interaction.followup.send("Action impossible.")
+        if not permissions.is_orga_or_admin(interaction, self.tournament.settings):
+            return await interaction.response.send_message("Accès refusé.", ephemeral=True)
 
-        loser_id = m.team1_id if winner_team_id == m.team2_id else m.team2_id
-
-        m.winner_team_id = winner_team_id
-        m.status = "DONE"
+        store = self.tournament.store
+        m = store.match(self.match_id)
+        if not m:
+            return await _already_handled(interaction)
 
-        loser = _find_team(loser_id)
-        if loser:
-            loser.eliminated = True
-            loser.eliminated_round = m.round_no
+        # Compare-and-set sous le verrou du match : un seul gagnant, une seule
+        # élimination, et pas de résultat pendant un /modifier
+        async with self.tournament.match_lock(m.id):
+            loser_id = m.team1_id if winner_team_id == m.team2_id else m.team2_id
+            if not store.transition_match(m, ("VALIDATED",), winner_team_id=winner_team_id, status="DONE"):
+                return await _already_handled(interaction)
+            _eliminate(self.tournament, loser_id, m.round_no)
 
-        await _refresh_all_embeds(interaction.client)
-        await interaction.followup.send(f"Victoire enregistrée : **EQUIPE {winner_team_id}**.")
+        await interaction.response.send_message(f"Victoire enregistrée : **EQUIPE {winner_team_id}**.", ephemeral=True)
 
     @discord.ui.button(label="EQUIPE ?", style=discord.ButtonStyle.primary)
+    @metrics.timed("button", "resultat_equipe1")
     async def win1(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._set_winner(interaction, self.team1_id)
 
     @discord.ui.button(label="EQUIPE ?", style=discord.ButtonStyle.primary)
+    @metrics.timed("button", "resultat_equipe2")
     async def win2(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._set_winner(interaction, self.team2_id)
 
+    async def on_timeout(self):
+        prompts = self.tournament.result_prompts
+        if prompts.get(self.match_id) is self:
+            del prompts[self.match_id]
+
 
 # =================================================
-# Embeds refresh
+# Prompts de résultat — un seul par match
 # =================================================
-async def _refresh_match_message(bot: discord.Client, m: Match):
-    if not m.created_message_id:
-        return
-    ch = await bot.fetch_channel(m.channel_id)
-    try:
-        msg = await ch.fetch_message(m.created_message_id)
-        await msg.edit(
-            embed=embeds.embed_match(m, _find_team(m.team1_id), _find_team(m.team2_id))
+def _result_prompt_text(m: Match, view: ResultView, last: discord.Message) -> str:
+    screens = f"📸 {view.screens} screens reçus — dernier : {last.jump_url}\n" if view.screens > 1 else ""
+    return (
+        f"{config.EMOJI_TROPHY} **Résultat détecté**\n"
+        f"Match **EQUIPE {m.team1_id}** vs **EQUIPE {m.team2_id}**\n"
+        f"{screens}\n"
+        "👉 Organisateur : sélectionne l’équipe gagnante ci-dessous."
+    )
+
+
+async def prompt_result(t: Tournament, message: discord.Message, m: Match):
+    """Affiche (ou met à jour) le choix du gagnant après un screen."""
+    prompts = t.result_prompts
+    view = prompts.get(m.id)
+    if view is not None and not view.is_finished():
+        view.screens += 1
+        if view.message_id is None:
+            # Prompt en cours d'envoi pour un screen précédent
+            return
+        edited = await RESOLVER.edit_message(
+            m.channel_id, view.message_id, content=_result_prompt_text(m, view, message)
         )
-    except:
-        pass
+        if edited is not None:
+            return
+        view.stop()
+
+    # Enregistré avant l'envoi : deux screens simultanés ne créent qu'un prompt
+    view = ResultView(t, m.id)
+    view.screens = 1
+    prompts[m.id] = view
+    try:
+        msg = await outbound.send(message.channel, content=_result_prompt_text(m, view, message), view=view)
+    except discord.HTTPException:
+        if prompts.get(m.id) is view:
+            del prompts[m.id]
+        raise
+    view.message_id = msg.id
 
 
-async def _ensure_main_embeds(bot: discord.Client):
-    ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
+def _close_result_prompt(t: Tournament, match_id: int):
+    view = t.result_prompts.pop(match_id, None)
+    if view is None:
+        return
+    view.stop()
+    m = t.store.match(match_id)
+    if m and view.message_id:
+        # Retire les boutons du prompt (en tâche de fond, hors du handler)
+        asyncio.get_running_loop().create_task(
+            RESOLVER.edit_message(m.channel_id, view.message_id, priority=outbound.BACKGROUND, view=None)
+        )
 
-    if STATE.embeds.teams_msg_id is None:
-        STATE.embeds.teams_msg_id = (await ch.send(embed=embeds.embed_teams(STATE.teams))).id
 
-    if STATE.embeds.upcoming_msg_id is None:
-        STATE.embeds.upcoming_msg_id = (await ch.send(embed=embeds.embed_upcoming(STATE.matches))).id
+async def _record_results(t: Tournament):
+    try:
+        count = await WAREHOUSE.record(t.state, t.settings.guild_id)
+        log.info("Tournoi %s : %d résultat(s) enregistrés dans l'entrepôt", t.settings.name, count)
+    except Exception:
+        metrics.ERRORS.inc(source="warehouse")
+        log.exception("Enregistrement des résultats de %s en échec", t.settings.name)
 
-    if STATE.embeds.history_msg_id is None:
-        STATE.embeds.history_msg_id = (await ch.send(embed=embeds.embed_history(STATE.matches))).id
 
+def _update_ratings(t: Tournament, match_id: int):
+    m = t.store.match(match_id)
+    if m is None or m.winner_team_id is None:
+        return
+    loser_id = m.team2_id if m.winner_team_id == m.team1_id else m.team1_id
+    winner, loser = t.store.team(m.winner_team_id), t.store.team(loser_id)
+    if winner and loser:
+        RATINGS.record(winner, loser)
+
+
+def _attach_tournament(t: Tournament):
+    def on_mutation(op: str, payload: dict):
+        status = payload["fields"].get("status") if op == "match_update" else None
+        # Match sorti de VALIDATED (résultat, forfait, /modifier) : prompt périmé
+        if status is not None and status != "VALIDATED":
+            _close_result_prompt(t, payload["id"])
+        if status == "DONE":
+            # Résultat ou forfait : Elo mis à jour immédiatement
+            _update_ratings(t, payload["id"])
+            # Tournoi terminé : résultats versés dans l'entrepôt inter-tournois
+            if t.bracket_engine.champion() is not None or t.swiss_engine.finished():
+                asyncio.get_running_loop().create_task(_record_results(t))
+        elif op == "reset":
+            for view in t.result_prompts.values():
+                view.stop()
+            t.result_prompts.clear()
+
+    t.store.subscribe(on_mutation)
+    t.bracket_engine.view_factory = lambda match_id: MatchView(t, match_id)
+    t.swiss_engine.view_factory = lambda match_id: MatchView(t, match_id)
+    t.swiss_engine.rating = lambda team_id: RATINGS.team_rating(t.store.team(team_id))
+
+
+REGISTRY.add_hook(_attach_tournament)
 
-async def _refresh_all_embeds(bot: discord.Client):
-    await _ensure_main_embeds(bot)
-    ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
 
-    await (await ch.fetch_message(STATE.embeds.teams_msg_id)).edit(
-        embed=embeds.embed_teams(STATE.teams)
-    )
-    await (await ch.fetch_message(STATE.embeds.upcoming_msg_id)).edit(
-        embed=embeds.embed_upcoming(STATE.matches)
-    )
-    await (await ch.fetch_message(STATE.embeds.history_msg_id)).edit(
-        embed=embeds.embed_history(STATE.matches)
+# =================================================
+# Redémarrage à chaud — vues persistantes
+# =================================================
+def register_persistent_views(bot: commands.Bot) -> int:
+    """Rattache les vues des matchs en cours à leurs messages, sans appel REST.
+
+    Les boutons ont un custom_id fixe ; bot.add_view(message_id=...) suffit
+    pour que discord.py route les clics vers la bonne vue après un redémarrage.
+    """
+    t0 = time.perf_counter()
+    count = 0
+    for t in REGISTRY.all():
+        for m in t.state.matches:
+            if m.status == "DONE" or not m.created_message_id:
+                continue
+            view = ValidatedMatchView(t, m.id) if m.status == "VALIDATED" else MatchView(t, m.id)
+            bot.add_view(view, message_id=m.created_message_id)
+            count += 1
+
+    log.info(
+        "%d vues de match restaurées en %.1f ms",
+        count, (time.perf_counter() - t0) * 1000
     )
+    return count
 
 
 # =================================================
-# Reminder loop — J-30 min
+# Embeds refresh
 # =================================================
-async def _reminder_loop(bot: discord.Client):
-    while True:
-        try:
-            now = datetime.now(PARIS_TZ)
-            for m in STATE.matches:
-                if m.status != "VALIDATED":
-                    continue
-
-                dt = _match_datetime(m.date_str, m.time_str)
-                if not dt:
-                    continue
+async def _refresh_match_message(t: Tournament, m: Match):
+    if not m.created_message_id:
+        return
+    try:
+        await RESOLVER.edit_message(
+            m.channel_id, m.created_message_id,
+            embed=embeds.embed_match(m, t.store.team(m.team1_id), t.store.team(m.team2_id))
+        )
+    except discord.HTTPException:
+        metrics.ERRORS.inc(source="tournoi")
 
-                if timedelta(minutes=29) <= dt - now <= timedelta(minutes=30):
-                    ch = await bot.fetch_channel(m.channel_id)
-                    t1 = _find_team(m.team1_id)
-                    t2 = _find_team(m.team2_id)
 
-                    await ch.send(
-                        f"{_channel_mentions_for_match(t1, t2)}\n\n"
-                        "⏰ **Rappel : match dans 30 minutes**\n"
-                        "📸 Pensez à poster le screen du résultat."
-                    )
-        except:
-            pass
+async def _notify_schedule(t: Tournament, m: Match):
+    t1 = t.store.team(m.team1_id)
+    t2 = t.store.team(m.team2_id)
+    await _refresh_match_message(t, m)
+    try:
+        await RESOLVER.send(
+            m.channel_id,
+            content=(
+                f"{embeds.match_mentions(t1, t2)}\n\n"
+                f"📅 **Horaire planifié : {m.date_str} à {m.time_str}**\n"
+                "👉 En cas d’empêchement, mettez à jour vos disponibilités avec /dispo."
+            ),
+        )
+    except discord.HTTPException:
+        metrics.ERRORS.inc(source="tournoi")
 
-        await asyncio.sleep(60)
 
 # =================================================
 # Commands
 # =================================================
 def setup(tree: app_commands.CommandTree, bot: commands.Bot):
 
+    # -------------------------
+    # /tournoi_creer
+    # -------------------------
+    @tree.command(name="tournoi_creer")
+    @metrics.timed("command", "tournoi_creer")
+    async def tournoi_creer(
+        interaction: discord.Interaction,
+        nom: str,
+        salon_embeds: discord.TextChannel,
+        categorie: discord.CategoryChannel,
+        role_admin: discord.Role | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        # Organisation du serveur (tournoi par défaut) ou gestionnaire du serveur
+        manager = getattr(getattr(interaction.user, "guild_permissions", None), "manage_guild", False)
+        if not (manager or _is_guild_orga(interaction)):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        # Le créateur est le premier organisateur ; /organisateur pour en ajouter
+        t = REGISTRY.create(TournamentSettings(
+            guild_id=interaction.guild_id,
+            name=nom.lower().strip(),
+            embeds_channel_id=salon_embeds.id,
+            match_category_id=categorie.id,
+            admin_role_id=role_admin.id if role_admin else 0,
+            orga_ids=[interaction.user.id],
+        ))
+        if t is None:
+            return await outbound.followup(interaction, "Ce tournoi existe déjà.")
+
+        await outbound.followup(interaction, f"Tournoi **{t.settings.name}** créé.")
+
+    # -------------------------
+    # /organisateur
+    # -------------------------
+    @tree.command(name="organisateur")
+    @metrics.timed("command", "organisateur")
+    async def organisateur(
+        interaction: discord.Interaction,
+        joueur: discord.Member,
+        retirer: bool = False,
+        competition: str | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        if t.key[0] == ANY_GUILD:
+            return await outbound.followup(interaction, "Organisateurs du tournoi principal : voir config.ORGA_IDS.")
+
+        ids = t.settings.orga_ids
+        if retirer:
+            if joueur.id in ids:
+                ids.remove(joueur.id)
+        elif joueur.id not in ids:
+            ids.append(joueur.id)
+        REGISTRY.save()
+
+        mentions = " ".join(f"<@{oid}>" for oid in ids) or "aucun"
+        await outbound.followup(interaction, f"Organisateurs de **{t.settings.name}** : {mentions}")
+
     # -------------------------
     # /inscription
     # -------------------------
     @tree.command(name="inscription")
-    async def inscription(interaction: discord.Interaction, joueur: discord.Member):
+    @metrics.timed("command", "inscription")
+    async def inscription(interaction: discord.Interaction, joueur: discord.Member, competition: str | None = None):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        if any(p.user_id == joueur.id for p in STATE.players):
-            return await interaction.followup.send("Déjà inscrit.")
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
 
-        STATE.players.append(Player(user_id=joueur.id))
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
-        ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
-        if STATE.embeds.players_msg_id is None:
-            STATE.embeds.players_msg_id = (
-                await ch.send(embed=embeds.embed_players(STATE.players))
-            ).id
-        else:
-            await (
-                await ch.fetch_message(STATE.embeds.players_msg_id)
-            ).edit(embed=embeds.embed_players(STATE.players))
+        if t.store.add_player(joueur.id) is None:
+            return await outbound.followup(interaction, "Déjà inscrit.")
 
-        await interaction.followup.send("Joueur inscrit.")
+        await outbound.followup(interaction, "Joueur inscrit.")
 
     # -------------------------
     # /classe
     # -------------------------
     @tree.command(name="classe")
-    async def classe(interaction: discord.Interaction, joueur: discord.Member, classe: str):
+    @metrics.timed("command", "classe")
+    async def classe(interaction: discord.Interaction, joueur: discord.Member, classe: str, competition: str | None = None):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
         classe = classe.lower().strip()
         if classe not in config.CLASSES:
-            return await interaction.followup.send("Classe invalide.")
+            return await outbound.followup(interaction, "Classe invalide.")
 
-        for p in STATE.players:
-            if p.user_id == joueur.id:
-                p.cls = classe
+        t.store.set_player_class(joueur.id, classe)
 
-        ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
-        if STATE.embeds.players_msg_id:
-            await (
-                await ch.fetch_message(STATE.embeds.players_msg_id)
-            ).edit(embed=embeds.embed_players(STATE.players))
-
-        await interaction.followup.send("Classe mise à jour.")
+        await outbound.followup(interaction, "Classe mise à jour.")
 
     # -------------------------
     # /joueur_retirer
     # -------------------------
     @tree.command(name="joueur_retirer")
-    async def joueur_retirer(interaction: discord.Interaction, joueur: discord.Member):
+    @metrics.timed("command", "joueur_retirer")
+    async def joueur_retirer(interaction: discord.Interaction, joueur: discord.Member, competition: str | None = None):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
 
-        if STATE.teams:
-            return await interaction.followup.send("Impossible après le tirage.")
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
-        STATE.players = [p for p in STATE.players if p.user_id != joueur.id]
+        if t.state.teams:
+            return await outbound.followup(interaction, "Impossible après le tirage.")
 
-        ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
-        if STATE.embeds.players_msg_id:
-            await (
-                await ch.fetch_message(STATE.embeds.players_msg_id)
-            ).edit(embed=embeds.embed_players(STATE.players))
+        t.store.remove_player(joueur.id)
 
-        await interaction.followup.send("Joueur retiré.")
+        await outbound.followup(interaction, "Joueur retiré.")
 
     # -------------------------
     # /reset
     # -------------------------
     @tree.command(name="reset")
-    async def reset(interaction: discord.Interaction):
+    @metrics.timed("command", "reset")
+    async def reset(interaction: discord.Interaction, competition: str | None = None):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
-        STATE.reset()
-        await interaction.followup.send("Tournoi réinitialisé.")
+        async with t.lock:
+            # Conserve les résultats (même d'un tournoi inachevé) avant l'effacement
+            await _record_results(t)
+            t.store.reset()
+        await outbound.followup(interaction, "Tournoi réinitialisé.")
 
     # -------------------------
     # /tirage
     # -------------------------
     @tree.command(name="tirage")
-    async def tirage(interaction: discord.Interaction):
+    @metrics.timed("command", "tirage")
+    async def tirage(interaction: discord.Interaction, competition: str | None = None):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        if not STATE.players or len(STATE.players) % 2 != 0:
-            return await interaction.followup.send("Nombre de joueurs invalide.")
-
-        if any(p.cls is None for p in STATE.players):
-            return await interaction.followup.send("Classes manquantes.")
-
-        # Tirage jusqu'à équipes valides (classes différentes)
-        for _ in range(100):
-            random.shuffle(STATE.players)
-            teams = []
-            ok = True
-
-            for i in range(0, len(STATE.players), 2):
-                if not _valid_team(STATE.players[i], STATE.players[i + 1]):
-                    ok = False
-                    break
-                teams.append(
-                    Team(
-                        id=len(teams) + 1,
-                        players=(STATE.players[i], STATE.players[i + 1])
-                    )
-                )
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
 
-            if ok:
-                STATE.teams = teams
-                break
-        else:
-            return await interaction.followup.send("Impossible de créer des équipes valides.")
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
-        # Supprimer embed joueurs
-        if STATE.embeds.players_msg_id:
-            ch = await bot.fetch_channel(config.CHANNEL_EMBEDS_ID)
-            await (await ch.fetch_message(STATE.embeds.players_msg_id)).delete()
-            STATE.embeds.players_msg_id = None
+        async with t.lock:
+            # Tirage : classes différentes dans chaque équipe
+            try:
+                pairs = draw_pairs(t.state.players)
+            except DrawError as e:
+                return await outbound.followup(interaction, str(e))
 
-        await _ensure_main_embeds(bot)
-        await _refresh_all_embeds(bot)
+            t.store.set_teams([
+                Team(id=i + 1, players=pair) for i, pair in enumerate(pairs)
+            ])
 
-        await interaction.followup.send("Équipes créées.")
+        # L'embed joueurs est supprimé par le rafraîchissement (équipes tirées)
+        await outbound.followup(interaction, "Équipes créées.")
 
     # -------------------------
     # /tournoi
     # -------------------------
     @tree.command(name="tournoi")
-    async def tournoi_cmd(interaction: discord.Interaction, date: str, heure: str):
+    @metrics.timed("command", "tournoi")
+    async def tournoi_cmd(
+        interaction: discord.Interaction,
+        date: str,
+        heure: str,
+        tetes_de_serie: bool = False,
+        competition: str | None = None,
+    ):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
-
-        alive = _alive_teams()
-        if not alive or len(alive) % 2 != 0:
-            return await interaction.followup.send("Nombre d'équipes invalide.")
-
-        if any(m.round_no == STATE.current_round and m.status != "DONE" for m in STATE.matches):
-            return await interaction.followup.send("Round précédent non terminé.")
-
-        STATE.current_round += 1
-        guild = interaction.guild
-        category = guild.get_channel(config.MATCH_CATEGORY_ID)
-        random.shuffle(alive)
-
-        for i in range(0, len(alive), 2):
-            t1, t2 = alive[i], alive[i + 1]
-
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(view_channel=False)
-            }
-
-            admin_role = guild.get_role(config.ADMIN_ROLE_ID)
-            if admin_role:
-                overwrites[admin_role] = discord.PermissionOverwrite(
-                    view_channel=True, send_messages=True
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        # Verrou propre au tournoi : les autres tournois ne sont pas bloqués
+        async with t.lock:
+            state = t.state
+            engine = t.bracket_engine
+
+            if t.swiss_engine.active:
+                return await outbound.followup(interaction, "Un tournoi suisse est en cours : utilisez /suisse.")
+
+            if not state.bracket.size:
+                alive = _alive_teams(t)
+                if len(alive) < 2:
+                    return await outbound.followup(interaction, "Nombre d'équipes invalide.")
+
+                # Rounds lancés avant le tableau : ils doivent être terminés
+                if t.store.round_open(state.current_round):
+                    return await outbound.followup(interaction, "Round précédent non terminé.")
+
+                # Libère les salons du round précédent avant d'en créer d'autres
+                await t.teardown.flush()
+
+                random.shuffle(alive)
+                if tetes_de_serie:
+                    # Tri stable : à note égale, l'ordre aléatoire est conservé
+                    alive.sort(key=RATINGS.team_rating, reverse=True)
+                t.store.set_bracket(build_bracket(
+                    [team.id for team in alive], state.current_round, date, heure
+                ))
+
+            champion = engine.champion()
+            if champion is not None:
+                return await outbound.followup(
+                    interaction, f"{config.EMOJI_TROPHY} Tournoi terminé : **EQUIPE {champion}** championne."
                 )
 
-            for oid in ORGA_IDS:
-                overwrites[discord.Object(id=oid)] = discord.PermissionOverwrite(
-                    view_channel=True, send_messages=True
-                )
+            progress_msg = await outbound.followup(interaction, "Création des matchs…", wait=True)
 
-            for p in (*t1.players, *t2.players):
-                overwrites[discord.Object(id=p.user_id)] = discord.PermissionOverwrite(
-                    view_channel=True, send_messages=True
+            async def progress(done: int, total: int):
+                await outbound.followup_edit(
+                    interaction, progress_msg,
+                    content=f"Création des matchs : {done}/{total}…"
                 )
 
-            channel = await guild.create_text_channel(
-                name=config.MATCH_CHANNEL_TEMPLATE.format(a=t1.id, b=t2.id),
-                category=category,
-                overwrites=overwrites,
-            )
+            created, failed = await engine.advance(progress)
 
-            match = Match(
-                id=len(STATE.matches) + 1,
-                round_no=STATE.current_round,
-                team1_id=t1.id,
-                team2_id=t2.id,
-                date_str=date,
-                time_str=heure,
-                channel_id=channel.id,
+        byes = state.bracket.leaves.count(None)
+        summary = (
+            f"Tableau de {state.bracket.size} places ({byes} exemptée(s)) : "
+            f"{created} match(s) créé(s). Les tours suivants se lancent automatiquement, "
+            "à planifier avec /planifier."
+        )
+        if failed:
+            lines = "\n".join(
+                f"• EQUIPE {j.team1.id} vs EQUIPE {j.team2.id} — {j.error}" for j in failed
             )
-            STATE.matches.append(match)
-
-            await channel.send(_channel_mentions_for_match(t1, t2))
-            msg = await channel.send(
-                embed=embeds.embed_match(match, t1, t2),
-                view=MatchView(match.id)
+            return await outbound.followup_edit(
+                interaction, progress_msg,
+                content=f"{summary}\n{len(failed)} erreur(s), relancez /tournoi pour réessayer :\n{lines}"
             )
-            match.created_message_id = msg.id
-            await msg.add_reaction(config.EMOJI_THUMBS)
 
-        await _refresh_all_embeds(bot)
-        await interaction.followup.send("Round créé.")
+        await outbound.followup_edit(interaction, progress_msg, content=summary)
 
     # -------------------------
     # /modifier
     # -------------------------
     @tree.command(name="modifier")
+    @metrics.timed("command", "modifier")
     async def modifier(interaction: discord.Interaction, date: str, heure: str):
         await interaction.response.defer(ephemeral=True)
 
-        if not permissions.is_orga_or_admin(interaction):
-            return await interaction.followup.send("Accès refusé.")
+        # Le salon de match suffit à retrouver le tournoi
+        t = REGISTRY.by_channel(interaction.channel_id)
+        if t and not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
 
-        m = next(
-            (x for x in STATE.matches if x.channel_id == interaction.channel_id and x.status != "DONE"),
-            None
-        )
+        m = t.store.match_by_channel(interaction.channel_id) if t else None
         if not m:
-            return await interaction.followup.send("Aucun match modifiable.")
+            return await outbound.followup(interaction, "Aucun match modifiable.")
+
+        # Attend une éventuelle validation en cours sur ce match
+        async with t.match_lock(m.id):
+            if not t.store.transition_match(
+                m, (*PENDING, "VALIDATED"),
+                date_str=date, time_str=heure, status="WAITING_AVAIL", thumbs=set()
+            ):
+                return await outbound.followup(interaction, "Aucun match modifiable.")
+
+            try:
+                await RESOLVER.delete_message(m.channel_id, m.created_message_id)
+            except discord.HTTPException:
+                metrics.ERRORS.inc(source="tournoi")
+
+            t1 = t.store.team(m.team1_id)
+            t2 = t.store.team(m.team2_id)
+
+            msg = await outbound.send(
+                interaction.channel,
+                embed=embeds.embed_match(m, t1, t2),
+                view=MatchView(t, m.id)
+            )
+            t.store.update_match(m, created_message_id=msg.id)
+            await outbound.react(msg, config.EMOJI_THUMBS)
+
+        await outbound.followup(interaction, "Horaire modifié.")
+
+    # -------------------------
+    # /dispo
+    # -------------------------
+    @tree.command(name="dispo")
+    @metrics.timed("command", "dispo")
+    async def dispo(interaction: discord.Interaction, creneaux: str, competition: str | None = None):
+        await interaction.response.defer(ephemeral=True)
+
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
 
-        m.date_str = date
-        m.time_str = heure
-        m.thumbs.clear()
-        m.status = "WAITING_AVAIL"
+        if t.store.player(interaction.user.id) is None:
+            return await outbound.followup(interaction, "Tu n'es pas inscrit à ce tournoi.")
+
+        if creneaux.strip().lower() in ("aucune", "effacer"):
+            t.store.set_availability(interaction.user.id, [])
+            return await outbound.followup(interaction, "Disponibilités effacées.")
 
         try:
-            old = await interaction.channel.fetch_message(m.created_message_id)
-            await old.delete()
-        except:
-            pass
+            windows = planning.parse_windows(creneaux)
+        except planning.PlanningError as e:
+            return await outbound.followup(interaction, str(e))
+
+        t.store.set_availability(interaction.user.id, windows)
+        lines = "\n".join(
+            "• {} {} → {}".format(*planning.slot_label(start), planning.slot_label(end)[1])
+            for start, end in windows
+        )
+        await outbound.followup(interaction, f"Disponibilités enregistrées :\n{lines}")
+
+    # -------------------------
+    # /planifier
+    # -------------------------
+    @tree.command(name="planifier")
+    @metrics.timed("command", "planifier")
+    async def planifier(
+        interaction: discord.Interaction,
+        date: str,
+        heure_debut: str,
+        heure_fin: str,
+        jours: int = 7,
+        capacite: int = config.SCHEDULE_CAPACITY,
+        competition: str | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        duration = config.SCHEDULE_SLOT_MINUTES * 60
+        try:
+            slots = planning.build_slots(date, heure_debut, heure_fin, jours, duration)
+        except planning.PlanningError as e:
+            return await outbound.followup(interaction, str(e))
+
+        async with t.lock:
+            # Les matchs validés gardent l'horaire confirmé par l'organisation
+            pending = [m for m in t.state.matches if m.status in PENDING]
+            if not pending:
+                return await outbound.followup(interaction, "Aucun match à planifier.")
+
+            schedule = planning.solve(
+                pending, t.store.teams_by_id, t.state.availability, slots, duration, max(1, capacite)
+            )
+
+            # Écriture dans les matchs : les rappels suivent via le store
+            changed = []
+            for m in pending:
+                ts = schedule.assigned.get(m.id)
+                if ts is None:
+                    continue
+                date_str, time_str = planning.slot_label(ts)
+                if (m.date_str, m.time_str) == (date_str, time_str):
+                    continue
+                async with t.match_lock(m.id):
+                    if t.store.transition_match(
+                        m, PENDING, date_str=date_str, time_str=time_str, status="WAITING_AVAIL", thumbs=set()
+                    ):
+                        changed.append(m)
+
+        await asyncio.gather(*(_notify_schedule(t, m) for m in changed))
+
+        summary = f"{len(schedule.assigned)}/{len(pending)} match(s) planifié(s), {len(changed)} horaire(s) modifié(s)."
+        if schedule.makespan is not None:
+            summary += " Dernier créneau : {} à {}.".format(*planning.slot_label(schedule.makespan))
+        if schedule.unscheduled:
+            lines = "\n".join(
+                f"• EQUIPE {m.team1_id} vs EQUIPE {m.team2_id}"
+                for m in (t.store.match(mid) for mid in schedule.unscheduled)
+            )
+            summary += f"\nSans créneau commun ({len(schedule.unscheduled)}) :\n{lines}"
+        await outbound.followup(interaction, summary[:2000])
+
+    # -------------------------
+    # /preuves
+    # -------------------------
+    @tree.command(name="preuves")
+    @metrics.timed("command", "preuves")
+    async def preuves(interaction: discord.Interaction, match_id: int, competition: str | None = None):
+        await interaction.response.defer(ephemeral=True)
 
-        t1 = _find_team(m.team1_id)
-        t2 = _find_team(m.team2_id)
+        t = _tournament(interaction, competition)
+        if t and not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        m = t.store.match(match_id) if t else None
+        if not m:
+            return await outbound.followup(interaction, "Match introuvable.")
 
-        msg = await interaction.channel.send(
-            embed=embeds.embed_match(m, t1, t2),
-            view=MatchView(m.id)
+        winner = f"EQUIPE {m.winner_team_id}" if m.winner_team_id is not None else "non désigné"
+        header = (
+            f"(R{m.round_no}) EQUIPE {m.team1_id} vs EQUIPE {m.team2_id} — vainqueur : {winner}\n"
+            f"{len(m.screenshots)} screen(s) archivé(s)"
         )
-        m.created_message_id = msg.id
-        await msg.add_reaction(config.EMOJI_THUMBS)
+        files = t.screens.files(m)
+        if not files:
+            return await outbound.followup(interaction, header)
+
+        lines = "\n".join(f"• `{digest[:12]}`" + ("" if path else " (fichier manquant)") for digest, path in files.items())
+        # Une réponse Discord accepte au plus 10 pièces jointes
+        attached = [discord.File(path) for path in files.values() if path][:10]
+        await outbound.followup(interaction, f"{header}\n{lines}", files=attached)
+
+    # -------------------------
+    # /stats
+    # -------------------------
+    @tree.command(name="stats")
+    @metrics.timed("command", "stats")
+    async def stats(interaction: discord.Interaction, min_matchs: int = config.STATS_MIN_GAMES):
+        await interaction.response.defer(ephemeral=True)
+
+        if not _is_guild_orga(interaction):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        cols = await WAREHOUSE.columns()
+        summary = await asyncio.to_thread(warehouse.summarize, cols, max(1, min_matchs))
+        await outbound.followup(interaction, embed=embeds.embed_stats(summary, max(1, min_matchs)))
+
+    # -------------------------
+    # /classement
+    # -------------------------
+    @tree.command(name="classement")
+    @metrics.timed("command", "classement")
+    async def classement(interaction: discord.Interaction, recalculer: bool = False, nombre: int = 10):
+        await interaction.response.defer(ephemeral=True)
+
+        if not _is_guild_orga(interaction):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        if recalculer:
+            # Historique complet : entrepôt + tournois en cours pas encore versés
+            cols = await WAREHOUSE.columns()
+            parts = [cols]
+            for t in REGISTRY.all():
+                current = warehouse.tournament_columns(t.state, t.settings.guild_id)
+                if current is not None and not (cols["run"] == current["run"][0]).any():
+                    parts.append(current)
+            t0 = time.perf_counter()
+            table = await asyncio.to_thread(ratings.recompute, warehouse.concat(parts))
+            RATINGS.replace(table)
+            log.info("Ratings recalculés : %d joueurs en %.1f ms", len(table), (time.perf_counter() - t0) * 1000)
+
+        top = RATINGS.top(max(1, min(nombre, 50)))
+        if not top:
+            return await outbound.followup(interaction, "Aucun joueur classé.")
+        lines = [f"{i}. <@{uid}> — {r:.0f} ({games} matchs)" for i, (uid, r, games) in enumerate(top, 1)]
+        await outbound.followup(interaction, embed=embeds.embed_ratings(lines, len(RATINGS)))
+
+    # -------------------------
+    # /suisse
+    # -------------------------
+    @tree.command(name="suisse")
+    @metrics.timed("command", "suisse")
+    async def suisse(
+        interaction: discord.Interaction,
+        date: str,
+        heure: str,
+        rondes: int | None = None,
+        competition: str | None = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        t = _tournament(interaction, competition)
+        if not t:
+            return await outbound.followup(interaction, "Tournoi introuvable.")
+
+        if not permissions.is_orga_or_admin(interaction, t.settings):
+            return await outbound.followup(interaction, "Accès refusé.")
+
+        async with t.lock:
+            state = t.state
+            engine = t.swiss_engine
+
+            if state.bracket.size:
+                return await outbound.followup(interaction, "Un tableau à élimination directe est en cours.")
+
+            if not engine.active:
+                if len(state.teams) < 2:
+                    return await outbound.followup(interaction, "Nombre d'équipes invalide.")
+                if t.store.round_open(state.current_round):
+                    return await outbound.followup(interaction, "Round précédent non terminé.")
+                t.store.set_swiss(SwissState(
+                    rounds=rondes or swiss.default_rounds(len(state.teams)),
+                    base_round=state.current_round,
+                ))
+
+            if engine.finished():
+                return await outbound.followup(
+                    interaction, "Tournoi suisse terminé.",
+                    embed=embeds.embed_swiss_standings(engine.standings(), engine.rounds_played(), state.swiss.rounds),
+                )
+
+            # Créations en échec : relancées avant tout nouveau round
+            if not engine.retry_pending:
+                if t.store.round_open(state.current_round):
+                    return await outbound.followup(interaction, "Round précédent non terminé.")
+                await t.teardown.flush()
 
-        await _refresh_all_embeds(bot)
-        await interaction.followup.send("Horaire modifié.")
\ No newline at end of file
+            progress_msg = await outbound.followup(interaction, "Création des matchs…", wait=True)
+
+            async def progress(done: int, total: int):
+                await outbound.followup_edit(
+                    interaction, progress_msg,
+                    content=f"Création des matchs : {done}/{total}…"
+                )
+
+            created, failed, bye, rematches = await engine.next_round(date, heure, progress)
+
+        summary = f"Round suisse {engine.rounds_played()}/{state.swiss.rounds} : {created} match(s) créé(s)."
+        if bye is not None:
+            summary += f" EQUIPE {bye} exemptée (1 point)."
+        if rematches:
+            summary += f" {rematches} revanche(s) inévitable(s)."
+        if failed:
+            lines = "\n".join(
+                f"• EQUIPE {j.team1.id} vs EQUIPE {j.team2.id} — {j.error}" for j in failed
+            )
+            return await outbound.followup_edit(
+                interaction, progress_msg,
+                content=f"{summary}\n{len(failed)} erreur(s), relancez /suisse pour réessayer :\n{lines}"
+            )
+
+        await outbound.followup_edit(interaction, progress_msg, content=summary)
+
+    # -------------------------
+    # /classement_suisse
+    # -------------------------
+    @tree.command(name="classement_suisse")
+    @metrics.timed("command", "classement_suisse")
+    async def classement_suisse(interaction: discord.Interaction, competition: str | None = None):
+        await interaction.response.defer(ephemeral=True)
+
+        t = _tournament(interaction, competition)
+        if not t or not t.swiss_engine.active:
+            return await outbound.followup(interaction, "Aucun tournoi suisse en cours.")
+
+        engine = t.swiss_engine
+        await outbound.followup(
+            interaction,
+            embed=embeds.embed_swiss_standings(engine.standings(), engine.rounds_played(), t.state.swiss.rounds),
+        )
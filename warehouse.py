@@ -0,0 +1,230 @@
+import asyncio
+import glob
+import logging
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import config
+from state import Match, Team, TournamentState
+
+log = logging.getLogger(__name__)
+
+# Segments (un par tournoi) fusionnés dans results.npz au-delà de ce nombre
+COMPACT_EVERY = 64
+
+N_CLASSES = len(config.CLASSES)
+N_PAIRS = N_CLASSES * N_CLASSES
+MAP_NAMES = [m["name"] for m in config.MAPS]
+
+_CLASS_INDEX = {c: i for i, c in enumerate(config.CLASSES)}
+_MAP_INDEX = {name: i for i, name in enumerate(MAP_NAMES)}
+
+# Une ligne par match décidé
+COLUMNS = {
+    "run": np.int64,      # identifiant du tournoi (plus petit id de salon de match)
+    "guild": np.int64,
+    "round": np.int16,    # 1 = premier round du tournoi
+    "map": np.int8,       # index dans config.MAPS, -1 = inconnue
+    "forfeit": np.bool_,
+    "w_pair": np.int16,   # duo de classes gagnant (pair_code), -1 = classe manquante
+    "l_pair": np.int16,
+    "w_p1": np.int64,     # joueurs (user ids) des deux équipes
+    "w_p2": np.int64,
+    "l_p1": np.int64,
+    "l_p2": np.int64,
+}
+
+Columns = Dict[str, np.ndarray]
+
+
+def pair_code(team: Team) -> int:
+    a, b = (_CLASS_INDEX.get(p.cls, -1) for p in team.players)
+    if a < 0 or b < 0:
+        return -1
+    return min(a, b) * N_CLASSES + max(a, b)
+
+
+def pair_name(code: int) -> str:
+    a, b = divmod(int(code), N_CLASSES)
+    return f"{config.CLASSES[a]} + {config.CLASSES[b]}"
+
+
+def _empty() -> Columns:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def concat(parts: List[Columns]) -> Columns:
+    if not parts:
+        return _empty()
+    return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+
+def tournament_columns(state: TournamentState, guild_id: int) -> Columns | None:
+    """Colonnes des matchs décidés d'un tournoi (None s'il n'y en a aucun)."""
+    done: List[Match] = [m for m in state.matches if m.status == "DONE" and m.winner_team_id is not None]
+    if not done:
+        return None
+
+    teams = {t.id: t for t in state.teams}
+    first_round = min(m.round_no for m in done)
+    run = min(m.channel_id for m in state.matches)
+    rows = []
+    for m in done:
+        winner = teams.get(m.winner_team_id)
+        loser = teams.get(m.team2_id if m.winner_team_id == m.team1_id else m.team1_id)
+        if winner is None or loser is None:
+            continue
+        rows.append((
+            run, guild_id, m.round_no - first_round + 1, _MAP_INDEX.get(m.map_name, -1), m.forfeit,
+            pair_code(winner), pair_code(loser),
+            winner.players[0].user_id, winner.players[1].user_id,
+            loser.players[0].user_id, loser.players[1].user_id,
+        ))
+    if not rows:
+        return None
+    return {
+        name: np.fromiter((r[i] for r in rows), dtype=dtype, count=len(rows))
+        for i, (name, dtype) in enumerate(COLUMNS.items())
+    }
+
+
+class ResultsWarehouse:
+    """Historique des résultats de tous les tournois, en colonnes NumPy.
+
+    Chaque tournoi terminé (ou réinitialisé) est écrit dans un segment
+    <run>.npz ; réécrire le même tournoi remplace son segment. Au-delà de
+    COMPACT_EVERY segments, tout est fusionné dans results.npz. Les
+    requêtes travaillent sur les colonnes concaténées, gardées en mémoire
+    jusqu'à la prochaine écriture.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.compact_path = os.path.join(directory, "results.npz")
+        self._cache: Columns | None = None
+        self._lock = asyncio.Lock()
+
+    # -------------------------
+    # Écriture
+    # -------------------------
+    async def record(self, state: TournamentState, guild_id: int) -> int:
+        """Ajoute (ou remplace) le tournoi ; renvoie le nombre de matchs écrits."""
+        cols = tournament_columns(state, guild_id)
+        if cols is None:
+            return 0
+        async with self._lock:
+            await asyncio.to_thread(self._write_segment, cols)
+            self._cache = None
+        return len(cols["run"])
+
+    def _segments(self) -> List[str]:
+        return sorted(p for p in glob.glob(os.path.join(self.directory, "*.npz")) if p != self.compact_path)
+
+    def _write_segment(self, cols: Columns):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{int(cols['run'][0])}.npz")
+        _save(path, cols)
+        if len(self._segments()) > COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        segments = self._segments()
+        _save(self.compact_path, self._read(segments))
+        for path in segments:
+            os.remove(path)
+        log.info("Entrepôt de résultats compacté (%d segments)", len(segments))
+
+    # -------------------------
+    # Lecture
+    # -------------------------
+    def _read(self, segments: List[str]) -> Columns:
+        parts = [_load(p) for p in segments]
+        if os.path.exists(self.compact_path):
+            base = _load(self.compact_path)
+            # Un segment plus récent remplace le même tournoi dans la base compactée
+            if parts:
+                newer = np.concatenate([p["run"][:1] for p in parts])
+                keep = ~np.isin(base["run"], newer)
+                base = {name: col[keep] for name, col in base.items()}
+            parts.insert(0, base)
+        return concat(parts)
+
+    async def columns(self) -> Columns:
+        async with self._lock:
+            if self._cache is None:
+                self._cache = await asyncio.to_thread(lambda: self._read(self._segments()))
+            return self._cache
+
+
+def _save(path: str, cols: Columns):
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **cols)
+    os.replace(tmp, path)
+
+
+def _load(path: str) -> Columns:
+    with np.load(path) as data:
+        return {name: data[name].astype(dtype, copy=False) for name, dtype in COLUMNS.items()}
+
+
+def pair_stats(cols: Columns, group: np.ndarray | None = None, n_groups: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """(victoires, matchs) par duo de classes, éventuellement par groupe
+    (map, round…) : tableaux (n_groups, N_PAIRS). Les forfaits sont exclus."""
+    played = ~cols["forfeit"]
+    if group is None:
+        group = np.zeros(len(played), dtype=np.int64)
+    group = group.astype(np.int64)
+
+    size = n_groups * N_PAIRS
+    w, l = cols["w_pair"].astype(np.int64), cols["l_pair"].astype(np.int64)
+    w_ok = played & (w >= 0) & (group >= 0)
+    l_ok = played & (l >= 0) & (group >= 0)
+    wins = np.bincount(group[w_ok] * N_PAIRS + w[w_ok], minlength=size)
+    losses = np.bincount(group[l_ok] * N_PAIRS + l[l_ok], minlength=size)
+    return wins.reshape(n_groups, N_PAIRS), (wins + losses).reshape(n_groups, N_PAIRS)
+
+
+def _best(wins: np.ndarray, games: np.ndarray, min_games: int, top: int) -> List[Tuple[str, int, int]]:
+    eligible = np.flatnonzero(games >= min_games)
+    if not len(eligible):
+        return []
+    rate = wins[eligible] / games[eligible]
+    order = eligible[np.lexsort((-games[eligible], -rate))][:top]
+    return [(pair_name(code), int(wins[code]), int(games[code])) for code in order]
+
+
+def summarize(cols: Columns, min_games: int | None = None, top: int = 5) -> dict:
+    min_games = config.STATS_MIN_GAMES if min_games is None else min_games
+    n = len(cols["run"])
+    out = {
+        "tournaments": int(len(np.unique(cols["run"]))),
+        "matches": int(n),
+        "forfeits": int(cols["forfeit"].sum()),
+        "pairs": [],
+        "by_map": {},
+        "by_round": {},
+    }
+    if not n:
+        return out
+
+    wins, games = pair_stats(cols)
+    out["pairs"] = _best(wins[0], games[0], min_games, top)
+
+    wins, games = pair_stats(cols, cols["map"], len(MAP_NAMES))
+    for i, name in enumerate(MAP_NAMES):
+        best = _best(wins[i], games[i], min_games, 1)
+        if best:
+            out["by_map"][name] = best[0]
+
+    n_rounds = int(cols["round"].max())
+    wins, games = pair_stats(cols, cols["round"].astype(np.int64) - 1, n_rounds)
+    for r in range(n_rounds):
+        best = _best(wins[r], games[r], min_games, 1)
+        if best:
+            out["by_round"][r + 1] = best[0]
+    return out
+
+
+WAREHOUSE = ResultsWarehouse(os.path.join(config.DATA_DIR, "warehouse"))
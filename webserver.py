@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Tuple
+
+log = logging.getLogger(__name__)
+
+# Délai maximal pour recevoir les en-têtes d'une requête
+READ_TIMEOUT = 10.0
+# Taille maximale acceptée pour la ligne de requête + en-têtes
+MAX_HEADER_BYTES = 8 * 1024
+
+# Réponse d'un handler : (code HTTP, content-type, corps)
+Reply = Tuple[int, str, str]
+Handler = Callable[[], Awaitable[Reply]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+class WebServer:
+    """Serveur HTTP minimal sur la boucle asyncio du bot (keep-alive, santé, métriques).
+
+    Aucune dépendance ni thread : GET/HEAD uniquement, une requête par
+    connexion. Suffisant pour les pings de l'hébergeur et Prometheus.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._routes: Dict[str, Handler] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    def route(self, path: str):
+        def decorator(handler: Handler) -> Handler:
+            self._routes[path] = handler
+            return handler
+        return decorator
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        log.info("Serveur HTTP à l'écoute sur %s:%d", self.host, self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=READ_TIMEOUT)
+            method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            path = target.split("?", 1)[0]
+
+            handler = self._routes.get(path)
+            if method not in ("GET", "HEAD"):
+                status, ctype, body = 405, "text/plain", "Méthode non autorisée"
+            elif handler is None:
+                status, ctype, body = 404, "text/plain", "Introuvable"
+            else:
+                status, ctype, body = await handler()
+
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {ctype}; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1")
+            )
+            if method != "HEAD":
+                writer.write(data)
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass  # requête incomplète ou invalide : on ferme simplement
+        except ConnectionError:
+            pass
+        except Exception:
+            log.exception("Requête HTTP en échec")
+        finally:
+            writer.close()